@@ -29,3 +29,7 @@ PyDotPlus module entry.
 
 from .parser import *  # noqa
 from .graphviz import *  # noqa
+from .cache import *  # noqa
+from .index import *  # noqa
+from .layout import *  # noqa
+from .columnar import *  # noqa
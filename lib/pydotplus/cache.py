@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2014 Carlos Jenkins <carlos@jenkins.co.cr>
+# Copyright (c) 2014 Lance Hepler
+# Copyright (c) 2004-2011 Ero Carrera <ero@dkbza.org>
+# Copyright (c) 2004-2007 Michael Krause <michael@krause-software.de>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+Cache of parsed dot language data.
+
+A ParseCache can be passed to graph_from_dot_data and graph_from_dot_file
+so that data that was parsed before is not parsed again.
+"""
+
+from __future__ import division, print_function
+
+import os
+import pickle
+import tempfile
+import threading
+
+from collections import OrderedDict
+from hashlib import sha256
+
+from . import parser
+from . import graphviz
+from .version import __version__
+
+
+# Keys that the state of every graph holds.
+_STATE_KEYS = frozenset(
+    ['type', 'name', 'attributes', 'nodes', 'edges', 'subgraphs'])
+
+
+class ParseCache(object):
+    """Cache of the graphs parsed from dot language data.
+
+    Graphs are keyed by a hash of the raw data, of the parser that read
+    it and of graphviz.STATE_FORMAT, and kept as the compact states of
+    graphviz.graph_to_state. Entries that can't be read back into graphs
+    are dropped and count as misses.
+    Up to maxsize entries are held in memory, the least recently used
+    being evicted first. If directory is given, entries are also stored
+    there as pickle files and are read back on a memory miss; only use a
+    directory that no one else can write to.
+
+    Every hit returns new Dot classes, so changing them doesn't change
+    the cached graphs. The hits, disk_hits, misses and evictions counters
+    keep track of the use of the cache.
+    """
+
+    def __init__(self, maxsize=128, directory=None):
+
+        self.maxsize = maxsize
+        self.directory = directory
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        if directory is not None and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def key(self, data, use_pyparsing=False, include=None, exclude=None):
+        """Return the cache key of dot language data."""
+
+        if use_pyparsing:
+            version = 'pyparsing %s' % parser.pyparsing_version
+        else:
+            version = 'dotparser %s' % ','.join(
+                sorted(parser.select_kinds(include, exclude)))
+
+        # Text and bytes are decoded differently, so they never share keys.
+        if isinstance(data, bytes):
+            kind = 'bytes'
+        else:
+            kind = 'text'
+            data = data.encode('utf-8')
+
+        digest = sha256(
+            ('pydotplus %s state %d %s %s\n' % (
+                __version__, graphviz.STATE_FORMAT, version, kind)
+             ).encode('ascii')
+        )
+        digest.update(data)
+
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return the graph states cached under key, or None."""
+
+        with self._lock:
+            states = self._entries.pop(key, None)
+            if states is not None:
+                self._entries[key] = states
+                self.hits += 1
+                return states
+
+        states = self._read(key)
+
+        with self._lock:
+            if states is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.disk_hits += 1
+            self._store(key, states)
+
+        return states
+
+    def put(self, key, states):
+        """Cache a list of graph states under key."""
+
+        with self._lock:
+            self._store(key, states)
+
+        self._write(key, states)
+
+    def discard(self, key):
+        """Remove the entry cached under key, in memory and on disk."""
+
+        with self._lock:
+            self._entries.pop(key, None)
+
+        if self.directory is not None:
+            try:
+                os.remove(self._path(key))
+            except EnvironmentError:
+                pass
+
+    def clear(self):
+        """Remove all the entries held in memory."""
+
+        with self._lock:
+            self._entries.clear()
+
+    def parse_dot_data(self, data, use_pyparsing=False, include=None,
+                       exclude=None, workers=None):
+        """Parse dot language data like parser.parse_dot_data, through
+        the cache."""
+
+        key = self.key(
+            data, use_pyparsing=use_pyparsing, include=include,
+            exclude=exclude)
+        states = self.get(key)
+
+        if states is not None:
+            try:
+                graphs = [
+                    graphviz.graph_from_state(state) for state in states]
+            except Exception:
+                # A damaged entry, which can only have been read from disk,
+                # parse the data again.
+                self.discard(key)
+                with self._lock:
+                    self.hits -= 1
+                    self.disk_hits -= 1
+                    self.misses += 1
+                states = None
+
+        if states is None:
+            graphs = parser.parse_dot_data(
+                data, use_pyparsing=use_pyparsing, include=include,
+                exclude=exclude, workers=workers)
+            if graphs is None:
+                return None
+
+            if isinstance(graphs, list):
+                self.put(key, [graphviz.graph_to_state(g) for g in graphs])
+            else:
+                self.put(key, [graphviz.graph_to_state(graphs)])
+
+            return graphs
+
+        if len(graphs) == 1:
+            return graphs[0]
+        return graphs
+
+    def _store(self, key, states):
+
+        self._entries.pop(key, None)
+        self._entries[key] = states
+
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _path(self, key):
+
+        return os.path.join(self.directory, key + '.pickle')
+
+    def _read(self, key):
+
+        if self.directory is None:
+            return None
+
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, 'rb') as fd:
+                states = pickle.load(fd)
+            if isinstance(states, list) and all(
+                    isinstance(state, dict) and _STATE_KEYS.issubset(state)
+                    for state in states):
+                return states
+        except Exception:
+            pass
+
+        # Truncated or otherwise unreadable entries are misses, and are
+        # removed so that they are written again.
+        self.discard(key)
+        return None
+
+    def _write(self, key, states):
+
+        if self.directory is None:
+            return
+
+        # Write to a temporary file first, so that readers never see a
+        # partly written entry.
+        fd, path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fobj:
+                pickle.dump(states, fobj, pickle.HIGHEST_PROTOCOL)
+            getattr(os, 'replace', os.rename)(path, self._path(key))
+        except EnvironmentError:
+            if os.path.exists(path):
+                os.remove(path)
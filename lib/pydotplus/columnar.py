@@ -0,0 +1,605 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2014 Carlos Jenkins <carlos@jenkins.co.cr>
+# Copyright (c) 2014 Lance Hepler
+# Copyright (c) 2004-2011 Ero Carrera <ero@dkbza.org>
+# Copyright (c) 2004-2007 Michael Krause <michael@krause-software.de>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+"""
+Columnar graphs, for graphs with millions of edges.
+
+A ColumnarGraph holds a graph without subgraphs in arrays instead of the
+obj_dicts of the Dot model: the edges as columns of node numbers and the
+attributes as columns of codes into tables of their distinct values. It
+writes the same dot language as the equivalent Dot, without building one,
+and converts to and from the Dot model with to_dot() and
+graph_to_columnar().
+"""
+
+from __future__ import division, print_function
+
+import sys
+
+from array import array
+from itertools import islice
+from operator import itemgetter
+
+from . import graphviz
+from .graphviz import Dot, Error, Node, quote_if_necessary
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+PY3 = not sys.version_info < (3, 0, 0)
+
+if PY3:
+    basestring = str
+    long = int
+
+# Number of lines of dot language encoded and written at a time by
+# ColumnarGraph.write().
+WRITE_LINES = 10000
+
+# Most attribute lists written by ColumnarGraph.to_string() are kept for
+# reuse by the rows with the same attributes, up to this many.
+ATTR_LIST_CACHE_SIZE = 4096
+
+
+def _node_number_array(values):
+    """Return a column of node numbers as a NumPy array if available.
+
+    The NumPy array shares the memory of the column.
+    """
+
+    if numpy is not None:
+        return numpy.frombuffer(values, dtype=numpy.int64)
+    return values
+
+
+def _extend_node_numbers(column, values):
+
+    if numpy is not None and isinstance(values, numpy.ndarray):
+        column.fromlist(values.astype(numpy.int64).tolist())
+    elif isinstance(values, array) and values.typecode == column.typecode:
+        column.extend(values)
+    else:
+        column.fromlist([int(value) for value in values])
+
+
+def _end_point(name):
+    """Return the name of an edge end point as held by the Dot model."""
+
+    if isinstance(name, Node):
+        name = name.get_name()
+
+    if isinstance(name, (int, long)) and not isinstance(name, bool):
+        name = str(name)
+
+    return quote_if_necessary(name)
+
+
+def _node_name(name):
+    """Return the name of a node as held by the Dot model, without the
+    port, like Node does."""
+
+    if isinstance(name, basestring) and not name.startswith('"'):
+        idx = name.find(':')
+        if idx > 0 and idx + 1 < len(name):
+            name = name[:idx]
+
+    return _end_point(name)
+
+
+class AttributeColumns(object):
+    """Attributes of the rows of a table, in one column per attribute.
+
+    columns maps each attribute name to an array('i') holding a code for
+    each row, the index of the value of the attribute in the list of its
+    distinct values in values. Code 0 stands for rows without the
+    attribute. Rows sharing the same few values take four bytes per
+    attribute.
+    """
+
+    def __init__(self):
+
+        self.columns = dict()
+        self.values = dict()
+        self.rows = 0
+        self._codes = dict()
+
+    def get_code(self, attr, value):
+        """Return the code of a value of an attribute, adding it to the
+        table of values if needed."""
+
+        codes = self._codes.get(attr)
+        if codes is None:
+            codes = self._codes[attr] = dict()
+            self.values[attr] = [None]
+            self.columns[attr] = array('i', [0]) * self.rows
+
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self.values[attr])
+            self.values[attr].append(value)
+
+        return code
+
+    def append(self, attrs, count=1):
+        """Add count rows, all with the attributes in the dict attrs."""
+
+        codes = dict(
+            (attr, self.get_code(attr, value))
+            for attr, value in attrs.items())
+
+        for attr, column in self.columns.items():
+            code = codes.get(attr, 0)
+            if count == 1:
+                column.append(code)
+            else:
+                column.extend(array('i', [code]) * count)
+
+        self.rows += count
+
+    def get(self, row):
+        """Return the attributes of a row as a dict."""
+
+        attrs = dict()
+        for attr, column in self.columns.items():
+            code = column[row]
+            if code:
+                attrs[attr] = self.values[attr][code]
+
+        return attrs
+
+    def iter_attr_lists(self, prefix):
+        """Generate the attribute list of each row in dot language, as
+        written by Node.to_string and Edge.to_string after the ID(s).
+
+        Rows without attributes get an empty string, the others prefix
+        followed by the list in brackets.
+        """
+
+        names = sorted(self.columns)
+        if not names:
+            for row in range(self.rows):
+                yield ''
+            return
+
+        tables = [self.values[attr] for attr in names]
+        cache = dict()
+
+        for key in zip(*[self.columns[attr] for attr in names]):
+            text = cache.get(key)
+            if text is None:
+                attr_list = list()
+                for attr, table, code in zip(names, tables, key):
+                    if not code:
+                        continue
+                    value = table[code]
+                    if value is not None:
+                        attr_list.append(
+                            '%s=%s' % (attr, quote_if_necessary(value)))
+                    else:
+                        attr_list.append(attr)
+
+                text = ''
+                if attr_list:
+                    text = prefix + '[' + ', '.join(attr_list) + ']'
+
+                if len(cache) >= ATTR_LIST_CACHE_SIZE:
+                    cache.clear()
+                cache[key] = text
+
+            yield text
+
+
+class ColumnarGraph(object):
+    """Graph held in columns, for graphs with millions of edges.
+
+    ColumnarGraph(graph_name='G', graph_type='digraph', strict=False,
+        suppress_disconnected=False, simplify=False, attribute=value, ...)
+
+    takes the same arguments as Dot. Nodes are numbered from 0 in the
+    order their names are first used: node_names is the table of the
+    names, in the form the Dot model holds them (quoted if needed, and
+    with the port for edge end points), and node_index maps each name to
+    its number. The i-th edge goes from node src[i] to node dst[i], both
+    array('q') columns, and its attributes are the i-th row of
+    edge_attributes, an AttributeColumns.
+
+    Node statements are held apart from the table of names, the i-th one
+    being about node node_rows[i], with the attributes in the i-th row of
+    node_attributes. It comes after the first node_pos[i] edges in the dot
+    language, which keeps the order of the statements. Default statements
+    like 'node [shape=box]' are node statements for nodes named 'node',
+    'edge' or 'graph', as in the Dot model. Subgraphs are not supported.
+
+    The graph is rendered by Graphviz like a Dot, with create() and
+    write() and the create_'format'() and write_'format'() methods.
+    """
+
+    def __init__(
+            self, graph_name='G', graph_type='digraph', strict=False,
+            suppress_disconnected=False, simplify=False, **attrs):
+
+        if graph_type not in ('graph', 'digraph'):
+            raise Error((
+                'Invalid type "%s". Accepted graph types are: '
+                'graph, digraph' % graph_type
+            ))
+
+        self.graph_name = quote_if_necessary(graph_name)
+        self.graph_type = graph_type
+        self.strict = strict
+        self.suppress_disconnected = suppress_disconnected
+        self.simplify = simplify
+        self.attributes = dict(attrs)
+
+        self.node_names = list()
+        self.node_index = dict()
+
+        self.src = array('q')
+        self.dst = array('q')
+        self.edge_attributes = AttributeColumns()
+
+        self.node_rows = array('q')
+        self.node_pos = array('q')
+        self.node_attributes = AttributeColumns()
+
+        self.shape_files = list()
+        self.progs = None
+        self.formats = list(graphviz.OUTPUT_FORMATS)
+        self.prog = 'dot'
+
+    # Graphviz is run on the output of write(), as for a Dot.
+    set_shape_files = Dot.__dict__['set_shape_files']
+    set_prog = Dot.__dict__['set_prog']
+    set_graphviz_executables = Dot.__dict__['set_graphviz_executables']
+    create = Dot.__dict__['create']
+
+    def get_charset(self):
+
+        return self.attributes.get('charset')
+
+    def add_node_name(self, name):
+        """Return the number of a node, adding its name to the table of
+        names if needed."""
+
+        name = _end_point(name)
+
+        idx = self.node_index.get(name)
+        if idx is None:
+            idx = self.node_index[name] = len(self.node_names)
+            self.node_names.append(name)
+
+        return idx
+
+    def add_node(self, name, **attrs):
+        """Add a node statement, like Graph.add_node(Node(name, **attrs)).
+
+        Returns the number of the node.
+        """
+
+        return self._add_node(name, attrs)
+
+    def _add_node(self, name, attrs):
+
+        idx = self.add_node_name(_node_name(name))
+
+        self.node_rows.append(idx)
+        self.node_pos.append(len(self.src))
+        self.node_attributes.append(attrs)
+
+        return idx
+
+    def add_edge(self, src, dst, **attrs):
+        """Add an edge, like Graph.add_edge(Edge(src, dst, **attrs)).
+
+        Returns the index of the edge.
+        """
+
+        return self._add_edge(src, dst, attrs)
+
+    def _add_edge(self, src, dst, attrs):
+
+        self.src.append(self.add_node_name(src))
+        self.dst.append(self.add_node_name(dst))
+        self.edge_attributes.append(attrs)
+
+        return len(self.src) - 1
+
+    def add_edges(self, src, dst, **attrs):
+        """Add edges between numbered nodes, all with the same attributes.
+
+        src and dst are sequences of node numbers of the same length, such
+        as lists, arrays or NumPy arrays. Returns the index of the first
+        edge added. Raises IndexError, without adding any edge, if a node
+        number is not in the table of names.
+        """
+
+        src_column = array('q')
+        dst_column = array('q')
+        _extend_node_numbers(src_column, src)
+        _extend_node_numbers(dst_column, dst)
+
+        if len(src_column) != len(dst_column):
+            raise ValueError('src and dst have different lengths')
+
+        for column in (src_column, dst_column):
+            if column and (min(column) < 0 or
+                           max(column) >= len(self.node_names)):
+                raise IndexError('node number out of range')
+
+        first = len(self.src)
+        self.src.extend(src_column)
+        self.dst.extend(dst_column)
+        self.edge_attributes.append(attrs, len(src_column))
+
+        return first
+
+    def get_edge_count(self):
+
+        return len(self.src)
+
+    def get_edge(self, index):
+        """Return the source and destination names and the attributes of
+        an edge."""
+
+        return (
+            self.node_names[self.src[index]],
+            self.node_names[self.dst[index]],
+            self.edge_attributes.get(index))
+
+    def get_edge_columns(self):
+        """Return the src and dst columns, as NumPy arrays if available.
+
+        The NumPy arrays share the memory of the columns, which can't
+        grow while they are in use.
+        """
+
+        return _node_number_array(self.src), _node_number_array(self.dst)
+
+    def _iter_lines(self):
+        """Generate the lines of the dot language of the graph."""
+
+        if self.strict:
+            yield 'strict '
+
+        if self.graph_name == '':
+            yield '{\n'
+        else:
+            yield '%s %s {\n' % (self.graph_type, self.graph_name)
+
+        for attr, value in sorted(self.attributes.items()):
+            if value is not None:
+                yield '%s=%s;\n' % (attr, quote_if_necessary(value))
+            else:
+                yield attr + ';\n'
+
+        if self.graph_type == 'digraph':
+            edge_op = ' -> '
+        else:
+            edge_op = ' -- '
+
+        names = self.node_names
+        refs = [graphviz._parse_node_ref(name) for name in names]
+        edges = zip(
+            self.src, self.dst, self.edge_attributes.iter_attr_lists('  '))
+        edges_done = set() if self.simplify else None
+
+        connected = None
+        if self.suppress_disconnected:
+            connected = self._get_connected()
+
+        def edge_lines(count):
+            for src, dst, attr_list in islice(edges, count):
+                if edges_done is not None:
+                    key = (src, dst)
+                    if self.graph_type == 'graph' and dst < src:
+                        key = (dst, src)
+                    if key in edges_done:
+                        continue
+                    edges_done.add(key)
+                yield refs[src] + edge_op + refs[dst] + attr_list + ';\n'
+
+        done = 0
+        for idx, pos, attr_list in zip(
+                self.node_rows, self.node_pos,
+                self.node_attributes.iter_attr_lists(' ')):
+            for line in edge_lines(pos - done):
+                yield line
+            done = pos
+
+            if connected is not None and not connected[idx]:
+                continue
+
+            node = quote_if_necessary(names[idx])
+            if node in ('graph', 'node', 'edge') and not attr_list:
+                yield '\n'
+            else:
+                yield node + attr_list + ';\n'
+
+        for line in edge_lines(None):
+            yield line
+
+        yield '}\n'
+
+    def _get_connected(self):
+        """Return a bytearray with a true byte for the nodes with edges.
+
+        Edge end points count as written, ports included, like for
+        Graph.to_string.
+        """
+
+        connected = bytearray(len(self.node_names))
+        for column in (self.src, self.dst):
+            for idx in set(column):
+                connected[idx] = 1
+
+        return connected
+
+    def to_string(self):
+        """Return the graph in dot language, as the equivalent Dot's
+        to_string() does."""
+
+        return ''.join(self._iter_lines())
+
+    def write(self, path, prog=None, format='raw'):
+        """Write the graph to path, like Dot.write.
+
+        The raw format is written as it is produced, a few lines at a
+        time, rather than built as a whole in memory first.
+        """
+
+        if prog is None:
+            prog = self.prog
+
+        fobj, close = graphviz.get_fobj(path, 'w+b')
+        try:
+            if format == 'raw':
+                charset = self.get_charset()
+                if not PY3 or not charset:
+                    charset = 'utf-8'
+
+                lines = self._iter_lines()
+                while True:
+                    data = ''.join(islice(lines, WRITE_LINES))
+                    if not data:
+                        break
+                    try:
+                        data = data.encode(charset)
+                    except (LookupError, UnicodeError):
+                        data = data.encode('utf-8')
+                    fobj.write(data)
+
+            else:
+                fobj.write(self.create(prog, format))
+        finally:
+            if close:
+                fobj.close()
+
+        return True
+
+    def to_dot(self):
+        """Convert the graph into a Dot."""
+
+        graph = Dot(
+            graph_type=self.graph_type, strict=self.strict,
+            suppress_disconnected=self.suppress_disconnected,
+            simplify=self.simplify)
+        graph.obj_dict['name'] = self.graph_name
+        graph.obj_dict['attributes'] = dict(self.attributes)
+
+        graph.shape_files = list(self.shape_files)
+        graph.progs = self.progs
+        graph.prog = self.prog
+
+        obj_dict = graph.obj_dict
+        names = self.node_names
+        node_attrs = self.node_attributes
+        edge_attrs = self.edge_attributes
+
+        done = 0
+        for row, (idx, pos) in enumerate(zip(self.node_rows, self.node_pos)):
+            for edge in range(done, pos):
+                graphviz._add_edge_obj_dict(obj_dict, graphviz._edge_obj_dict(
+                    names[self.src[edge]], names[self.dst[edge]],
+                    edge_attrs.get(edge)))
+            done = pos
+
+            graphviz._add_node_obj_dict(obj_dict, graphviz._node_obj_dict(
+                names[idx], node_attrs.get(row)))
+
+        for edge in range(done, len(self.src)):
+            graphviz._add_edge_obj_dict(obj_dict, graphviz._edge_obj_dict(
+                names[self.src[edge]], names[self.dst[edge]],
+                edge_attrs.get(edge)))
+
+        return graph
+
+
+for _frmt in graphviz.OUTPUT_FORMATS:
+    setattr(ColumnarGraph, 'create_' + _frmt, graphviz._create_method(_frmt))
+for _frmt in graphviz.OUTPUT_FORMATS + ('raw',):
+    setattr(ColumnarGraph, 'write_' + _frmt, graphviz._write_method(_frmt))
+del _frmt
+
+
+def graph_to_columnar(graph):
+    """Convert a Graph without subgraphs into a ColumnarGraph.
+
+    Raises Error if the graph has subgraphs or edges to subgraphs, which
+    ColumnarGraph doesn't support.
+    """
+
+    obj_dict = graph.obj_dict
+
+    if obj_dict['subgraphs'] or obj_dict['type'] not in ('graph', 'digraph'):
+        raise Error('ColumnarGraph does not support subgraphs')
+
+    cgraph = ColumnarGraph(
+        graph_type=obj_dict['type'],
+        strict=obj_dict.get('strict', False),
+        suppress_disconnected=obj_dict.get('suppress_disconnected', False),
+        simplify=obj_dict.get('simplify', False))
+    cgraph.graph_name = obj_dict['name']
+    cgraph.attributes = dict(obj_dict['attributes'].items())
+
+    for attr in ('shape_files', 'progs', 'prog'):
+        if hasattr(graph, attr):
+            setattr(cgraph, attr, getattr(graph, attr))
+    cgraph.shape_files = list(cgraph.shape_files)
+
+    nodes = sorted((
+        (obj['sequence'], obj)
+        for obj_list in obj_dict['nodes'].values() for obj in obj_list),
+        key=itemgetter(0))
+    edges = sorted((
+        (obj['sequence'], obj)
+        for obj_list in obj_dict['edges'].values() for obj in obj_list),
+        key=itemgetter(0))
+
+    for seq, obj in edges:
+        for point in obj['points']:
+            if not isinstance(point, (basestring, int, long)):
+                raise Error('ColumnarGraph does not support subgraphs')
+
+    done = 0
+    for seq, obj in nodes:
+        while done < len(edges) and edges[done][0] < seq:
+            edge = edges[done][1]
+            cgraph._add_edge(
+                edge['points'][0], edge['points'][1],
+                dict(graphviz._get_attributes(edge).items()))
+            done += 1
+
+        cgraph._add_node(
+            obj['name'], dict(graphviz._get_attributes(obj).items()))
+
+    for seq, edge in edges[done:]:
+        cgraph._add_edge(
+            edge['points'][0], edge['points'][1],
+            dict(graphviz._get_attributes(edge).items()))
+
+    return cgraph
@@ -45,12 +45,24 @@ import sys
 import tempfile
 # 导入复制模块
 import copy
+# 导入多进程模块，用于并行读取多个文件
+import multiprocessing
+# 导入json模块，用于读写Graphviz的JSON输出
+import json
+import types
+import weakref
 
 # 从operator模块中导入itemgetter函数，这个模块是什么意思，目前不知道
 from operator import itemgetter
 
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
+
 # 从当前目录导入parser解析模块
 from . import parser
+from .lexer import scan_quoted
 
 # 判断使用的模块是否是3.0版本,如果是,则PY3的值是True
 PY3 = not sys.version_info < (3, 0, 0)
@@ -224,6 +236,8 @@ class frozendict(dict):
         args_ = []
         # 对args进行遍历
         for arg in args:
+            if isinstance(arg, ElementRecord):
+                arg = dict(arg)
             #  如果arg是一个字典
             if isinstance(arg, dict):
                 # 那么复制一下arg
@@ -245,7 +259,7 @@ class frozendict(dict):
                         # 对v进行遍历
                         for elm in v:
                             # 如果elm是字典
-                            if isinstance(elm, dict):
+                            if isinstance(elm, (dict, ElementRecord)):
                                 # 那么将elm变成frozendict然后添加进v_
                                 v_.append(frozendict(elm))
                                 # 否则，直接添加进v_
@@ -290,8 +304,11 @@ dot_keywords = ['graph', 'subgraph', 'digraph', 'node', 'edge', 'strict']
 id_re_alpha_nums = re.compile('^[_a-zA-Z][a-zA-Z0-9_,]*$', re.UNICODE)
 id_re_alpha_nums_with_ports = re.compile(
     '^[_a-zA-Z][a-zA-Z0-9_,:\"]*[a-zA-Z0-9_,\"]+$', re.UNICODE
+)
 id_re_num = re.compile('^[0-9,]+$', re.UNICODE)
 id_re_with_port = re.compile('^([^:]*):([^:]*)$', re.UNICODE)
+# Characters that are not allowed in IDs that aren't quoted.
+id_re_non_ascii = re.compile(u'[^\x01-\x7f]', re.UNICODE)
 id_re_dbl_quoted = re.compile('^\".*\"$', re.S | re.UNICODE)
 id_re_html = re.compile('^<.*>$', re.S | re.UNICODE)
 
@@ -319,8 +336,8 @@ def needs_quotes(s):
     if s in dot_keywords:
         return False
 
-    chars = [ord(c) for c in s if ord(c) > 0x7f or ord(c) == 0]
-    if chars and not id_re_dbl_quoted.match(s) and not id_re_html.match(s):
+    if id_re_non_ascii.search(s) and not id_re_dbl_quoted.match(s) and \
+            not id_re_html.match(s):
         return True
 
     for test_re in [
@@ -376,36 +393,1081 @@ def quote_if_necessary(s):
         # 返回s
     return s
 
+
+class StringInterner(object):
+    """Bounded table of canonical strings.
+
+    Large graphs repeat the same node names, attribute names and values
+    many times. intern(s) returns the copy of s held by the table, so
+    that equal strings share a single object, which saves memory and
+    makes dictionary lookups on them faster. Strings longer than
+    maxlength, which rarely repeat, are returned as is, and once the
+    table holds maxsize strings new strings are no longer added.
+
+    The parser and the Node, Edge and Graph constructors use the module
+    level string_interner unless given another table.
+    """
+
+    def __init__(self, maxsize=65536, maxlength=64):
+
+        self.maxsize = maxsize
+        self.maxlength = maxlength
+        self._table = dict()
+
+    def __len__(self):
+
+        return len(self._table)
+
+    def intern(self, s):
+        """Return the canonical copy of s, or s if it's not a string."""
+
+        if not isinstance(s, basestring) or len(s) > self.maxlength:
+            return s
+
+        table = self._table
+        if len(table) < self.maxsize:
+            return table.setdefault(s, s)
+        return table.get(s, s)
+
+    def intern_attributes(self, attrs):
+        """Return a copy of attrs with its names and values interned.
+
+        LazyAttributes that haven't been decoded yet are copied as they
+        are, their strings are interned here once decoded.
+        """
+
+        if isinstance(attrs, LazyAttributes) and attrs.source is not None:
+            return LazyAttributes(attrs.source, self)
+
+        intern = self.intern
+        return dict((intern(k), intern(v)) for k, v in attrs.items())
+
+    def clear(self):
+        """Remove all the strings from the table."""
+
+        self._table.clear()
+
+
+# Table of strings shared by all the graphs, see StringInterner.
+string_interner = StringInterner()
+
+
+class LazyAttributes(MutableMapping):
+    """Attributes mapping decoded from dot language on first use.
+
+    source is the text of one or more attribute lists, brackets
+    included, such as '[color=red, label="a"]'. It is kept as is until
+    the mapping is read or changed, which decodes it and interns the
+    names and values in interner, by default string_interner. Graphs
+    read from large files usually have most of their attributes never
+    looked at, and are parsed faster and take less memory this way.
+
+    LazyAttributes are only held by records, which hand out the decoded
+    dict instead from obj_dict['attributes'] and get_attributes(), see
+    ElementRecord. Decoding raises DotSyntaxError if source is not a
+    valid attribute list, with the location of the error within source.
+    Copies and pickles of a LazyAttributes are plain dicts.
+    """
+
+    __slots__ = ('source', '_interner', '_attrs')
+
+    def __init__(self, source, interner=None):
+
+        self.source = source
+        self._interner = interner
+        self._attrs = dict()
+
+    def decode(self):
+        """Decode the source, if it hasn't been yet, and return the
+        decoded attributes as a dict."""
+
+        source = self.source
+        if source is not None:
+            attrs = parser.parse_attr_list(source)
+            interner = self._interner
+            if interner is None:
+                interner = string_interner
+            self.source = None
+            self._interner = None
+            self._attrs.update(interner.intern_attributes(attrs))
+
+        return self._attrs
+
+    def __getitem__(self, key):
+
+        return self.decode()[key]
+
+    def __setitem__(self, key, value):
+
+        self.decode()[key] = value
+
+    def __delitem__(self, key):
+
+        del self.decode()[key]
+
+    def __contains__(self, key):
+
+        return key in self.decode()
+
+    def __iter__(self):
+
+        return iter(self.decode())
+
+    def __len__(self):
+
+        return len(self.decode())
+
+    def get(self, key, default=None):
+
+        return self.decode().get(key, default)
+
+    def keys(self):
+
+        return self.decode().keys()
+
+    def values(self):
+
+        return self.decode().values()
+
+    def items(self):
+
+        return self.decode().items()
+
+    def copy(self):
+
+        return dict(self.decode())
+
+    def __reduce__(self):
+
+        return dict, (self.copy(),)
+
+    def __repr__(self):
+
+        if self.source is not None:
+            return 'LazyAttributes(%r)' % self.source
+        return repr(self._attrs)
+
+
 # 从dot数据中创建图，传入的参数是data
-def graph_from_dot_data(data):
+def graph_from_dot_data(data, use_pyparsing=False, cache=None,
+                        include=None, exclude=None, workers=None,
+                        lazy_attributes=False):
     # 引导一个图，这个图被DOT格式的数据定义，这个数据被假定为DOT格式，它将被解释，返回一个Dot类，展现图
     """Load graph as defined by data in DOT format.
 
     The data is assumed to be in DOT format. It will
     be parsed and a Dot class will be returned,
     representing the graph.
+
+    If use_pyparsing is True the data is parsed with
+    the pyparsing grammar instead of the built-in parser.
+
+    If a ParseCache is given as cache, data parsed before
+    is read from it instead of being parsed again.
+
+    include and exclude select the kinds of statements
+    that are kept, see parser.parse_dot_data.
+
+    If workers is given, large graphs are split and parsed
+    in that many processes, see parser.parse_dot_parallel.
+
+    If lazy_attributes is True, attribute lists are only
+    decoded when first used, see parser.DotParser. Graphs
+    read through a cache are always decoded.
     """
+    if cache is not None:
+        return cache.parse_dot_data(
+            data, use_pyparsing=use_pyparsing, include=include,
+            exclude=exclude, workers=workers)
+
     # 调用parser中的parse_dot_data
-    return parser.parse_dot_data(data)
+    return parser.parse_dot_data(
+        data, use_pyparsing=use_pyparsing, include=include, exclude=exclude,
+        workers=workers, lazy_attributes=lazy_attributes)
 
 
 # 定义一个图，从dot文件中，传入的参数是路径
-def graph_from_dot_file(path):
+def graph_from_dot_file(path, use_pyparsing=False, cache=None,
+                        include=None, exclude=None, workers=None,
+                        lazy_attributes=False):
     # 从dot文件中定义一个图，这个file被假定为Dot格式，它将被读取，解释，返回一个dot类，展现图
     """Load graph as defined by a DOT file.
 
     The file is assumed to be in DOT format. It will
     be loaded, parsed and a Dot class will be returned,
     representing the graph.
+
+    If use_pyparsing is True the file is parsed with
+    the pyparsing grammar instead of the built-in parser,
+    otherwise the file is memory mapped and decoded
+    without reading its bytes into memory.
+
+    If a ParseCache is given as cache, files with the same
+    contents as a file parsed before are read from it
+    instead of being parsed again.
+
+    include and exclude select the kinds of statements
+    that are kept, see parser.parse_dot_data.
+
+    If workers is given, large graphs are split and parsed
+    in that many processes, see parser.parse_dot_parallel.
+
+    If lazy_attributes is True, attribute lists are only
+    decoded when first used, see parser.DotParser. Graphs
+    read through a cache are always decoded.
+    """
+    if cache is not None:
+        with open(path, 'rb') as fd:
+            data = fd.read()
+        return cache.parse_dot_data(
+            data, use_pyparsing=use_pyparsing, include=include,
+            exclude=exclude, workers=workers)
+
+    # 调用parser中的parse_dot_file
+    return parser.parse_dot_file(
+        path, use_pyparsing=use_pyparsing, include=include, exclude=exclude,
+        workers=workers, lazy_attributes=lazy_attributes)
+
+
+def iter_graphs_from_dot_data(data):
+    """Iterate over the graphs defined by data in DOT format.
+
+    The graphs are parsed and returned one at a time as Dot
+    classes, instead of all at once as in graph_from_dot_data.
+    A DotSyntaxError is raised if the data is not valid.
+    """
+
+    return parser.DotParser(parser.decode_dot_data(data)).iter_graphs()
+
+
+def iter_graphs_from_dot_file(path, encoding='utf-8'):
+    """Iterate over the graphs defined by a DOT file.
+
+    The file is read in chunks and the graphs are parsed and
+    returned one at a time as Dot classes, so memory use is
+    bounded by the largest graph instead of the whole file.
+    A DotSyntaxError is raised if the file is not valid.
     """
-# 返回文件权柄，读取格式是rb
-    fd = open(path, 'rb')
-    # 读取数据
-    data = fd.read()
-    # 关闭文件权柄
-    fd.close()
-    # 调用从dot_data创建图
-    return graph_from_dot_data(data)
+
+    with open(path, 'rb') as fd:
+        for graph in parser.DotParser(fd, encoding=encoding).iter_graphs():
+            yield graph
+
+
+class _FrozenState(tuple):
+    """State of a frozendict, as a hashable tuple of (key, value) items."""
+
+
+class _RecordState(tuple):
+    """State of an ElementRecord, as a tuple of its class name, the values
+    of its fields and its other keys."""
+
+
+def _dump_state(value, memo):
+
+    if isinstance(value, ElementRecord):
+        state = [value.__class__.__name__]
+        for k, v in zip(value._fields, value._values()):
+            if k == 'parent_graph':
+                v = None
+            else:
+                v = _dump_state(v, memo)
+                if k == 'attributes' and not v:
+                    # Stored as None, like the attributes of new records.
+                    v = None
+            state.append(v)
+        state.append(_dump_state(value._extra, memo))
+        return _RecordState(state)
+
+    if isinstance(value, frozendict):
+        state = memo.get(id(value))
+        if state is None:
+            state = memo[id(value)] = _FrozenState(
+                (k, None if k == 'parent_graph' else _dump_state(v, memo))
+                for k, v in value.items()
+            )
+        return state
+
+    if isinstance(value, (dict, LazyAttributes)):
+        return dict(
+            (_dump_state(k, memo),
+             None if k == 'parent_graph' else _dump_state(v, memo))
+            for k, v in value.items()
+        )
+
+    if isinstance(value, list):
+        return [_dump_state(v, memo) for v in value]
+
+    if isinstance(value, tuple):
+        return tuple(_dump_state(v, memo) for v in value)
+
+    return value
+
+
+def _load_state(state, graph, memo):
+
+    if isinstance(state, _RecordState):
+        cls = _RECORD_CLASSES[state[0]]
+        record = cls.__new__(cls)
+        record.__setstate__([
+            graph if k == 'parent_graph' else _load_state(v, graph, memo)
+            for k, v in zip(cls._fields + ('_extra',), state[1:])
+        ])
+        return record
+
+    if isinstance(state, _FrozenState):
+        value = memo.get(id(state))
+        if value is None:
+            value = memo[id(state)] = frozendict(
+                (k, graph if k == 'parent_graph' else
+                 _load_state(v, graph, memo))
+                for k, v in state
+            )
+        return value
+
+    if isinstance(state, dict):
+        return dict(
+            (_load_state(k, graph, memo),
+             graph if k == 'parent_graph' else _load_state(v, graph, memo))
+            for k, v in state.items()
+        )
+
+    if isinstance(state, list):
+        return [_load_state(v, graph, memo) for v in state]
+
+    if isinstance(state, tuple):
+        return tuple(_load_state(v, graph, memo) for v in state)
+
+    return state
+
+
+# Version of the layout of the states returned by graph_to_state, to be
+# increased whenever that layout changes.
+STATE_FORMAT = 1
+
+
+def graph_to_state(graph):
+    """Return a compact, picklable copy of graph's data.
+
+    The state holds only the plain dicts, lists and strings of the
+    obj_dict tree. The parent_graph back references, which make pickling
+    slow and recursive, are left out and restored by graph_from_state.
+    """
+
+    return _dump_state(graph.obj_dict, {})
+
+
+def graph_from_state(state):
+    """Create a Dot class from a state returned by graph_to_state."""
+
+    graph = Dot(obj_dict=dict())
+    graph.obj_dict.update(_load_state(state, graph, {}))
+
+    return graph
+
+
+# Keys of Graphviz's JSON output that are not graph, node or edge attributes.
+_JSON_KEYS = frozenset([
+    'name', 'directed', 'strict', '_subgraph_cnt', '_gvid', 'objects',
+    'nodes', 'edges', 'subgraphs', 'tail', 'head',
+])
+
+
+# IDs that need no quotes, the names and numerals of the dot language.
+_json_plain_id_re = re.compile(
+    r'^(?:[^\x00-\x40\x5b-\x5e\x60\x7b-\x7f]'
+    r'[^\x00-\x2f\x3a-\x40\x5b-\x5e\x60\x7b-\x7f]*|'
+    r'-?(?:\.[0-9]+|[0-9]+(?:\.[0-9]*)?))$')
+
+
+def _json_attributes(obj):
+    """Return the attributes of a JSON object as dot language values."""
+
+    attrs = dict()
+
+    for key, value in obj.items():
+        if key in _JSON_KEYS:
+            continue
+
+        if isinstance(value, bool):
+            value = 'true' if value else 'false'
+        elif isinstance(value, (int, long, float)):
+            value = str(value)
+        elif not isinstance(value, basestring):
+            # The drawing operations of -Tjson, already parsed into lists
+            # of objects, have no dot language form. -Tjson0 keeps them as
+            # xdot strings.
+            continue
+
+        attrs[key] = _json_id(value)
+
+    return attrs
+
+
+# Backslashes before a double quote or the end of a quoted ID, the only
+# ones that quoting has to escape.
+_json_escape_re = re.compile(r'(\\*)("|\Z)')
+_dot_unescape_re = re.compile(r'(\\+)("|\Z)')
+
+
+def _json_id(value):
+    """Return a string read from JSON as a dot language ID."""
+
+    if value == '' or value.lower() in dot_keywords or (
+            not _json_plain_id_re.match(value) and
+            not id_re_html.match(value)):
+        return '"%s"' % _json_escape_re.sub(
+            lambda m: m.group(1) * 2 + (m.group(2) and '\\"'), value)
+
+    return value
+
+
+def _dot_unquote(s):
+    """Return the text of a dot language ID, without quotes or escapes."""
+
+    if not isinstance(s, basestring):
+        return str(s)
+
+    if len(s) > 1 and s.startswith('"') and s.endswith('"'):
+        return _dot_unescape_re.sub(
+            lambda m: m.group(1)[:len(m.group(1)) // 2] + m.group(2),
+            s[1:-1].replace('\\\n', ''))
+
+    return s
+
+
+def _split_port(point):
+    """Split an edge end point into its node name and port, if any."""
+
+    if point.startswith('"'):
+        end = scan_quoted(point, 0)
+        if end < 0:
+            return point, None
+    else:
+        end = point.find(':')
+        if end < 0:
+            return point, None
+
+    if point[end:end + 1] != ':':
+        return point, None
+
+    return point[:end], point[end + 1:]
+
+
+def graph_from_json(data):
+    """Load graph as defined by Graphviz's JSON output.
+
+    data is the text, or bytes, of the output of Graphviz's json or
+    json0 formats, or of graph_to_json. The Dot class returned is built
+    like the ones returned by graph_from_dot_data: each node is declared
+    in the innermost subgraph that holds it and the attributes are kept
+    as dot language values. The drawing operations of the json format,
+    which are not strings, are left out.
+
+    The statements are laid out in the order of the _gvid numbers of the
+    nodes, edges and subgraphs, so that graph_to_json numbers them the
+    same way, see _JSONReader.
+    """
+
+    if isinstance(data, bytes) and not isinstance(data, unicode):
+        data = data.decode('utf-8')
+
+    doc = json.loads(data)
+
+    graph = Dot(
+        graph_name=_json_id(doc.get('name', 'G')),
+        graph_type='digraph' if doc.get('directed', True) else 'graph',
+        strict=bool(doc.get('strict', False)))
+    graph.obj_dict['attributes'].update(_json_attributes(doc))
+
+    _JSONReader(graph, doc).read()
+
+    return graph
+
+
+class _JSONReader(object):
+    """Lays out the objects of Graphviz's JSON output as statements.
+
+    _JSONWriter numbers nodes in the order they are first mentioned,
+    edges in the order they are added and subgraphs in the order they
+    are opened, so the statements are added in those orders: each edge
+    goes in the innermost subgraph that lists it and, before it, the
+    nodes up to its ends are mentioned in order. Nodes are declared with
+    their attributes in the innermost subgraph that holds them, where
+    that is open when their turn comes, and in a bare node statement
+    otherwise. A named subgraph left before all its nodes and edges are
+    added is opened again under the same name, which adds to the same
+    subgraph.
+    """
+
+    def __init__(self, graph, doc):
+
+        self.graph = graph
+
+        objects = doc.get('objects', [])
+        count = doc.get('_subgraph_cnt', 0)
+
+        self.sgraphs = dict(
+            (obj.get('_gvid', idx), obj)
+            for idx, obj in enumerate(objects[:count]))
+        self.nodes = dict(
+            (obj.get('_gvid', idx + count), obj)
+            for idx, obj in enumerate(objects[count:]))
+        self.edges = doc.get('edges', [])
+
+        self.names = dict(
+            (gvid, _json_id(obj['name'])) for gvid, obj in self.nodes.items())
+
+        parents = dict()
+        for gvid in sorted(self.sgraphs):
+            for child in self.sgraphs[gvid].get('subgraphs', []):
+                parents.setdefault(child, gvid)
+
+        # Subgraphs from the top level one down to each subgraph.
+        self.chains = dict()
+        for gvid in self.sgraphs:
+            chain = [gvid]
+            while parents.get(chain[0]) in self.sgraphs and \
+                    parents[chain[0]] not in chain:
+                chain.insert(0, parents[chain[0]])
+            self.chains[gvid] = tuple(chain)
+
+        self.members = dict(
+            (gvid, set(obj.get('nodes', [])))
+            for gvid, obj in self.sgraphs.items())
+
+        # Innermost subgraphs of the nodes and of the edges, by the chain
+        # of subgraphs that leads to them.
+        self.node_chains = dict()
+        self.edge_chains = dict()
+        for gvid in sorted(self.sgraphs):
+            chain = self.chains[gvid]
+            for key, chains in (
+                    ('nodes', self.node_chains), ('edges', self.edge_chains)):
+                for idx in self.sgraphs[gvid].get(key, []):
+                    if len(chains.get(idx, ())) < len(chain):
+                        chains[idx] = chain
+
+        self.node_order = sorted(self.nodes)
+        self.next_node = 0
+        self.seen = set()
+        self.declared = set()
+
+        self.sgraph_order = sorted(self.sgraphs)
+        self.next_sgraph = 0
+        self.opened = set()
+        self.mentioned = dict((gvid, set()) for gvid in self.sgraphs)
+
+        # The open subgraphs, as (gvid, obj_dict) pairs.
+        self.stack = list()
+
+    def read(self):
+
+        for idx, obj in enumerate(self.edges):
+            tail, head = obj['tail'], obj['head']
+
+            # Mentioning the nodes can leave the subgraphs of the edge.
+            chain = self.edge_chains.get(obj.get('_gvid', idx), ())
+            self.see(max(tail, head), target=chain)
+            self.goto(chain)
+
+            edge = _edge_obj_dict(
+                self.names[tail], self.names[head], _json_attributes(obj))
+            _add_edge_obj_dict(self.top(), edge)
+
+        self.see(None)
+        self.open(None)
+
+        for idx in self.node_order:
+            if idx not in self.declared:
+                self.goto(self.node_chains.get(idx, ()))
+                self.mention(idx, True)
+
+        for gvid in self.sgraph_order:
+            missing = self.members[gvid] - self.mentioned[gvid]
+            if missing:
+                self.goto(self.chains[gvid])
+                for idx in sorted(missing):
+                    self.mention(idx, False)
+
+        self.navigate(())
+
+    def top(self):
+
+        if self.stack:
+            return self.stack[-1][1]
+        return self.graph.obj_dict
+
+    def path(self):
+
+        return tuple(gvid for gvid, sgraph in self.stack)
+
+    def reachable(self, chain, target=()):
+        # Whether the subgraphs of chain can be opened from the current
+        # ones without leaving any, in the order of their numbers. Unnamed
+        # subgraphs can't be opened again, so they are only opened once
+        # all their nodes come next and they have no edges, which would
+        # have to be left to add the edges before them, unless they are
+        # the subgraphs of target, those of the next edge.
+
+        path = self.path()
+        if chain[:len(path)] != path:
+            return False
+
+        chain = chain[len(path):]
+        for gvid in chain:
+            named = bool(self.sgraphs[gvid].get('name'))
+            if gvid in self.opened:
+                if not named:
+                    return False
+            elif not named:
+                if self.sgraphs[gvid].get('edges') and gvid not in target:
+                    return False
+                if not self.next_nodes(gvid):
+                    return False
+
+        unopened = [gvid for gvid in chain if gvid not in self.opened]
+        return unopened == self.sgraph_order[
+            self.next_sgraph:self.next_sgraph + len(unopened)]
+
+    def next_nodes(self, gvid):
+        # Whether the nodes of a subgraph not mentioned yet come next.
+
+        unseen = self.members[gvid] - self.seen
+        return unseen == set(
+            self.node_order[self.next_node:self.next_node + len(unseen)])
+
+    def goto(self, chain):
+
+        # An unnamed subgraph is opened only once, so the nodes outside it
+        # that come before some of its nodes are mentioned first.
+        for gvid in chain:
+            if gvid in self.opened or self.sgraphs[gvid].get('name'):
+                continue
+            unseen = self.members[gvid] - self.seen
+            if not unseen:
+                continue
+
+            stop = max(unseen)
+            last = None
+            pos = self.next_node
+            while self.node_order[pos] < stop:
+                idx = self.node_order[pos]
+                if idx not in self.members[gvid] and idx not in self.seen:
+                    last = idx
+                pos += 1
+            if last is not None:
+                self.see(last)
+
+        if chain:
+            self.open(max(chain))
+        self.navigate(chain)
+
+    def open(self, last):
+        # Open the subgraphs up to the one numbered last, in order.
+
+        while self.next_sgraph < len(self.sgraph_order):
+            gvid = self.sgraph_order[self.next_sgraph]
+            if last is not None and gvid > last:
+                break
+            if gvid in self.opened:
+                self.next_sgraph += 1
+            else:
+                self.navigate(self.chains[gvid][:-1])
+                self.push(gvid)
+
+    def navigate(self, chain):
+
+        depth = 0
+        for gvid, sgraph in self.stack:
+            if depth >= len(chain) or chain[depth] != gvid:
+                break
+            depth += 1
+
+        while len(self.stack) > depth:
+            self.close()
+
+        for gvid in chain[depth:]:
+            self.push(gvid)
+
+    def push(self, gvid):
+
+        obj = self.sgraphs[gvid]
+        attrs = dict()
+        if gvid not in self.opened:
+            attrs = _json_attributes(obj)
+            self.opened.add(gvid)
+            if self.sgraph_order[self.next_sgraph] == gvid:
+                self.next_sgraph += 1
+
+        sgraph = _graph_obj_dict('', 'digraph', False, False, False, attrs)
+        sgraph['type'] = 'subgraph'
+        sgraph['name'] = ''
+        if obj.get('name'):
+            # Unnamed subgraphs keep the empty name they are parsed with.
+            sgraph['name'] = _json_id(obj['name'])
+        sgraph['parent_graph'] = self.graph
+        _add_subgraph_obj_dict(self.top(), sgraph)
+
+        self.stack.append((gvid, sgraph))
+
+        # Nodes that come next and belong here are mentioned right away.
+        self.see(None, eager=True)
+
+    def close(self):
+        # Declare and mention the nodes of the subgraph seen so far before
+        # leaving it, with the ones in it that come next. The subgraphs in
+        # it that come next are opened first too, unless they have edges
+        # and it can be opened again to add them.
+
+        gvid = self.stack[-1][0]
+        while self.next_node < len(self.node_order):
+            idx = self.node_order[self.next_node]
+            if idx not in self.seen:
+                if idx not in self.members[gvid]:
+                    break
+                self.mention(idx, self.node_chains.get(idx) == self.path())
+            self.next_node += 1
+
+        named = bool(self.sgraphs[gvid].get('name'))
+        while self.next_sgraph < len(self.sgraph_order):
+            child = self.sgraph_order[self.next_sgraph]
+            if child in self.opened:
+                self.next_sgraph += 1
+            elif self.chains[child][:-1] == self.path() and not (
+                    named and self.sgraphs[child].get('edges')) and (
+                    self.next_nodes(child)):
+                self.push(child)
+                self.close()
+            else:
+                break
+
+        for idx in sorted(self.members[gvid] & self.seen):
+            if self.node_chains.get(idx) == self.path():
+                if idx not in self.declared:
+                    self.mention(idx, True)
+            elif idx not in self.mentioned[gvid]:
+                self.mention(idx, False)
+
+        self.stack.pop()
+
+    def see(self, last, eager=False, target=None):
+        # Mention the nodes up to the one numbered last, in order. Eagerly,
+        # only the nodes declared in the current subgraph are. Nodes that
+        # can't be declared are mentioned in the subgraphs of target, when
+        # those hold them, so that the edge added there needn't reopen
+        # them.
+
+        while self.next_node < len(self.node_order):
+            idx = self.node_order[self.next_node]
+            if last is not None and idx > last:
+                break
+
+            if idx in self.seen:
+                self.next_node += 1
+                continue
+
+            chain = self.node_chains.get(idx, ())
+            if chain != self.path():
+                if eager:
+                    break
+                if self.reachable(chain):
+                    # Opening the subgraphs can mention nodes eagerly.
+                    self.goto(chain)
+                    continue
+                if target is not None and target != self.path() and all(
+                        idx in self.members[gvid] for gvid in target) and \
+                        self.reachable(target, target):
+                    self.goto(target)
+                    continue
+
+                # Leave the subgraphs that don't hold the node.
+                depth = 0
+                for gvid, sgraph in self.stack:
+                    if idx not in self.members[gvid]:
+                        break
+                    depth += 1
+                self.navigate(self.path()[:depth])
+
+            self.mention(idx, chain == self.path())
+            self.next_node += 1
+
+    def mention(self, idx, declare):
+
+        attrs = dict()
+        if declare:
+            attrs = _json_attributes(self.nodes[idx])
+            self.declared.add(idx)
+
+        _add_node_obj_dict(
+            self.top(), _node_obj_dict(self.names[idx], attrs))
+
+        self.seen.add(idx)
+        for gvid, sgraph in self.stack:
+            self.mentioned[gvid].add(idx)
+
+
+def graph_from_json_file(path):
+    """Load graph as defined by a file in Graphviz's JSON format.
+
+    See graph_from_json.
+    """
+
+    with open(path, 'rb') as fd:
+        return graph_from_json(fd.read())
+
+
+class _JSONWriter(object):
+    """Flattens a graph into the objects of Graphviz's JSON output."""
+
+    def __init__(self):
+
+        self.sgraphs = list()
+        # Named subgraphs, by the number of their parent and their name.
+        self.sgraph_index = dict()
+        self.nodes = list()
+        self.node_index = dict()
+        self.edges = list()
+
+    def node(self, name, attrs, defaults, scopes):
+
+        name = _dot_unquote(name)
+        idx = self.node_index.get(name)
+
+        if idx is None:
+            idx = self.node_index[name] = len(self.nodes)
+            node = dict((k, _dot_unquote(v)) for k, v in defaults.items())
+            node['name'] = name
+            self.nodes.append(node)
+
+        node = self.nodes[idx]
+        for key, value in attrs.items():
+            if value is not None:
+                node[key] = _dot_unquote(value)
+
+        for scope in scopes:
+            scope['nodes'].add(idx)
+
+        return idx
+
+    def end_points(self, point, defaults, scopes):
+
+        if isinstance(point, dict):
+            # An edge from or to a subgraph joins each of its nodes.
+            return self.graph(point, defaults, scopes)
+
+        name, port = _split_port(point)
+        return [(self.node(name, {}, defaults[0], scopes), port)]
+
+    def graph(self, obj_dict, defaults, scopes, attrs=None):
+
+        points = list()
+
+        if obj_dict.get('type') == 'subgraph':
+            # Subgraphs with the same name in the same graph are one
+            # subgraph, as in Graphviz.
+            name = _dot_unquote(obj_dict['name'])
+            key = (scopes[-1]['gvid'] if scopes else None, name)
+            scope = self.sgraph_index.get(key) if name else None
+            if scope is None:
+                scope = {
+                    'gvid': len(self.sgraphs), 'name': name, 'attrs': {},
+                    'subgraphs': [], 'nodes': set(), 'edges': []}
+                if scopes:
+                    scopes[-1]['subgraphs'].append(scope['gvid'])
+                if name:
+                    self.sgraph_index[key] = scope
+                self.sgraphs.append(scope)
+            attrs = scope['attrs']
+            scopes = scopes + [scope]
+
+        attrs.update(obj_dict['attributes'])
+
+        node_defaults, edge_defaults = defaults
+        items = list()
+        for key in ('nodes', 'edges', 'subgraphs'):
+            for obj_list in obj_dict[key].values():
+                items.extend(obj_list)
+        items.sort(key=lambda obj: obj['sequence'])
+
+        for obj in items:
+            if obj['type'] == 'node':
+                name = obj['name']
+                if name == 'graph':
+                    attrs.update(_get_attributes(obj))
+                elif name == 'node':
+                    node_defaults = dict(node_defaults)
+                    node_defaults.update(_get_attributes(obj))
+                elif name == 'edge':
+                    edge_defaults = dict(edge_defaults)
+                    edge_defaults.update(_get_attributes(obj))
+                else:
+                    points.append((self.node(
+                        name, _get_attributes(obj), node_defaults, scopes),
+                        None))
+
+            elif obj['type'] == 'edge':
+                defaults = (node_defaults, edge_defaults)
+                tails = self.end_points(obj['points'][0], defaults, scopes)
+                heads = self.end_points(obj['points'][1], defaults, scopes)
+                points.extend(tails + heads)
+
+                edge_attrs = dict(edge_defaults)
+                edge_attrs.update(_get_attributes(obj))
+
+                for tail, tail_port in tails:
+                    for head, head_port in heads:
+                        self.edge(
+                            tail, tail_port, head, head_port, edge_attrs,
+                            scopes)
+
+            else:
+                points.extend(self.graph(
+                    obj, (node_defaults, edge_defaults), scopes))
+
+        return points
+
+    def edge(self, tail, tail_port, head, head_port, attrs, scopes):
+
+        edge = dict(
+            (k, _dot_unquote(v)) for k, v in attrs.items() if v is not None)
+        if tail_port and 'tailport' not in edge:
+            edge['tailport'] = _dot_unquote(tail_port)
+        if head_port and 'headport' not in edge:
+            edge['headport'] = _dot_unquote(head_port)
+        edge['tail'] = tail
+        edge['head'] = head
+
+        for scope in scopes:
+            scope['edges'].append(len(self.edges))
+        self.edges.append(edge)
+
+
+def graph_to_json(graph, indent=None):
+    """Return the text of graph in Graphviz's JSON (json0) format.
+
+    The node and edge default statements of the graph are applied to the
+    nodes and edges they cover, as Graphviz does, so the JSON objects
+    hold all the attributes of each node and edge. indent is passed on
+    to json.dumps. graph_from_json reads the text back.
+    """
+
+    writer = _JSONWriter()
+    attrs = dict()
+    writer.graph(graph.obj_dict, ({}, {}), [], attrs)
+
+    doc = {
+        'name': _dot_unquote(graph.get_name()),
+        'directed': graph.get_graph_type() == 'digraph',
+        'strict': bool(graph.obj_dict.get('strict')),
+    }
+    for key, value in attrs.items():
+        if value is not None:
+            doc[key] = _dot_unquote(value)
+
+    count = len(writer.sgraphs)
+    doc['_subgraph_cnt'] = count
+
+    objects = list()
+
+    for gvid, scope in enumerate(writer.sgraphs):
+        obj = dict(
+            (k, _dot_unquote(v)) for k, v in scope['attrs'].items()
+            if v is not None)
+        obj['_gvid'] = gvid
+        obj['name'] = scope['name']
+        if scope['subgraphs']:
+            obj['subgraphs'] = scope['subgraphs']
+        if scope['nodes']:
+            obj['nodes'] = [idx + count for idx in sorted(scope['nodes'])]
+        if scope['edges']:
+            obj['edges'] = scope['edges']
+        objects.append(obj)
+
+    for idx, node in enumerate(writer.nodes):
+        node['_gvid'] = idx + count
+        objects.append(node)
+
+    for idx, edge in enumerate(writer.edges):
+        edge['_gvid'] = idx
+        edge['tail'] += count
+        edge['head'] += count
+
+    if objects:
+        doc['objects'] = objects
+    if writer.edges:
+        doc['edges'] = writer.edges
+
+    return json.dumps(doc, indent=indent, sort_keys=True)
+
+
+def _load_dot_file(path, use_pyparsing):
+
+    # Errors are returned instead of raised, so that one bad file does
+    # not abort the whole batch.
+    try:
+        with open(path, 'rb') as fd:
+            data = fd.read()
+        return True, parser.parse_dot_graphs(data, use_pyparsing=use_pyparsing)
+    except Exception:
+        return False, sys.exc_info()[1]
+
+
+def _load_dot_file_state(args):
+
+    ok, result = _load_dot_file(*args)
+    if ok:
+        result = [graph_to_state(g) for g in result]
+
+    return ok, result
+
+
+def graph_from_dot_files(paths, workers=None, chunksize=None,
+                         use_pyparsing=False):
+    """Load the graphs defined by several DOT files.
+
+    The files are parsed in a pool of worker processes, workers of them
+    (by default one per CPU), and the results are returned in the order
+    of paths. The paths are sent to the workers chunksize at a time.
+
+    Each result is what graph_from_dot_file would return for the file: a
+    Dot class, or a list of them if the file defines several graphs. If
+    a file can't be read or parsed the exception raised is returned in
+    its place instead of being printed.
+    """
+
+    paths = list(paths)
+
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+
+    args = [(path, use_pyparsing) for path in paths]
+
+    if workers <= 1 or len(paths) <= 1:
+        results = [_load_dot_file(*arg) for arg in args]
+    else:
+        pool = multiprocessing.Pool(min(workers, len(paths)))
+        try:
+            results = pool.map(_load_dot_file_state, args, chunksize)
+        finally:
+            pool.close()
+            pool.join()
+
+        results = [
+            (ok, [graph_from_state(state) for state in result] if ok
+             else result)
+            for ok, result in results
+        ]
+
+    graphs = list()
+
+    for ok, result in results:
+        if ok and len(result) == 1:
+            graphs.append(result[0])
+        else:
+            graphs.append(result)
+
+    return graphs
 
 
 # 根据边创建一个图
@@ -762,7 +1824,7 @@ class Common(object):
     def __get_attribute__(self, attr):
         """Look for default attributes for this node"""
 
-        attr_val = self.obj_dict['attributes'].get(attr, None)
+        attr_val = _get_attributes(self.obj_dict).get(attr, None)
 
         if attr_val is None:
             # get the defaults for nodes/edges
@@ -791,7 +1853,7 @@ class Common(object):
                 defaults = [defaults]
 
             for default in defaults:
-                attr_val = default.obj_dict['attributes'].get(attr, None)
+                attr_val = _get_attributes(default.obj_dict).get(attr, None)
                 if attr_val:
                     return attr_val
         else:
@@ -816,9 +1878,12 @@ class Common(object):
             set_'name'(value)
 
         which are defined for all the existing attributes.
+
+        The name and value are interned in string_interner.
         """
 
-        self.obj_dict['attributes'][name] = value
+        intern = string_interner.intern
+        self.obj_dict['attributes'][intern(name)] = intern(value)
 
     def get(self, name):
         """Get an attribute value by name.
@@ -826,66 +1891,325 @@ class Common(object):
         Given an attribute 'name' it will get its value.
         There's always the possibility of using the methods:
 
-            get_'name'()
+            get_'name'()
+
+        which are defined for all the existing attributes.
+        """
+
+        return _get_attributes(self.obj_dict).get(name, None)
+
+    def get_attributes(self):
+        """"""
+
+        return self.obj_dict['attributes']
+
+    def set_sequence(self, seq):
+
+        self.obj_dict['sequence'] = seq
+
+    def get_sequence(self):
+
+        return self.obj_dict['sequence']
+
+    def create_attribute_methods(self, obj_attributes):
+        """Add set_'name' and get_'name' methods to this object for each
+        attribute name in obj_attributes.
+
+        The methods of the attributes Graphviz knows are already defined
+        by the classes, other instances are left unchanged.
+        """
+
+        for attr in obj_attributes:
+            setattr(self, 'set_' + attr,
+                    types.MethodType(_attribute_setter(attr), self))
+            setattr(self, 'get_' + attr,
+                    types.MethodType(_attribute_getter(attr), self))
+
+    @classmethod
+    def _create_attribute_methods(cls, obj_attributes):
+        # Add the set_ and get_ methods of obj_attributes to the class, once
+        # when it is defined rather than for every instance. Only called
+        # right after the class statements.
+
+        for attr in obj_attributes:
+            setattr(cls, 'set_' + attr, _attribute_setter(attr))
+            setattr(cls, 'get_' + attr, _attribute_getter(attr))
+
+
+def _attribute_setter(attr):
+
+    def setter(self, value):
+        self.set(attr, value)
+
+    setter.__name__ = 'set_' + attr
+    setter.__doc__ = 'Set the %s attribute, see set().' % attr
+    return setter
+
+
+def _attribute_getter(attr):
+
+    def getter(self):
+        return self.__get_attribute__(attr)
+
+    getter.__name__ = 'get_' + attr
+    getter.__doc__ = (
+        'Get the %s attribute, or its default from the parent graph.' %
+        attr)
+    return getter
+
+
+class Error(Exception):
+    """General error handling class.
+    """
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        return self.value
+
+
+class InvocationException(Exception):
+    """
+    To indicate that a ploblem occurred while running any of the GraphViz
+    executables.
+    """
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        return self.value
+
+
+class ElementRecord(MutableMapping):
+    """Compact obj_dict of a node or an edge.
+
+    Graphs hold one obj_dict per node and edge, so these are stored as
+    records with a fixed set of keys, kept in slots, instead of dicts.
+    Records support the same mapping interface as the dicts, and other
+    keys can still be added to them. The attributes dict is only created
+    once attributes are set or obj_dict['attributes'] is read, which
+    also replaces LazyAttributes with the dict they decode to.
+    """
+
+    __slots__ = (
+        'attributes', 'type', 'parent_graph', 'sequence', '_extra',
+        '_wrapper')
+
+    # Keys held in slots, in the order they are listed.
+    _fields = ()
+    _field_set = frozenset()
+
+    def __getitem__(self, key):
+
+        if key in self._field_set:
+            value = getattr(self, key)
+            if key == 'attributes':
+                if value is None:
+                    value = self.attributes = dict()
+                elif isinstance(value, LazyAttributes):
+                    value = self.attributes = value.decode()
+            return value
+
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def get(self, key, default=None):
+
+        if key in self._field_set:
+            return self[key]
+
+        if self._extra is None:
+            return default
+        return self._extra.get(key, default)
+
+    def __setitem__(self, key, value):
+
+        if key in self._field_set:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = dict()
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+
+        if key in self._field_set:
+            raise TypeError('%r can\'t be removed from a %s' % (
+                key, self.__class__.__name__))
+
+        if self._extra is None:
+            raise KeyError(key)
+        del self._extra[key]
+
+    def __contains__(self, key):
+
+        return key in self._field_set or (
+            self._extra is not None and key in self._extra)
+
+    def __iter__(self):
+
+        for key in self._fields:
+            yield key
+
+        if self._extra is not None:
+            for key in list(self._extra):
+                yield key
+
+    def __len__(self):
+
+        return len(self._fields) + len(self._extra or ())
+
+    def __repr__(self):
+
+        return '%s(%r)' % (self.__class__.__name__, dict(self._items()))
+
+    def __getstate__(self):
+
+        return tuple(self._values()) + (self._extra,)
+
+    def __setstate__(self, state):
+
+        for key, value in zip(self._fields, state):
+            setattr(self, key, value)
+        self._extra = state[-1]
+        self._wrapper = None
+
+    def _values(self):
+
+        return [getattr(self, key) for key in self._fields]
+
+    def _items(self):
+        """Return the (key, value) items, with None as the attributes of
+        records that have none."""
+
+        items = list(zip(self._fields, self._values()))
+        if self._extra is not None:
+            items.extend(self._extra.items())
+        return items
+
+    def copy(self):
+        """Return a shallow copy of the record, like dict.copy()."""
+
+        record = self.__class__.__new__(self.__class__)
+        record.__setstate__(self.__getstate__())
+        if record._extra is not None:
+            record._extra = dict(record._extra)
+        return record
+
+    __copy__ = copy
+
+
+class NodeRecord(ElementRecord):
+    """Compact obj_dict of a node, see ElementRecord."""
+
+    __slots__ = ('parent_node_list', 'name', 'port')
+
+    _fields = (
+        'attributes', 'type', 'parent_graph', 'parent_node_list',
+        'sequence', 'name', 'port')
+    _field_set = frozenset(_fields)
+
+    def __init__(self, name=None, port=None, attributes=None):
+
+        self.attributes = attributes
+        self.type = 'node'
+        self.parent_graph = None
+        self.parent_node_list = None
+        self.sequence = None
+        self.name = name
+        self.port = port
+        self._extra = None
+        self._wrapper = None
+
+
+class EdgeRecord(ElementRecord):
+    """Compact obj_dict of an edge, see ElementRecord."""
+
+    __slots__ = ('parent_edge_list', 'points')
+
+    _fields = (
+        'attributes', 'type', 'parent_graph', 'parent_edge_list',
+        'sequence', 'points')
+    _field_set = frozenset(_fields)
+
+    def __init__(self, points=None, attributes=None):
+
+        self.attributes = attributes
+        self.type = 'edge'
+        self.parent_graph = None
+        self.parent_edge_list = None
+        self.sequence = None
+        self.points = points
+        self._extra = None
+        self._wrapper = None
 
-        which are defined for all the existing attributes.
-        """
 
-        return self.obj_dict['attributes'].get(name, None)
+_RECORD_CLASSES = {'NodeRecord': NodeRecord, 'EdgeRecord': EdgeRecord}
 
-    def get_attributes(self):
-        """"""
 
-        return self.obj_dict['attributes']
+# Attributes of the records that have none, only to be read.
+_NO_ATTRIBUTES = frozendict()
 
-    def set_sequence(self, seq):
 
-        self.obj_dict['sequence'] = seq
+def _get_attributes(obj_dict):
+    """Return the attributes of obj_dict, to be read only.
 
-    def get_sequence(self):
+    Unlike obj_dict['attributes'], no dict is created for records without
+    attributes.
+    """
 
-        return self.obj_dict['sequence']
+    if isinstance(obj_dict, ElementRecord):
+        attrs = obj_dict.attributes
+        if attrs is None:
+            return _NO_ATTRIBUTES
+        return attrs
 
-    def create_attribute_methods(self, obj_attributes):
+    return obj_dict['attributes']
 
-        # for attr in self.obj_dict['attributes']:
-        for attr in obj_attributes:
 
-            # Generate all the Setter methods.
-            #
-            self.__setattr__(
-                'set_' + attr,
-                lambda x, a=attr: self.obj_dict['attributes'].__setitem__(a, x)
-            )
+def _record_attributes(attrs, interner):
+    """Return the interned attributes to store in a record, or None."""
 
-            # Generate all the Getter methods.
-            #
-            self.__setattr__(
-                'get_' + attr,
-                lambda a=attr: self.__get_attribute__(a)
-            )
+    if not isinstance(attrs, LazyAttributes) and not attrs:
+        return None
+    return interner.intern_attributes(attrs)
 
 
-class Error(Exception):
-    """General error handling class.
+def _node_obj_dict(name, attrs, interner=None):
+    """Return the obj_dict of a new Node, as a NodeRecord.
+
+    The name and attributes are interned in interner, by default
+    string_interner.
     """
-    def __init__(self, value):
-        self.value = value
 
-    def __str__(self):
-        return self.value
+    if interner is None:
+        interner = string_interner
 
+    # Remove the compass point
+    # 移除重复的节点
 
-class InvocationException(Exception):
-    """
-    To indicate that a ploblem occurred while running any of the GraphViz
-    executables.
-    """
-    def __init__(self, value):
-        self.value = value
+    # port为空
+    port = None
+    # 如果name的类型是basestring 并且name的不是以"开始，
+    # isinstance用来判断一个对象是否是一个已知的类型
+    if isinstance(name, basestring) and not name.startswith('"'):
+        # idx的含义是name中是否包含:,如果包含，则返回字符串开始时的索引值，否则返回-1
+        idx = name.find(':')
+        # 如果idx大于0，并且，小于name的长度
+        if idx > 0 and idx + 1 < len(name):
+            # 名称是name的开始到idx，port是idx到最后
+            name, port = name[:idx], name[idx:]
 
-    def __str__(self):
-        return self.value
+        # 如果name的类型是long或者int
+    if isinstance(name, (long, int)):
+        # name就将name的类型改变为字符串
+        name = str(name)
+
+    # 设置obj_port的name属性和port属性，quote_if_neccessary是什么函数
+    return NodeRecord(
+        interner.intern(quote_if_necessary(name)), port,
+        _record_attributes(attrs, interner))
 
 
 # 定义节点类，继承自Common
@@ -913,47 +2237,7 @@ class Node(Common):
         if obj_dict is not None:
             self.obj_dict = obj_dict
         else:
-        # 如果对象字典是空的，那么进行如下操作
-        # 首先将类的属性obj_dict是字典
-            self.obj_dict = dict()
-
-            # Copy the attributes
-            # 复制属性，属性一共有以下：attribute,来自attrs
-            self.obj_dict['attributes'] = dict(attrs)
-            # 类型是node
-            self.obj_dict['type'] = 'node'
-            # 父亲图
-            self.obj_dict['parent_graph'] = None
-            # 父亲节点的列表
-            self.obj_dict['parent_node_list'] = None
-            # 序列
-            self.obj_dict['sequence'] = None
-
-            # Remove the compass point
-            # 移除重复的节点
-
-            # port为空
-            port = None
-            # 如果name的类型是basestring 并且name的不是以"开始，
-            # isinstance用来判断一个对象是否是一个已知的类型
-            if isinstance(name, basestring) and not name.startswith('"'):
-                # idx的含义是name中是否包含:,如果包含，则返回字符串开始时的索引值，否则返回-1
-                idx = name.find(':'),
-                # 如果idx大于0，并且，小于name的长度
-                if idx > 0 and idx + 1 < len(name):
-                    # 名称是name的开始到idx，port是idx到最后
-                    name, port = name[:idx], name[idx:]
-
-                # 如果name的类型是long或者int
-            if isinstance(name, (long, int)):
-                # name就将name的类型改变为字符串
-                name = str(name)
-
-            # 设置obj_port的name属性和port属性，quote_if_neccessary是什么函数
-            self.obj_dict['name'] = quote_if_necessary(name)
-            self.obj_dict['port'] = port
-
-        self.create_attribute_methods(NODE_ATTRIBUTES)
+            self.obj_dict = _node_obj_dict(name, attrs)
 
         # 设置name
     def set_name(self, node_name):
@@ -993,7 +2277,7 @@ class Node(Common):
         node_attr = list()
 
         for attr, value in sorted(
-                self.obj_dict['attributes'].items(),
+                _get_attributes(self.obj_dict).items(),
                 key=itemgetter(0)):
             if value is not None:
                 node_attr.append('%s=%s' % (attr, quote_if_necessary(value)))
@@ -1014,6 +2298,60 @@ class Node(Common):
         return node + ';'
 
 
+Node._create_attribute_methods(NODE_ATTRIBUTES)
+
+
+def _edge_obj_dict(src, dst, attrs, interner=None):
+    """Return the obj_dict of a new Edge, as an EdgeRecord.
+
+    The end points and attributes are interned in interner, by default
+    string_interner.
+    """
+
+    if interner is None:
+        interner = string_interner
+
+    if isinstance(src, Node):
+        src = src.get_name()
+
+    if isinstance(dst, Node):
+        dst = dst.get_name()
+
+    points = (
+        interner.intern(quote_if_necessary(src)),
+        interner.intern(quote_if_necessary(dst)))
+
+    return EdgeRecord(points, _record_attributes(attrs, interner))
+
+
+def _parse_node_ref(node_str):
+    """Return an edge end point as written by Edge.to_string."""
+
+    if not isinstance(node_str, str):
+        return node_str
+
+    if node_str.startswith('"') and node_str.endswith('"'):
+        return node_str
+
+    node_port_idx = node_str.rfind(':')
+
+    if (node_port_idx > 0 and node_str[0] == '"' and
+            node_str[node_port_idx - 1] == '"'):
+        return node_str
+
+    if node_port_idx > 0:
+        a = node_str[:node_port_idx]
+        b = node_str[node_port_idx + 1:]
+
+        node = quote_if_necessary(a)
+
+        node += ':' + quote_if_necessary(b)
+
+        return node
+
+    return node_str
+
+
 class Edge(Common):
     """A graph edge.
 
@@ -1051,27 +2389,7 @@ class Edge(Common):
 
         else:
 
-            self.obj_dict = dict()
-
-            # Copy the attributes
-            #
-            self.obj_dict['attributes'] = dict(attrs)
-            self.obj_dict['type'] = 'edge'
-            self.obj_dict['parent_graph'] = None
-            self.obj_dict['parent_edge_list'] = None
-            self.obj_dict['sequence'] = None
-
-            if isinstance(src, Node):
-                src = src.get_name()
-
-            if isinstance(dst, Node):
-                dst = dst.get_name()
-
-            points = (quote_if_necessary(src), quote_if_necessary(dst))
-
-            self.obj_dict['points'] = points
-
-        self.create_attribute_methods(EDGE_ATTRIBUTES)
+            self.obj_dict = _edge_obj_dict(src, dst, attrs)
 
     def get_source(self):
         """Get the edges source node name."""
@@ -1100,7 +2418,8 @@ class Edge(Common):
         if not isinstance(edge, Edge):
             raise Error("Can't compare and edge to a non-edge object.")
 
-        if self.get_parent_graph().get_top_graph_type() == 'graph':
+        top_graph = _get_top_graph(self.get_parent_graph())
+        if top_graph.obj_dict['type'] == 'graph':
 
             # If the graph is undirected, the edge has neither
             # source nor destination.
@@ -1120,76 +2439,340 @@ class Edge(Common):
 
     def parse_node_ref(self, node_str):
 
-        if not isinstance(node_str, str):
-            return node_str
+        return _parse_node_ref(node_str)
 
-        if node_str.startswith('"') and node_str.endswith('"'):
-            return node_str
+    def to_string(self):
+        """Returns a string representation of the edge in dot language.
+        """
 
-        node_port_idx = node_str.rfind(':')
+        parent_graph = self.get_parent_graph()
+        if (parent_graph and
+                _get_top_graph(parent_graph).obj_dict['type'] == 'digraph'):
+            edge_op = '->'
+        else:
+            edge_op = '--'
 
-        if (node_port_idx > 0 and node_str[0] == '"' and
-                node_str[node_port_idx - 1] == '"'):
-            return node_str
+        return _edge_to_string(self.obj_dict, edge_op)
 
-        if node_port_idx > 0:
-            a = node_str[:node_port_idx]
-            b = node_str[node_port_idx + 1:]
 
-            node = quote_if_necessary(a)
+def _edge_to_string(obj_dict, edge_op):
+    """Return an edge obj_dict in dot language, like Edge.to_string,
+    with the edge operator edge_op."""
 
-            node += ':' + quote_if_necessary(b)
+    src = _parse_node_ref(obj_dict['points'][0])
+    dst = _parse_node_ref(obj_dict['points'][1])
 
-            return node
+    if isinstance(src, frozendict):
+        edge = [Subgraph(obj_dict=src).to_string()]
+    elif isinstance(src, (int, long)):
+        edge = [str(src)]
+    else:
+        edge = [src]
 
-        return node_str
+    edge.append(edge_op)
 
-    def to_string(self):
-        """Returns a string representation of the edge in dot language.
-        """
+    if isinstance(dst, frozendict):
+        edge.append(Subgraph(obj_dict=dst).to_string())
+    elif isinstance(dst, (int, long)):
+        edge.append(str(dst))
+    else:
+        edge.append(dst)
 
-        src = self.parse_node_ref(self.get_source())
-        dst = self.parse_node_ref(self.get_destination())
+    edge_attr = list()
 
-        if isinstance(src, frozendict):
-            edge = [Subgraph(obj_dict=src).to_string()]
-        elif isinstance(src, (int, long)):
-            edge = [str(src)]
+    for attr, value in sorted(
+            _get_attributes(obj_dict).items(),
+            key=itemgetter(0)):
+        if value is not None:
+            edge_attr.append('%s=%s' % (attr, quote_if_necessary(value)))
         else:
-            edge = [src]
+            edge_attr.append(attr)
 
-        if (self.get_parent_graph() and
-                self.get_parent_graph().get_top_graph_type() and
-                self.get_parent_graph().get_top_graph_type() == 'digraph'):
+    edge_attr = ', '.join(edge_attr)
 
-            edge.append('->')
+    if edge_attr:
+        edge.append(' [' + edge_attr + ']')
+
+    return ' '.join(edge) + ';'
+
+
+Edge._create_attribute_methods(EDGE_ATTRIBUTES)
+
+
+def _graph_obj_dict(graph_name, graph_type, strict, suppress_disconnected,
+                    simplify, attrs):
+    """Return the obj_dict of a new Graph, without a parent graph."""
+
+    obj_dict = dict()
+
+    obj_dict['attributes'] = dict(attrs)
+
+    if graph_type not in ['graph', 'digraph']:
+        raise Error((
+            'Invalid type "%s". Accepted graph types are: '
+            'graph, digraph, subgraph' % graph_type
+        ))
+
+    obj_dict['name'] = quote_if_necessary(graph_name)
+    obj_dict['type'] = graph_type
+
+    obj_dict['strict'] = strict
+    obj_dict['suppress_disconnected'] = suppress_disconnected
+    obj_dict['simplify'] = simplify
+
+    obj_dict['current_child_sequence'] = 1
+    obj_dict['nodes'] = dict()
+    obj_dict['edges'] = dict()
+    obj_dict['subgraphs'] = dict()
+
+    obj_dict['parent_graph'] = None
+
+    return obj_dict
+
+
+def _set_parent_graph(obj_dict, parent_graph):
+    """Set the parent graph of a graph obj_dict and of all its children."""
+
+    obj_dict['parent_graph'] = parent_graph
+
+    for obj_list in obj_dict['nodes'].values():
+        for obj in obj_list:
+            obj['parent_graph'] = parent_graph
+
+    for obj_list in obj_dict['edges'].values():
+        for obj in obj_list:
+            obj['parent_graph'] = parent_graph
+
+    for obj_list in obj_dict['subgraphs'].values():
+        for obj in obj_list:
+            _set_parent_graph(obj, parent_graph)
+
+
+def _next_sequence_number(obj_dict):
+
+    seq = obj_dict['current_child_sequence']
+    obj_dict['current_child_sequence'] += 1
+    return seq
+
+
+def _add_node_obj_dict(obj_dict, node_obj_dict):
+    """Add a node obj_dict to a graph obj_dict, like Graph.add_node."""
+
+    name = node_obj_dict['name']
+
+    if not obj_dict['nodes'].get(name):
+        obj_dict['nodes'][name] = [node_obj_dict]
+        node_obj_dict['parent_graph'] = obj_dict['parent_graph']
+    else:
+        obj_dict['nodes'][name].append(node_obj_dict)
+
+    node_obj_dict['sequence'] = _next_sequence_number(obj_dict)
+
+
+def _add_edge_obj_dict(obj_dict, edge_obj_dict):
+    """Add an edge obj_dict to a graph obj_dict, like Graph.add_edge."""
+
+    edge_points = edge_obj_dict['points']
+
+    if edge_points in obj_dict['edges']:
+        obj_dict['edges'][edge_points].append(edge_obj_dict)
+    else:
+        obj_dict['edges'][edge_points] = [edge_obj_dict]
+
+    edge_obj_dict['sequence'] = _next_sequence_number(obj_dict)
+    edge_obj_dict['parent_graph'] = obj_dict['parent_graph']
+
+    _index_child(obj_dict, edge_obj_dict)
+
+
+def _add_subgraph_obj_dict(obj_dict, sgraph_obj_dict):
+    """Add a subgraph obj_dict to a graph obj_dict, like
+    Graph.add_subgraph."""
+
+    name = sgraph_obj_dict['name']
+
+    if name in obj_dict['subgraphs']:
+        obj_dict['subgraphs'][name].append(sgraph_obj_dict)
+    else:
+        obj_dict['subgraphs'][name] = [sgraph_obj_dict]
+
+    sgraph_obj_dict['sequence'] = _next_sequence_number(obj_dict)
+    _set_parent_graph(sgraph_obj_dict, obj_dict['parent_graph'])
+
+    _index_child(obj_dict, sgraph_obj_dict)
+
+
+def _get_top_graph(graph):
+    """Return the top graph of a graph.
+
+    Adding a graph to another makes the top graph the parent graph of
+    the graph and of everything in it, see _set_parent_graph, so the
+    parent graph is the top graph itself and this takes at most two
+    steps. The chain of parent graphs is only longer while a hierarchy is
+    being built, before update_parent_graph_hierarchy is called.
+    """
+
+    parent = graph.obj_dict.get('parent_graph')
+    while parent is not None and parent is not graph:
+        graph = parent
+        parent = graph.obj_dict.get('parent_graph')
+
+    return graph
 
-        else:
-            edge.append('--')
 
-        if isinstance(dst, frozendict):
-            edge.append(Subgraph(obj_dict=dst).to_string())
-        elif isinstance(dst, (int, long)):
-            edge.append(str(dst))
+def _end_point_names(point):
+    """Return the names of the nodes an edge end point stands for.
+
+    Node end points are returned without their port. Subgraph end points,
+    the frozendicts of the obj_dicts of subgraphs, stand for every node
+    in the subgraph, like in 'a -> {b c}'.
+    """
+
+    if isinstance(point, basestring):
+        if ':' not in point:
+            return (point,)
+        return (_split_port(point)[0],)
+
+    names = []
+    seen = set()
+    stack = [point]
+    while stack:
+        obj_dict = stack.pop()
+        found = [
+            name for name in obj_dict['nodes']
+            if name not in ('graph', 'node', 'edge')]
+        for edge_list in obj_dict['edges'].values():
+            for edge in edge_list:
+                for end_point in edge['points']:
+                    found.extend(_end_point_names(end_point))
+        for name in found:
+            if name not in seen:
+                seen.add(name)
+                names.append(name)
+        for sgraph_list in obj_dict['subgraphs'].values():
+            stack.extend(reversed(sgraph_list))
+
+    return names
+
+
+class _Adjacency(object):
+    """Index of the edges of a graph and its subgraphs by node.
+
+    succ and pred map the name of each node with edges to a dict of the
+    names of its successors or predecessors and the number of edges to or
+    from them. It is kept by the top graph, see Graph.successors().
+    """
+
+    __slots__ = ('succ', 'pred')
+
+    def __init__(self):
+
+        self.succ = {}
+        self.pred = {}
+
+    def add_graph(self, obj_dict, count=1):
+        """Add the edges of a graph obj_dict and of its subgraphs, or
+        remove them if count is negative."""
+
+        for edge_list in obj_dict['edges'].values():
+            for edge_obj_dict in edge_list:
+                self.add_edge(edge_obj_dict, count)
+
+        for sgraph_list in obj_dict['subgraphs'].values():
+            for sgraph_obj_dict in sgraph_list:
+                self.add_graph(sgraph_obj_dict, count)
+
+    def add_edge(self, edge_obj_dict, count=1):
+        """Add an edge obj_dict, or remove it if count is negative."""
+
+        src, dst = edge_obj_dict['points']
+        heads = _end_point_names(dst)
+
+        for tail in _end_point_names(src):
+            for head in heads:
+                self._count(self.succ, tail, head, count)
+                self._count(self.pred, head, tail, count)
+
+    @staticmethod
+    def _count(adjacency, name, other, count):
+
+        neighbors = adjacency.get(name)
+        if neighbors is None:
+            neighbors = adjacency[name] = {}
+
+        total = neighbors.get(other, 0) + count
+        if total > 0:
+            neighbors[other] = total
         else:
-            edge.append(dst)
+            neighbors.pop(other, None)
+            if not neighbors:
+                del adjacency[name]
 
-        edge_attr = list()
 
-        for attr, value in sorted(
-                self.obj_dict['attributes'].items(),
-                key=itemgetter(0)):
-            if value is not None:
-                edge_attr.append('%s=%s' % (attr, quote_if_necessary(value)))
-            else:
-                edge_attr.append(attr)
+def _index_child(obj_dict, child_obj_dict, count=1):
+    """Add an edge or subgraph obj_dict, a child of graph obj_dict, to
+    the adjacency index of the top graph, or remove it if count is
+    negative. Nothing is done until the index is first used."""
+
+    index = getattr(obj_dict['parent_graph'], '_adjacency', None)
+    if index is None:
+        return
+
+    if child_obj_dict['type'] == 'edge':
+        index.add_edge(child_obj_dict, count)
+    elif child_obj_dict['type'] != 'node':
+        index.add_graph(child_obj_dict, count)
+
+
+def _drop_adjacency(obj_dict):
+    """Discard the adjacency index of the top graph of graph obj_dict,
+    to be built again when next used."""
+
+    top_graph = obj_dict['parent_graph']
+    if getattr(top_graph, '_adjacency', None) is not None:
+        top_graph._adjacency = None
+
+
+# Node, Edge and Subgraph instances handed out by graphs for obj_dicts
+# that are dicts, by the id of the obj_dict and their class, see _wrap().
+# Records keep a weak reference to theirs instead.
+_wrappers = weakref.WeakValueDictionary()
+
+
+def _wrap(cls, obj_dict):
+    """Return the instance of cls (Node, Edge or Subgraph) for obj_dict.
+
+    Graphs hand out the same instance for an obj_dict for as long as it
+    is referenced anywhere, starting with the instance that was added to
+    the graph, so that repeated queries don't build new instances and
+    their results can be compared with 'is'.
+    """
 
-        edge_attr = ', '.join(edge_attr)
+    try:
+        ref = obj_dict._wrapper
+    except AttributeError:
+        wrapper = _wrappers.get((id(obj_dict), cls))
+    else:
+        wrapper = ref and ref()
+
+    if (wrapper is not None and isinstance(wrapper, cls) and
+            wrapper.obj_dict is obj_dict):
+        return wrapper
+
+    wrapper = cls(obj_dict=obj_dict)
+    _keep_wrapper(cls, wrapper)
+    return wrapper
 
-        if edge_attr:
-            edge.append(' [' + edge_attr + ']')
 
-        return ' '.join(edge) + ';'
+def _keep_wrapper(cls, wrapper):
+    """Make wrapper the instance of cls that _wrap returns for its
+    obj_dict."""
+
+    obj_dict = wrapper.obj_dict
+    if isinstance(obj_dict, ElementRecord):
+        obj_dict._wrapper = weakref.ref(wrapper)
+    else:
+        _wrappers[(id(obj_dict), cls)] = wrapper
 
 
 class Graph(Common):
@@ -1228,6 +2811,9 @@ class Graph(Common):
         graph_instance.obj_dict['attributes']['fontname']
     """
 
+    # Adjacency index of the top graph, built by the first query.
+    _adjacency = None
+
     def __init__(
             self, graph_name='G', obj_dict=None, graph_type='digraph',
             strict=False, suppress_disconnected=False, simplify=False,
@@ -1236,44 +2822,18 @@ class Graph(Common):
         if obj_dict is not None:
             self.obj_dict = obj_dict
         else:
-            self.obj_dict = dict()
-
-            self.obj_dict['attributes'] = dict(attrs)
-
-            if graph_type not in ['graph', 'digraph']:
-                raise Error((
-                    'Invalid type "%s". Accepted graph types are: '
-                    'graph, digraph, subgraph' % graph_type
-                ))
-
-            self.obj_dict['name'] = quote_if_necessary(graph_name)
-            self.obj_dict['type'] = graph_type
-
-            self.obj_dict['strict'] = strict
-            self.obj_dict['suppress_disconnected'] = suppress_disconnected
-            self.obj_dict['simplify'] = simplify
-
-            self.obj_dict['current_child_sequence'] = 1
-            self.obj_dict['nodes'] = dict()
-            self.obj_dict['edges'] = dict()
-            self.obj_dict['subgraphs'] = dict()
+            self.obj_dict = _graph_obj_dict(
+                graph_name, graph_type, strict, suppress_disconnected,
+                simplify, attrs)
 
             self.set_parent_graph(self)
 
-        self.create_attribute_methods(GRAPH_ATTRIBUTES)
-
     def get_graph_type(self):
         return self.obj_dict['type']
 
     def get_top_graph_type(self):
-        parent = self
-        while True:
-            parent_ = parent.get_parent_graph()
-            if parent_ == parent:
-                break
-            parent = parent_
 
-        return parent.obj_dict['type']
+        return _get_top_graph(self).obj_dict['type']
 
     def set_graph_defaults(self, **attrs):
         self.add_node(Node('graph', **attrs))
@@ -1382,9 +2942,7 @@ class Graph(Common):
         return self.obj_dict['suppress_disconnected']
 
     def get_next_sequence_number(self):
-        seq = self.obj_dict['current_child_sequence']
-        self.obj_dict['current_child_sequence'] += 1
-        return seq
+        return _next_sequence_number(self.obj_dict)
 
     def add_node(self, graph_node):
         """Adds a node object to the graph.
@@ -1399,21 +2957,8 @@ class Graph(Common):
                 'class object: {}'.format(str(graph_node))
             )
 
-        node = self.get_node(graph_node.get_name())
-
-        if not node:
-            self.obj_dict['nodes'][graph_node.get_name()] = [
-                graph_node.obj_dict
-            ]
-
-            # self.node_dict[graph_node.get_name()] = graph_node.attributes
-            graph_node.set_parent_graph(self.get_parent_graph())
-        else:
-            self.obj_dict['nodes'][graph_node.get_name()].append(
-                graph_node.obj_dict
-            )
-
-        graph_node.set_sequence(self.get_next_sequence_number())
+        _add_node_obj_dict(self.obj_dict, graph_node.obj_dict)
+        _keep_wrapper(Node, graph_node)
 
     def del_node(self, name, index=None):
         """Delete a node from the graph.
@@ -1455,13 +3000,16 @@ class Graph(Common):
         If one or more nodes exist with that name a list of
         Node instances is returned.
         An empty list is returned otherwise.
+
+        The same Node instances are returned by every call,
+        for as long as they are in use, see get_node_list.
         """
 
         match = list()
 
         if name in self.obj_dict['nodes']:
             match.extend([
-                Node(obj_dict=obj_dict)
+                _wrap(Node, obj_dict)
                 for obj_dict
                 in self.obj_dict['nodes'][name]
             ])
@@ -1478,13 +3026,19 @@ class Graph(Common):
 
         This method returns the list of Node instances
         composing the graph.
+
+        Nodes added with add_node are returned as they were
+        added, and the instances created for the other nodes
+        are returned again by later calls for as long as they
+        are referenced. Changes to them are changes to the
+        graph.
         """
 
         node_objs = list()
 
         for node, obj_dict_list in self.obj_dict['nodes'].items():
             node_objs.extend([
-                Node(obj_dict=obj_d)
+                _wrap(Node, obj_d)
                 for obj_d
                 in obj_dict_list
             ])
@@ -1504,17 +3058,8 @@ class Graph(Common):
                 'edge class object: {}'.format(str(graph_edge))
             )
 
-        edge_points = (graph_edge.get_source(), graph_edge.get_destination())
-
-        if edge_points in self.obj_dict['edges']:
-
-            edge_list = self.obj_dict['edges'][edge_points]
-            edge_list.append(graph_edge.obj_dict)
-        else:
-            self.obj_dict['edges'][edge_points] = [graph_edge.obj_dict]
-
-        graph_edge.set_sequence(self.get_next_sequence_number())
-        graph_edge.set_parent_graph(self.get_parent_graph())
+        _add_edge_obj_dict(self.obj_dict, graph_edge.obj_dict)
+        _keep_wrapper(Edge, graph_edge)
 
     def del_edge(self, src_or_list, dst=None, index=None):
         """Delete an edge from the graph.
@@ -1549,11 +3094,13 @@ class Graph(Common):
         if (src, dst) in self.obj_dict['edges']:
             if index is not None and index < len(
                     self.obj_dict['edges'][(src, dst)]):
-                del self.obj_dict['edges'][(src, dst)][index]
-                return True
+                deleted = [self.obj_dict['edges'][(src, dst)].pop(index)]
             else:
-                del self.obj_dict['edges'][(src, dst)]
-                return True
+                deleted = self.obj_dict['edges'].pop((src, dst))
+
+            for edge_obj_dict in deleted:
+                _index_child(self.obj_dict, edge_obj_dict, -1)
+            return True
 
         return False
 
@@ -1586,11 +3133,7 @@ class Graph(Common):
                 self.obj_dict['edges'].get(edge_points_reverse, None))
 
             for edge_obj_dict in edges_obj_dict:
-                match.append(Edge(
-                    edge_points[0],
-                    edge_points[1],
-                    obj_dict=edge_obj_dict
-                ))
+                match.append(_wrap(Edge, edge_obj_dict))
 
         return match
 
@@ -1601,20 +3144,110 @@ class Graph(Common):
         """Get the list of Edge instances.
 
         This method returns the list of Edge instances
-        composing the graph.
+        composing the graph. Like those of get_node_list, the
+        instances are kept for as long as they are in use.
         """
 
         edge_objs = list()
 
         for edge, obj_dict_list in self.obj_dict['edges'].items():
             edge_objs.extend([
-                Edge(obj_dict=obj_d)
+                _wrap(Edge, obj_d)
                 for obj_d
                 in obj_dict_list
             ])
 
         return edge_objs
 
+    def _get_adjacency(self):
+
+        top_graph = self.obj_dict['parent_graph']
+        if top_graph is None:
+            top_graph = self
+
+        if top_graph._adjacency is None:
+            index = _Adjacency()
+            index.add_graph(top_graph.obj_dict)
+            top_graph._adjacency = index
+
+        return top_graph._adjacency
+
+    def _get_neighbors(self, name, successors, predecessors):
+
+        if isinstance(name, Node):
+            name = name.get_name()
+
+        index = self._get_adjacency()
+        succ = index.succ.get(name, {})
+        pred = index.pred.get(name, {})
+
+        if self.get_top_graph_type() == 'graph':
+            successors = predecessors = True
+
+        names = list(succ) if successors else []
+        if predecessors:
+            names.extend(
+                other for other in pred
+                if not successors or other not in succ)
+
+        return names
+
+    def successors(self, name):
+        """Get the names of the nodes with an edge from a node.
+
+        The edges of the whole graph count, those of its subgraphs
+        included, as node names are shared by all of them. On a
+        Subgraph, successors, predecessors, neighbors and degree
+        answer for the top graph it belongs to, not only for the
+        edges of the subgraph. Edges to or from a subgraph count as
+        edges to or from each of its nodes, and an edge to a port of
+        a node counts as an edge to the node. In undirected graphs
+        the successors, predecessors and neighbors of a node are the
+        same.
+
+        The edges are indexed by node the first time they are
+        queried, and the index is kept up to date by add_edge,
+        del_edge and add_subgraph, so a query takes time
+        proportional to the number of neighbors of the node.
+        Changes made to obj_dict directly are not seen.
+
+        'name' is the name of the node, as returned by
+        Node.get_name, or a Node instance.
+        """
+
+        return self._get_neighbors(name, True, False)
+
+    def predecessors(self, name):
+        """Get the names of the nodes with an edge to a node.
+
+        See successors.
+        """
+
+        return self._get_neighbors(name, False, True)
+
+    def neighbors(self, name):
+        """Get the names of the nodes with an edge to or from a node.
+
+        See successors.
+        """
+
+        return self._get_neighbors(name, True, True)
+
+    def degree(self, name):
+        """Get the number of edges to and from a node.
+
+        Loops count twice. See successors.
+        """
+
+        if isinstance(name, Node):
+            name = name.get_name()
+
+        index = self._get_adjacency()
+
+        return (
+            sum(index.succ.get(name, {}).values()) +
+            sum(index.pred.get(name, {}).values()))
+
     def add_subgraph(self, sgraph):
         """Adds an subgraph object to the graph.
 
@@ -1629,17 +3262,9 @@ class Graph(Common):
                 'subgraph class object:'.format(str(sgraph))
             )
 
-        if sgraph.get_name() in self.obj_dict['subgraphs']:
-
-            sgraph_list = self.obj_dict['subgraphs'][sgraph.get_name()]
-            sgraph_list.append(sgraph.obj_dict)
-
-        else:
-            self.obj_dict['subgraphs'][sgraph.get_name()] = [sgraph.obj_dict]
-
-        sgraph.set_sequence(self.get_next_sequence_number())
-
-        sgraph.set_parent_graph(self.get_parent_graph())
+        _add_subgraph_obj_dict(self.obj_dict, sgraph.obj_dict)
+        if isinstance(sgraph, Subgraph):
+            _keep_wrapper(Subgraph, sgraph)
 
     def get_subgraph(self, name):
         """Retrieved a subgraph from the graph.
@@ -1658,7 +3283,7 @@ class Graph(Common):
             sgraphs_obj_dict = self.obj_dict['subgraphs'].get(name)
 
             for obj_dict_list in sgraphs_obj_dict:
-                match.append(Subgraph(obj_dict=obj_dict_list))
+                match.append(_wrap(Subgraph, obj_dict_list))
 
         return match
 
@@ -1669,14 +3294,15 @@ class Graph(Common):
         """Get the list of Subgraph instances.
 
         This method returns the list of Subgraph instances
-        in the graph.
+        in the graph. Like those of get_node_list, the
+        instances are kept for as long as they are in use.
         """
 
         sgraph_objs = list()
 
         for sgraph, obj_dict_list in self.obj_dict['subgraphs'].items():
             sgraph_objs.extend([
-                Subgraph(obj_dict=obj_d)
+                _wrap(Subgraph, obj_d)
                 for obj_d
                 in obj_dict_list
             ])
@@ -1685,19 +3311,7 @@ class Graph(Common):
 
     def set_parent_graph(self, parent_graph):
 
-        self.obj_dict['parent_graph'] = parent_graph
-
-        for obj_list in self.obj_dict['nodes'].values():
-            for obj in obj_list:
-                obj['parent_graph'] = parent_graph
-
-        for obj_list in self.obj_dict['edges'].values():
-            for obj in obj_list:
-                obj['parent_graph'] = parent_graph
-
-        for obj_list in self.obj_dict['subgraphs'].values():
-            for obj in obj_list:
-                Graph(obj_dict=obj).set_parent_graph(parent_graph)
+        _set_parent_graph(self.obj_dict, parent_graph)
 
     def to_string(self):
         """Returns a string representation of the graph in dot language.
@@ -1735,19 +3349,24 @@ class Graph(Common):
 
             graph.append(';\n')
 
+        # Edges equal to one already written are skipped if simplify is
+        # set, in both directions in undirected graphs like Edge.__eq__.
         edges_done = set()
+        simplify = self.obj_dict.get('simplify', False)
+        directed = _get_top_graph(self).obj_dict['type'] == 'digraph'
+        edge_op = '->' if directed else '--'
 
         edge_obj_dicts = list()
         for e in self.obj_dict['edges'].values():
             edge_obj_dicts.extend(e)
 
-        if edge_obj_dicts:
-            edge_src_set, edge_dst_set = list(
-                zip(*[obj['points'] for obj in edge_obj_dicts])
-            )
-            edge_src_set, edge_dst_set = set(edge_src_set), set(edge_dst_set)
+        # Only the edges of this graph count, as end points are written.
+        if self.obj_dict.get('suppress_disconnected', False):
+            connected = set()
+            for obj in edge_obj_dicts:
+                connected.update(obj['points'])
         else:
-            edge_src_set, edge_dst_set = set(), set()
+            connected = None
 
         node_obj_dicts = list()
         for e in self.obj_dict['nodes'].values():
@@ -1767,21 +3386,22 @@ class Graph(Common):
             if obj['type'] == 'node':
                 node = Node(obj_dict=obj)
 
-                if self.obj_dict.get('suppress_disconnected', False):
-                    if (node.get_name() not in edge_src_set and
-                            node.get_name() not in edge_dst_set):
+                if connected is not None:
+                    if node.get_name() not in connected:
                         continue
 
                 graph.append(node.to_string() + '\n')
 
             elif obj['type'] == 'edge':
-                edge = Edge(obj_dict=obj)
-
-                if self.obj_dict.get('simplify', False) and edge in edges_done:
-                    continue
+                if simplify:
+                    points = obj['points']
+                    if not directed:
+                        points = frozenset(points)
+                    if points in edges_done:
+                        continue
+                    edges_done.add(points)
 
-                graph.append(edge.to_string() + '\n')
-                edges_done.add(edge)
+                graph.append(_edge_to_string(obj, edge_op) + '\n')
             else:
                 sgraph = Subgraph(obj_dict=obj)
                 graph.append(sgraph.to_string() + '\n')
@@ -1791,6 +3411,9 @@ class Graph(Common):
         return ''.join(graph)
 
 
+Graph._create_attribute_methods(GRAPH_ATTRIBUTES)
+
+
 class Subgraph(Graph):
 
     """Class representing a subgraph in Graphviz's dot language.
@@ -1884,7 +3507,19 @@ class Cluster(Graph):
             self.obj_dict['type'] = 'subgraph'
             self.obj_dict['name'] = 'cluster_' + graph_name
 
-        self.create_attribute_methods(CLUSTER_ATTRIBUTES)
+
+Cluster._create_attribute_methods(CLUSTER_ATTRIBUTES)
+
+
+# Output formats of Graphviz, for which Dot has create_'format' and
+# write_'format' methods.
+OUTPUT_FORMATS = (
+    'canon', 'cmap', 'cmapx', 'cmapx_np', 'dia', 'dot',
+    'fig', 'gd', 'gd2', 'gif', 'hpgl', 'imap', 'imap_np', 'ismap',
+    'jpe', 'jpeg', 'jpg', 'mif', 'mp', 'pcl', 'pdf', 'pic', 'plain',
+    'plain-ext', 'png', 'ps', 'ps2', 'svg', 'svgz', 'vml', 'vmlz',
+    'vrml', 'vtx', 'wbmp', 'xdot', 'xlib'
+)
 
 
 # 定义点类，继承自图
@@ -1903,42 +3538,9 @@ class Dot(Graph):
 
         self.shape_files = list()
         self.progs = None
-        self.formats = [
-            'canon', 'cmap', 'cmapx', 'cmapx_np', 'dia', 'dot',
-            'fig', 'gd', 'gd2', 'gif', 'hpgl', 'imap', 'imap_np', 'ismap',
-            'jpe', 'jpeg', 'jpg', 'mif', 'mp', 'pcl', 'pdf', 'pic', 'plain',
-            'plain-ext', 'png', 'ps', 'ps2', 'svg', 'svgz', 'vml', 'vmlz',
-            'vrml', 'vtx', 'wbmp', 'xdot', 'xlib'
-        ]
+        self.formats = list(OUTPUT_FORMATS)
         self.prog = 'dot'
 
-        # Automatically creates all the methods enabling the creation
-        # of output in any of the supported formats.
-        for frmt in self.formats:
-            self.__setattr__(
-                'create_' + frmt,
-                lambda f=frmt, prog=self.prog: self.create(format=f, prog=prog)
-            )
-            f = self.__dict__['create_' + frmt]
-            f.__doc__ = (
-                '''Refer to the docstring accompanying the'''
-                ''''create' method for more information.'''
-            )
-
-        for frmt in self.formats + ['raw']:
-            self.__setattr__(
-                'write_' + frmt,
-                lambda path,
-                f=frmt,
-                prog=self.prog: self.write(path, format=f, prog=prog)
-            )
-
-            f = self.__dict__['write_' + frmt]
-            f.__doc__ = (
-                '''Refer to the docstring accompanying the'''
-                ''''write' method for more information.'''
-            )
-
     def __getstate__(self):
         return copy.copy(self.obj_dict)
 
@@ -2165,3 +3767,38 @@ class Dot(Graph):
         os.unlink(tmp_name)
 
         return stdout_output
+
+
+def _create_method(frmt):
+
+    def create(self, prog=None):
+        return self.create(format=frmt, prog=prog)
+
+    create.__name__ = 'create_' + frmt
+    create.__doc__ = (
+        '''Refer to the docstring accompanying the'''
+        ''''create' method for more information.'''
+    )
+    return create
+
+
+def _write_method(frmt):
+
+    def write(self, path, prog=None):
+        return self.write(path, format=frmt, prog=prog)
+
+    write.__name__ = 'write_' + frmt
+    write.__doc__ = (
+        '''Refer to the docstring accompanying the'''
+        ''''write' method for more information.'''
+    )
+    return write
+
+
+# Automatically creates all the methods enabling the creation of output in
+# any of the supported formats.
+for _frmt in OUTPUT_FORMATS:
+    setattr(Dot, 'create_' + _frmt, _create_method(_frmt))
+for _frmt in OUTPUT_FORMATS + ('raw',):
+    setattr(Dot, 'write_' + _frmt, _write_method(_frmt))
+del _frmt
@@ -0,0 +1,350 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2014 Carlos Jenkins <carlos@jenkins.co.cr>
+# Copyright (c) 2014 Lance Hepler
+# Copyright (c) 2004-2011 Ero Carrera <ero@dkbza.org>
+# Copyright (c) 2004-2007 Michael Krause <michael@krause-software.de>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+Random access to the graphs of multi-graph DOT files.
+
+A DotIndex holds the byte offsets and names of the top level graphs of a
+DOT file, so that a single graph can be read and parsed without parsing
+the rest of the file. Indexes are saved next to the file they describe.
+"""
+
+from __future__ import division, print_function
+
+import codecs
+import json
+import os
+import tempfile
+
+from collections import deque
+
+from . import graphviz, parser
+from .lexer import EOF, ERROR, HTML, ID, QUOTED, tokenize_stream
+
+
+# Suffix added to the path of a DOT file to get the path of its index.
+INDEX_SUFFIX = '.idx'
+
+# Version of the index file format.
+INDEX_VERSION = 2
+
+
+class DotIndex(object):
+    """Index of the top level graphs of a DOT file.
+
+    graphs is the list of (start, end, name) tuples of the graphs, in the
+    order they appear in the file: the byte offsets of the first byte of
+    the graph and of the byte just after its closing brace, and the name
+    of the graph without quotes or escapes. charset is the encoding
+    used to decode the file and size and mtime describe the file when it
+    was indexed, see is_current().
+    """
+
+    def __init__(self, path, graphs, charset='utf-8', size=None,
+                 mtime=None):
+
+        self.path = path
+        self.graphs = graphs
+        self.charset = charset
+        self.size = size
+        self.mtime = mtime
+
+    def __len__(self):
+
+        return len(self.graphs)
+
+    def get_names(self):
+        """Return the list of the names of the graphs."""
+
+        return [name for start, end, name in self.graphs]
+
+    def find(self, name_or_index):
+        """Return the position of a graph in the index.
+
+        name_or_index is either the position itself, which may be negative
+        like a list index, or the name of the graph, quoted or not, in which
+        case the first graph with that name is found. Raises IndexError or
+        KeyError if there is no such graph, and TypeError for a bool.
+        """
+
+        if isinstance(name_or_index, bool):
+            raise TypeError('graph index must be an integer or a name')
+
+        if isinstance(name_or_index, int):
+            self.graphs[name_or_index]
+            if name_or_index < 0:
+                return name_or_index + len(self.graphs)
+            return name_or_index
+
+        wanted = graphviz._dot_unquote(name_or_index)
+        for idx, (start, end, name) in enumerate(self.graphs):
+            if name == wanted:
+                return idx
+
+        raise KeyError(name_or_index)
+
+    def read(self, name_or_index):
+        """Return the text of a graph, read from the file."""
+
+        start, end, name = self.graphs[self.find(name_or_index)]
+
+        with open(self.path, 'rb') as fd:
+            fd.seek(start)
+            data = fd.read(end - start)
+
+        if parser.PY3:
+            data = data.decode(self.charset)
+
+        return data
+
+    def load_graph(self, name_or_index):
+        """Parse a graph of the file and return it as a Dot class.
+
+        Raises DotSyntaxError if the graph is not valid dot language.
+        """
+
+        return parser.DotParser(self.read(name_or_index)).parse()[0]
+
+    def is_current(self):
+        """Return whether the file is unchanged since it was indexed."""
+
+        try:
+            st = os.stat(self.path)
+        except EnvironmentError:
+            return False
+
+        return st.st_size == self.size and st.st_mtime == self.mtime
+
+    def save(self, index_path=None):
+        """Write the index to index_path, by default next to the file."""
+
+        if index_path is None:
+            index_path = self.path + INDEX_SUFFIX
+
+        state = {
+            'version': INDEX_VERSION,
+            'charset': self.charset,
+            'size': self.size,
+            'mtime': self.mtime,
+            'graphs': self.graphs,
+        }
+
+        # Write to a temporary file first, so that readers never see a
+        # partly written index.
+        directory = os.path.dirname(os.path.abspath(index_path))
+        fd, path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as fobj:
+                json.dump(state, fobj)
+            getattr(os, 'replace', os.rename)(path, index_path)
+        except EnvironmentError:
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+
+
+class _DecodedFile(object):
+    """Binary file decoded for lexer.tokenize_stream.
+
+    The text read is kept until released, so that the character offsets
+    of tokens can be turned into byte offsets in the file.
+    """
+
+    def __init__(self, fobj, charset):
+
+        self._fobj = fobj
+        self._charset = charset
+        self._decoder = codecs.getincrementaldecoder(charset)()
+        # (character offset, byte offset, text) of the chunks read.
+        self._chunks = deque()
+        self._chars = 0
+        self._bytes = 0
+
+    def read(self, size):
+
+        text = ''
+        while not text:
+            raw = self._fobj.read(size)
+            text = self._decoder.decode(raw, not raw)
+            if not raw:
+                break
+
+        if text:
+            self._chunks.append((self._chars, self._bytes, text))
+            self._chars += len(text)
+            self._bytes += len(text.encode(self._charset))
+
+        return text
+
+    def release(self, pos):
+        """Forget the text read before the character at pos."""
+
+        while len(self._chunks) > 1 and self._chunks[1][0] <= pos:
+            self._chunks.popleft()
+
+    def byte_offset(self, pos):
+        """Return the byte offset of the character at pos, releasing the
+        text before it."""
+
+        self.release(pos)
+        if not self._chunks:
+            return self._bytes
+
+        chars, offset, text = self._chunks[0]
+        return offset + len(text[:pos - chars].encode(self._charset))
+
+
+def _iter_graph_bounds(tokens, byte_offset, release):
+    # Generate the (start, end, name) of the top level graphs read from
+    # tokens, like parser._iter_dot_spans, up to the first text that isn't
+    # a graph.
+
+    tok = next(tokens)
+
+    while True:
+        start = tok[2]
+        header = []
+        while tok[0] in (ID, QUOTED, HTML):
+            header.append(tok[1])
+            tok = next(tokens)
+        if tok[0] != '{' or not header:
+            return
+
+        start_offset = byte_offset(start)
+
+        depth = 1
+        while depth:
+            tok = next(tokens)
+            if tok[0] == '{':
+                depth += 1
+            elif tok[0] == '}':
+                depth -= 1
+                release(tok[2])
+            elif tok[0] in (ERROR, EOF):
+                return
+
+        words = header[1:] if header[0].lower() == 'strict' else header
+        name = graphviz._dot_unquote(words[1]) if len(words) > 1 else 'G'
+
+        yield start_offset, byte_offset(tok[2] + 1), name
+
+        tok = next(tokens)
+        if tok[0] == ';':
+            tok = next(tokens)
+        if tok[0] == EOF:
+            return
+
+
+def build_dot_index(path, save=True):
+    """Index the top level graphs of a DOT file and return a DotIndex.
+
+    The file is read through the lexer a chunk at a time for the bounds
+    of its graphs, without parsing their statements or holding all of
+    its text. Scanning stops at the first text that isn't a graph, like
+    parser.parse_dot_data(). If save is true, the index is also written
+    next to the file, when its directory is writable.
+    """
+
+    st = os.stat(path)
+    with open(path, 'rb') as fd:
+        charset = 'utf-8'
+        if parser.PY3:
+            charset = parser.find_dot_charset(
+                fd.read(parser.CHARSET_WINDOW)) or 'utf-8'
+            try:
+                codecs.lookup(charset)
+            except LookupError:
+                charset = 'utf-8'
+            fd.seek(0)
+
+        try:
+            graphs = _index_graphs(fd, charset)
+        except UnicodeDecodeError:
+            if charset == 'utf-8':
+                raise
+            charset = 'utf-8'
+            fd.seek(0)
+            graphs = _index_graphs(fd, charset)
+
+    index = DotIndex(path, graphs, charset, st.st_size, st.st_mtime)
+
+    if save:
+        try:
+            index.save()
+        except EnvironmentError:
+            # Read-only directories just don't keep the index.
+            pass
+
+    return index
+
+
+def _index_graphs(fd, charset):
+
+    if not parser.PY3:
+        # Python 2 reads bytes, whose offsets are already byte offsets.
+        return list(_iter_graph_bounds(
+            tokenize_stream(fd), lambda pos: pos, lambda pos: None))
+
+    source = _DecodedFile(fd, charset)
+    return list(_iter_graph_bounds(
+        tokenize_stream(source), source.byte_offset, source.release))
+
+
+def load_dot_index(path, rebuild=True):
+    """Return the DotIndex of a DOT file.
+
+    The index saved next to the file is used if it is still current,
+    otherwise the file is indexed again (and the new index saved) if
+    rebuild is true, or None is returned.
+    """
+
+    try:
+        with open(path + INDEX_SUFFIX, 'r') as fd:
+            state = json.load(fd)
+        if state.get('version') == INDEX_VERSION:
+            index = DotIndex(
+                path, [tuple(graph) for graph in state['graphs']],
+                state['charset'], state['size'], state['mtime'])
+            if index.is_current():
+                return index
+    except (EnvironmentError, ValueError, KeyError, TypeError):
+        # Missing, truncated or otherwise unreadable indexes are rebuilt.
+        pass
+
+    if not rebuild:
+        return None
+
+    return build_dot_index(path)
+
+
+def load_graph(path, name_or_index):
+    """Load a single graph of a multi-graph DOT file.
+
+    name_or_index is the position of the graph in the file or its name,
+    see DotIndex.find(). Only that graph is read and parsed, through the
+    index of the file, which is built and saved the first time.
+    """
+
+    return load_dot_index(path).load_graph(name_or_index)
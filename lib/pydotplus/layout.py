@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2014 Carlos Jenkins <carlos@jenkins.co.cr>
+# Copyright (c) 2014 Lance Hepler
+# Copyright (c) 2004-2011 Ero Carrera <ero@dkbza.org>
+# Copyright (c) 2004-2007 Michael Krause <michael@krause-software.de>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+Readers of Graphviz layout output.
+
+The plain and xdot output of Graphviz (Dot.create_plain(), Dot.create_xdot())
+is read into a GraphLayout, which holds the node positions and sizes, the
+edge spline control points and the bounding box of the graph in arrays.
+"""
+
+from __future__ import division, print_function
+
+import re
+import sys
+
+from array import array
+
+from . import graphviz, parser
+from .lexer import scan_html
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+PY3 = not sys.version_info < (3, 0, 0)
+
+if PY3:
+    unicode = str
+
+# Graphviz measures positions in points and node sizes in inches.
+POINTS_PER_INCH = 72.0
+
+_plain_token_re = re.compile(r'\s*(?:("(?:[^"\\]|\\.)*")|(<)|(\S+))', re.S)
+_number_re = re.compile(
+    r'[-+]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][-+]?[0-9]+)?')
+
+
+def _float_array(values):
+    """Return values as an array of floats, a NumPy one if available."""
+
+    values = array('d', values)
+    if numpy is not None:
+        return numpy.frombuffer(values, dtype=numpy.float64)
+    return values
+
+
+def _index_array(values):
+    """Return values as an array of integers, a NumPy one if available."""
+
+    if numpy is not None:
+        return numpy.array(values, dtype=numpy.int64)
+    return array('q', values)
+
+
+class GraphLayout(object):
+    """Layout of a graph computed by Graphviz.
+
+    All coordinates and lengths are in points. Nodes are listed in
+    node_names, under the same names as in the Dot model, and node_index
+    maps each name to its row in the node arrays: node_pos holds the x
+    and y of the nodes' centers and node_size their width and height.
+    Edges are listed in edges as (tail, head) tuples of node names, without
+    ports, the control points of the spline of the i-th edge being the
+    rows edge_offsets[i] to edge_offsets[i + 1] of edge_points, and
+    edge_index maps each (tail, head) to the positions of its edges in
+    edges. bb is the bounding box of the graph as (x0, y0, x1, y1).
+
+    The arrays are NumPy arrays of shape (n, 2) when NumPy is installed,
+    otherwise flat array.array objects holding the x and y of each row in
+    turn. graph is the Dot parsed from xdot output, None for plain output.
+    """
+
+    def __init__(self, node_names, node_pos, node_size, edges, edge_offsets,
+                 edge_points, bb, graph=None):
+
+        self.node_names = node_names
+        self.node_index = dict(
+            (name, idx) for idx, name in enumerate(node_names))
+        self.edges = edges
+        self.edge_index = dict()
+        for idx, edge in enumerate(edges):
+            self.edge_index.setdefault(edge, []).append(idx)
+        self.bb = _float_array(bb)
+        self.graph = graph
+
+        self.node_pos = _float_array(node_pos)
+        self.node_size = _float_array(node_size)
+        self.edge_offsets = _index_array(edge_offsets)
+        self.edge_points = _float_array(edge_points)
+
+        if numpy is not None:
+            self.node_pos = self.node_pos.reshape(-1, 2)
+            self.node_size = self.node_size.reshape(-1, 2)
+            self.edge_points = self.edge_points.reshape(-1, 2)
+
+    def _rows(self, values, start, stop):
+        if numpy is not None:
+            return [tuple(row) for row in values[start:stop].tolist()]
+        return [
+            (values[2 * idx], values[2 * idx + 1])
+            for idx in range(start, stop)
+        ]
+
+    def get_node_pos(self, name):
+        """Return the (x, y) position of the center of a node."""
+
+        idx = self.node_index[name]
+        return self._rows(self.node_pos, idx, idx + 1)[0]
+
+    def get_node_size(self, name):
+        """Return the (width, height) of a node."""
+
+        idx = self.node_index[name]
+        return self._rows(self.node_size, idx, idx + 1)[0]
+
+    def get_edge_points(self, tail, head, index=0):
+        """Return the control points of the spline of an edge.
+
+        index selects one of several edges between the same nodes. Ports
+        of tail and head are ignored.
+        """
+
+        idx = self.edge_index[
+            (graphviz._split_port(tail)[0], graphviz._split_port(head)[0])
+        ][index]
+        return self._rows(
+            self.edge_points, int(self.edge_offsets[idx]),
+            int(self.edge_offsets[idx + 1]))
+
+
+def _split_plain_line(line):
+
+    tokens = list()
+    pos = 0
+
+    while True:
+        m = _plain_token_re.match(line, pos)
+        if m is None:
+            return tokens
+
+        if m.group(2) is not None:
+            start = m.start(2)
+            end = scan_html(line, start)
+            if end < 0:
+                end = len(line)
+            tokens.append(line[start:end])
+            pos = end
+        else:
+            tokens.append(m.group(1) or m.group(3))
+            pos = m.end()
+
+
+def graph_from_plain(data):
+    """Read the plain (or plain-ext) output of Graphviz into a GraphLayout.
+
+    data is the text, or bytes, returned by Dot.create(format='plain').
+    """
+
+    if isinstance(data, bytes) and not isinstance(data, unicode):
+        data = data.decode('utf-8')
+
+    node_names = list()
+    node_pos = list()
+    node_size = list()
+    edges = list()
+    edge_offsets = [0]
+    edge_points = list()
+    bb = (0.0, 0.0, 0.0, 0.0)
+
+    for line in data.splitlines():
+        tokens = _split_plain_line(line)
+        if not tokens:
+            continue
+
+        if tokens[0] == 'graph':
+            # graph scale width height
+            bb = (0.0, 0.0, float(tokens[2]) * POINTS_PER_INCH,
+                  float(tokens[3]) * POINTS_PER_INCH)
+
+        elif tokens[0] == 'node':
+            # node name x y width height label style shape color fillcolor
+            node_names.append(tokens[1])
+            node_pos.extend(float(v) * POINTS_PER_INCH for v in tokens[2:4])
+            node_size.extend(
+                float(v) * POINTS_PER_INCH for v in tokens[4:6])
+
+        elif tokens[0] == 'edge':
+            # edge tail head n x1 y1 .. xn yn [label xl yl] style color
+            edges.append((
+                graphviz._split_port(tokens[1])[0],
+                graphviz._split_port(tokens[2])[0]))
+            count = int(tokens[3])
+            edge_points.extend(
+                float(v) * POINTS_PER_INCH
+                for v in tokens[4:4 + 2 * count])
+            edge_offsets.append(len(edge_points) // 2)
+
+        elif tokens[0] == 'stop':
+            break
+
+    return GraphLayout(
+        node_names, node_pos, node_size, edges, edge_offsets, edge_points,
+        bb)
+
+
+def _attribute_numbers(obj_dict, name):
+
+    value = graphviz._get_attributes(obj_dict).get(name)
+    if value is None:
+        return []
+    return [float(v) for v in _number_re.findall(value)]
+
+
+def _iter_obj_dicts(obj_dict, key):
+
+    for name, obj_list in obj_dict[key].items():
+        for obj in obj_list:
+            yield name, obj
+
+    for name, sgraph_list in obj_dict['subgraphs'].items():
+        for sgraph in sgraph_list:
+            for item in _iter_obj_dicts(sgraph, key):
+                yield item
+
+
+def graph_from_xdot(data):
+    """Read the xdot (or dot) output of Graphviz into a GraphLayout.
+
+    data is the text, or bytes, returned by Dot.create(format='xdot'). The
+    Dot parsed from data is kept in the graph attribute of the layout.
+    Nodes and edges that were not laid out, and so have no pos attribute,
+    are left out. A DotSyntaxError is raised if data is not valid.
+    """
+
+    graph = parser.parse_dot_graphs(data)[0]
+
+    node_names = list()
+    node_pos = list()
+    node_size = list()
+    edges = list()
+    edge_offsets = [0]
+    edge_points = list()
+
+    for name, obj in _iter_obj_dicts(graph.obj_dict, 'nodes'):
+        pos = _attribute_numbers(obj, 'pos')
+        if name in ('node', 'edge', 'graph') or len(pos) < 2:
+            continue
+
+        node_names.append(name)
+        node_pos.extend(pos[:2])
+        size = (_attribute_numbers(obj, 'width')[:1] or [0.0]) + \
+            (_attribute_numbers(obj, 'height')[:1] or [0.0])
+        node_size.extend(v * POINTS_PER_INCH for v in size)
+
+    for points, obj in _iter_obj_dicts(graph.obj_dict, 'edges'):
+        pos = graphviz._get_attributes(obj).get('pos')
+        if pos is None:
+            continue
+
+        # The spline is a list of x,y points, those marked with s, or e,
+        # being the ends of the arrows rather than control points.
+        edges.append(tuple(graphviz._split_port(p)[0] for p in points))
+        for point in pos.strip('"').replace('\\\n', '').split():
+            if point[:2] not in ('s,', 'e,'):
+                edge_points.extend(
+                    float(v) for v in _number_re.findall(point)[:2])
+        edge_offsets.append(len(edge_points) // 2)
+
+    # Graphviz writes the bounding box in a graph attribute statement.
+    bb = _attribute_numbers(graph.obj_dict, 'bb')
+    for obj in graph.obj_dict['nodes'].get('graph', []):
+        bb = _attribute_numbers(obj, 'bb') or bb
+    bb = bb[:4] or [0.0] * 4
+
+    return GraphLayout(
+        node_names, node_pos, node_size, edges, edge_offsets, edge_points,
+        bb, graph)
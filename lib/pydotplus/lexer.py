@@ -0,0 +1,382 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2014 Carlos Jenkins <carlos@jenkins.co.cr>
+# Copyright (c) 2014 Lance Hepler
+# Copyright (c) 2004-2011 Ero Carrera <ero@dkbza.org>
+# Copyright (c) 2004-2007 Michael Krause <michael@krause-software.de>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+Graphviz's dot language tokenizer.
+
+This module splits dot language text into the tokens consumed by the
+recursive-descent parser in pydotplus.parser. IDs are returned exactly as
+they appear in the source (double quoted strings keep their quotes and
+escapes, HTML strings keep their angle brackets), which is the form the
+rest of pydotplus works with.
+"""
+
+from __future__ import division, print_function
+
+import codecs
+import re
+
+
+# Token types. Punctuation tokens use the punctuation itself as type.
+ID = 'id'
+QUOTED = 'quoted'
+HTML = 'html'
+EDGEOP = 'edgeop'
+ERROR = 'error'
+EOF = 'eof'
+
+PUNCTUATION = '{}[]=;,:'
+
+KEYWORDS = ('strict', 'graph', 'digraph', 'subgraph', 'node', 'edge')
+
+_skip_re = re.compile(
+    r'(?:[ \t\r\n\f\v\ufeff]+|//[^\n]*|#[^\n]*|/\*.*?\*/)+', re.S
+)
+_id_re = re.compile(r'[^\x00-\x2d/\x3a-\x40\x5b-\x5e\x60\x7b-\x7f]+|-[0-9.]+')
+_quoted_re = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+_angle_re = re.compile(r'[<>]')
+_number_re = re.compile(r'-?[0-9.]+')
+_structure_re = re.compile(r'[{}\[\]"<#]|/[*/]')
+_bracket_re = re.compile(r'[\]"<#]|/[*/]')
+
+
+class DotSyntaxError(Exception):
+    """Raised when dot language text can't be tokenized or parsed.
+
+    Mirrors the interface of pyparsing's ParseException so that callers
+    can report errors from both parsers in the same way. When raised by
+    DotParser.parse(), graphs holds the graphs parsed before the error.
+    """
+
+    def __init__(self, data, loc, msg):
+        self.data = data
+        self.loc = loc
+        self.msg = msg
+        self.graphs = []
+
+    @property
+    def lineno(self):
+        if self.data is None:
+            return None
+        return self.data.count('\n', 0, self.loc) + 1
+
+    @property
+    def column(self):
+        if self.data is None:
+            return None
+        return self.loc - self.data.rfind('\n', 0, self.loc)
+
+    @property
+    def line(self):
+        if self.data is None:
+            return ''
+        start = self.data.rfind('\n', 0, self.loc) + 1
+        end = self.data.find('\n', self.loc)
+        if end < 0:
+            end = len(self.data)
+        return self.data[start:end]
+
+    def __str__(self):
+        if self.data is None:
+            return '%s (at char %d)' % (self.msg, self.loc)
+        return '%s (at char %d), (line:%d, col:%d)' % (
+            self.msg, self.loc, self.lineno, self.column)
+
+
+def scan_space(data, pos):
+    """Return the offset of the first character at or after pos that
+    isn't whitespace or part of a comment."""
+
+    m = _skip_re.match(data, pos)
+    if m is None:
+        return pos
+    return m.end()
+
+
+def scan_quoted(data, pos):
+    """Return the end offset of the double quoted string starting at pos.
+
+    Backslash escapes, including escaped quotes and escaped newlines, are
+    honored. Returns -1 if the string is not terminated.
+    """
+
+    m = _quoted_re.match(data, pos)
+    if m is None:
+        return -1
+    return m.end()
+
+
+def scan_html(data, pos):
+    """Return the end offset of the HTML string starting at pos.
+
+    The HTML string is delimited by balanced angle brackets. Returns -1 if
+    the brackets are not balanced before the end of data.
+    """
+
+    depth = 0
+    for m in _angle_re.finditer(data, pos):
+        if m.group() == '<':
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return m.end()
+    return -1
+
+
+def split_body(data, pos, chunk_size):
+    """Find the end of a graph body and the statement boundaries within.
+
+    pos is the offset just after the opening brace of the body. Returns a
+    tuple with the offset of the matching closing brace, -1 if there is
+    none, and a list of offsets at which the body can be split into
+    chunks of whole statements about chunk_size characters long. The
+    boundaries are the ends of the semicolons that separate statements of
+    the body itself, outside of subgraphs, attribute lists, quoted and
+    HTML strings and comments.
+    """
+
+    depth = 1
+    brackets = 0
+    bounds = []
+    target = pos + chunk_size
+    search = _structure_re.search
+
+    while True:
+        m = search(data, pos)
+        stop = len(data) if m is None else m.start()
+
+        # Only the text between two structural characters is searched
+        # for semicolons, the rest of it can't hold a boundary.
+        if stop >= target and depth == 1 and brackets == 0:
+            semi = data.rfind(';', pos, stop)
+            if semi >= 0:
+                bounds.append(semi + 1)
+                target = semi + 1 + chunk_size
+
+        if m is None:
+            return -1, bounds
+
+        c = m.group()
+        start = m.start()
+
+        if c == '{':
+            depth += 1
+            pos = m.end()
+        elif c == '}':
+            depth -= 1
+            if depth == 0:
+                return start, bounds
+            pos = m.end()
+        elif c == '[':
+            brackets += 1
+            pos = m.end()
+        elif c == ']':
+            brackets = max(brackets - 1, 0)
+            pos = m.end()
+        elif c == '"':
+            pos = scan_quoted(data, start)
+        elif c == '<':
+            pos = scan_html(data, start)
+        elif c == '/*':
+            pos = data.find('*/', start + 2)
+            if pos >= 0:
+                pos += 2
+        else:
+            pos = data.find('\n', start)
+            if pos < 0:
+                pos = len(data)
+
+        if pos < 0:
+            return -1, bounds
+
+
+def scan_attr_lists(data, pos):
+    """Return the end offset of the attribute lists starting at pos.
+
+    pos is the offset of the opening bracket of the first list. The lists
+    that follow it, separated only by whitespace and comments, are
+    included, as in 'a [color=red] [shape=box]'. Quoted and HTML strings
+    and comments are skipped without being tokenized, and the contents of
+    the lists are not checked. Returns -1 if a list is not terminated.
+    """
+
+    search = _bracket_re.search
+
+    while True:
+        pos += 1
+        while True:
+            m = search(data, pos)
+            if m is None:
+                return -1
+
+            c = m.group()
+            start = m.start()
+
+            if c == ']':
+                pos = m.end()
+                break
+            elif c == '"':
+                pos = scan_quoted(data, start)
+            elif c == '<':
+                pos = scan_html(data, start)
+            elif c == '/*':
+                pos = data.find('*/', start + 2)
+                if pos >= 0:
+                    pos += 2
+            else:
+                pos = data.find('\n', start)
+                if pos < 0:
+                    pos = len(data)
+
+            if pos < 0:
+                return -1
+
+        end = pos
+        m = _skip_re.match(data, pos)
+        if m is not None:
+            pos = m.end()
+        if not data.startswith('[', pos):
+            return end
+
+
+def split_number(text):
+    """Split a leading numeral off an unquoted ID.
+
+    Attribute values are matched as numerals first, so that 'w=2in' reads
+    as the value '2' followed by the attribute 'in'. Returns a tuple with
+    the numeral and the remaining text, which is empty when the whole ID
+    is a numeral.
+    """
+
+    if text[0] not in '-.0123456789':
+        return text, ''
+    m = _number_re.match(text)
+    return m.group(), text[m.end():]
+
+
+def tokenize(data, pos=0, end=None):
+    """Generate the tokens of data as (type, text, offset) tuples.
+
+    A character that can't start a token produces a single ERROR token, so
+    that the parser decides whether to report it. The last token is always
+    an EOF token.
+    """
+
+    if end is None:
+        end = len(data)
+
+    skip = _skip_re.match
+    match_id = _id_re.match
+
+    while True:
+        m = skip(data, pos, end)
+        if m is not None:
+            pos = m.end()
+        if pos >= end:
+            break
+
+        c = data[pos]
+
+        if c == '-' and data[pos + 1:pos + 2] in ('>', '-'):
+            yield (EDGEOP, data[pos:pos + 2], pos)
+            pos += 2
+
+        elif c in PUNCTUATION:
+            yield (c, c, pos)
+            pos += 1
+
+        elif c == '"':
+            stop = scan_quoted(data, pos)
+            if stop < 0 or stop > end:
+                yield (ERROR, c, pos)
+                break
+            yield (QUOTED, data[pos:stop], pos)
+            pos = stop
+
+        elif c == '<':
+            stop = scan_html(data, pos)
+            if stop < 0 or stop > end:
+                yield (ERROR, c, pos)
+                break
+            yield (HTML, data[pos:stop], pos)
+            pos = stop
+
+        else:
+            m = match_id(data, pos, end)
+            if m is None:
+                yield (ERROR, c, pos)
+                break
+            yield (ID, m.group(), pos)
+            pos = m.end()
+
+    yield (EOF, '', end)
+
+
+def tokenize_stream(fobj, chunk_size=65536, encoding='utf-8'):
+    """Generate the tokens read from a file-like object.
+
+    Works like tokenize() but reads fobj in chunks of chunk_size, so only
+    the text of the tokens not yet generated is held in memory. Offsets
+    are relative to the start of the stream. Binary streams are decoded
+    with the given encoding.
+    """
+
+    decoder = None
+    buf = ''
+    offset = 0
+    size = chunk_size
+    at_eof = False
+
+    while not at_eof:
+        chunk = fobj.read(size)
+        at_eof = not chunk
+
+        if isinstance(chunk, bytes) and not isinstance(chunk, str):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder(encoding)()
+            chunk = decoder.decode(chunk, at_eof)
+
+        buf += chunk
+        pos = 0
+
+        for tok in tokenize(buf):
+            if not at_eof:
+                # A token reaching the end of the buffer, or one that could
+                # not be scanned, may continue in the next chunk.
+                stop = tok[2] + len(tok[1])
+                if tok[0] in (ERROR, EOF) or stop >= len(buf):
+                    break
+                pos = stop
+            yield (tok[0], tok[1], tok[2] + offset)
+
+        # Read larger chunks while a single token spans several of them.
+        if pos:
+            size = chunk_size
+        else:
+            size *= 2
+
+        buf = buf[pos:]
+        offset += pos
@@ -33,7 +33,12 @@ into a class representation defined by pydotplus.
 from __future__ import division, print_function
 
 # sys模块提供对解释器使用或维护的一些变量的访问，以及与解释器强烈交互的函数。它始终可用。
+import re
 import sys
+import mmap
+import multiprocessing
+import threading
+import time
 import pydotplus
 # codecs是处理编码格式
 import codecs
@@ -43,10 +48,15 @@ import codecs
 from pyparsing import __version__ as pyparsing_version
 
 from pyparsing import (
-    nestedExpr, Literal, CaselessLiteral, Word, OneOrMore,
-    Forward, Group, Optional, Combine, nums, restOfLine,
-    cStyleComment, alphanums, printables, ParseException,
-    ParseResults, CharsNotIn, QuotedString
+    Literal, CaselessLiteral, Word, OneOrMore, Forward, Group,
+    Optional, Combine, nums, restOfLine, cStyleComment, alphanums,
+    printables, ParseException, ParseResults, CharsNotIn, Token
+)
+
+from .lexer import (
+    ID, QUOTED, HTML, EDGEOP, EOF, KEYWORDS, DotSyntaxError, split_body,
+    split_number, scan_attr_lists, scan_html, scan_quoted, scan_space,
+    tokenize, tokenize_stream
 )
 
 # 判断python版本是否是3.0.0
@@ -56,6 +66,43 @@ PY3 = not sys.version_info < (3, 0, 0)
 if PY3:
     basestring = str
 
+# Number of bytes at the start of a file searched for the charset attribute.
+CHARSET_WINDOW = 65536
+
+# Number of characters of a graph body parsed by each task of a parallel
+# parse. Smaller graphs are parsed in a single process.
+PARALLEL_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Statements of machine-generated dot language, such as the output of
+# Graph.to_string() and of dot -Tcanon, matched whole by DotParser instead
+# of token by token: node, edge and default statements with at most one
+# attribute list, and ID=ID statements, without ports or HTML strings.
+_line_idchars = r'[^\x00-\x2d/\x3a-\x40\x5b-\x5e\x60\x7b-\x7f]'
+_line_quoted = r'"[^"\\]*(?:\\.[^"\\]*)*"'
+_line_id = r'(?:%(c)s+(?!%(c)s)|-[0-9.]+(?![0-9.])|%(q)s)' % {
+    'c': _line_idchars, 'q': _line_quoted}
+_line_value = (
+    r'(?:%(q)s|-?[0-9.]+(?!%(c)s)|(?![0-9.])%(c)s+(?!%(c)s))' % {
+        'c': _line_idchars, 'q': _line_quoted})
+_line_stmt_re = re.compile(
+    r'(%(id)s)(?:\s*=\s*(%(value)s)|((?:\s*(?:->|--)\s*%(id)s)+)?'
+    r'(?:\s*\[((?:[^\]"<]|%(q)s)*)\])?)'
+    # Nothing that could continue the statement may follow it.
+    r'\s*;?(?=\s*(?:[^\s\-\[:=/#]|$))' % {
+        'id': _line_id, 'value': _line_value, 'q': _line_quoted})
+_line_edge_re = re.compile(r'\s*(?:->|--)\s*(%s)' % _line_id)
+_line_attr_re = re.compile(
+    r'[\s,;]*(%s)(?:\s*=\s*(%s))?' % (_line_id, _line_value))
+_line_end_re = re.compile(r'[\s,;]*$')
+_line_skip_re = re.compile(r'(?:[\s,;=]|%s)*\Z' % _line_id)
+
+# Kinds of statements that can be selected with the include and exclude
+# arguments of DotParser and parse_dot_data.
+STATEMENT_KINDS = (
+    'graph_attributes', 'defaults', 'nodes', 'edges', 'attributes',
+    'subgraphs', 'header'
+)
+
 # 定义P_AttrList类
 class P_AttrList:
 
@@ -104,11 +151,11 @@ class DefaultStatement(P_AttrList):
             self.default_type, self.attrs
         )
 
-# 定义top_graphs是列表
-top_graphs = list()
-
 # 定义push_top_grah_stmt函数，参数是str,loc和toks
 def push_top_graph_stmt(str, loc, toks):
+    # The graphs are collected here instead of in a module global so that
+    # several parses can run at the same time.
+    top_graphs = list()
     # attrs是字典
     attrs = {}
     # g初始化为None
@@ -225,8 +272,18 @@ def add_elements(g, toks,
     if defaults_edge is None:
         defaults_edge = {}
 
+    graphviz = pydotplus.graphviz
+
     for elm_idx, element in enumerate(toks):
-        if isinstance(element, (pydotplus.Subgraph, pydotplus.Cluster)):
+        # Nodes and edges are parsed into bare obj_dicts, which are added
+        # directly without creating Node and Edge instances.
+        if isinstance(element, graphviz.NodeRecord):
+            graphviz._add_node_obj_dict(g.obj_dict, element)
+
+        elif isinstance(element, graphviz.EdgeRecord):
+            graphviz._add_edge_obj_dict(g.obj_dict, element)
+
+        elif isinstance(element, (pydotplus.Subgraph, pydotplus.Cluster)):
             add_defaults(element, defaults_graph)
             g.add_subgraph(element)
 
@@ -245,18 +302,12 @@ def add_elements(g, toks,
                 )
 
         elif isinstance(element, DefaultStatement):
-            if element.default_type == 'graph':
-                default_graph_attrs = pydotplus.Node('graph', **element.attrs)
-                g.add_node(default_graph_attrs)
-
-            elif element.default_type == 'node':
-                default_node_attrs = pydotplus.Node('node', **element.attrs)
-                g.add_node(default_node_attrs)
-
-            elif element.default_type == 'edge':
-                default_edge_attrs = pydotplus.Node('edge', **element.attrs)
-                g.add_node(default_edge_attrs)
-                defaults_edge.update(element.attrs)
+            if element.default_type in ('graph', 'node', 'edge'):
+                graphviz._add_node_obj_dict(
+                    g.obj_dict, graphviz._node_obj_dict(
+                        element.default_type, element.attrs))
+                if element.default_type == 'edge':
+                    defaults_edge.update(element.attrs)
 
             else:
                 raise ValueError(
@@ -340,6 +391,7 @@ def push_edge_stmt(str, loc, toks):
         attrs.update(a.attrs)
 
     e = []
+    edge_obj_dict = pydotplus.graphviz._edge_obj_dict
 
     if isinstance(toks[0][0], pydotplus.Graph):
         n_prev = pydotplus.frozendict(toks[0][0].obj_dict)
@@ -350,14 +402,14 @@ def push_edge_stmt(str, loc, toks):
         n_next_list = [[n.get_name()] for n in toks[2][0]]
         for n_next in [n for n in n_next_list]:
             n_next_port = do_node_ports(n_next)
-            e.append(pydotplus.Edge(n_prev, n_next[0] + n_next_port, **attrs))
+            e.append(edge_obj_dict(n_prev, n_next[0] + n_next_port, attrs))
 
     elif isinstance(toks[2][0], pydotplus.Graph):
         e.append(
-            pydotplus.Edge(
+            edge_obj_dict(
                 n_prev,
                 pydotplus.frozendict(toks[2][0].obj_dict),
-                **attrs
+                attrs
             )
         )
 
@@ -369,7 +421,7 @@ def push_edge_stmt(str, loc, toks):
         else:
             name_port = node.get_name()
 
-        e.append(pydotplus.Edge(n_prev, name_port, **attrs))
+        e.append(edge_obj_dict(n_prev, name_port, attrs))
 
     elif isinstance(toks[2][0], type('')):
         for n_next in [n for n in tuple(toks)[2::2]]:
@@ -378,7 +430,7 @@ def push_edge_stmt(str, loc, toks):
                 continue
 
             n_next_port = do_node_ports(n_next)
-            e.append(pydotplus.Edge(n_prev, n_next[0] + n_next_port, **attrs))
+            e.append(edge_obj_dict(n_prev, n_next[0] + n_next_port, attrs))
 
             n_prev = n_next[0] + n_next_port
 
@@ -401,18 +453,153 @@ def push_node_stmt(s, loc, toks):
         if len(node_name) > 0:
             node_name = node_name[0]
 
-    n = pydotplus.Node(str(node_name), **attrs)
+    n = pydotplus.graphviz._node_obj_dict(str(node_name), attrs)
     return n
 
 
-graphparser = None
+# Timer used by GrammarProfile.
+_timer = getattr(time, 'perf_counter', time.time)
+
+
+class GrammarProfile(object):
+    """Profile of the pyparsing grammar built by graph_definition().
+
+    For every named rule the number of times it was tried, matched and
+    failed is counted, failures after part of the rule had matched being
+    counted as backtracks too, as well as the time spent in the rule and
+    in the rules it contains. The parse actions are timed separately.
+    report() formats the results as a text table.
+    """
+
+    def __init__(self):
+        # rule name: [attempts, successes, failures, backtracks, seconds]
+        self.rules = dict()
+        # parse action name: [calls, seconds]
+        self.actions = dict()
+        self.data_size = 0
+        self.parse_time = 0.0
+        self.error = None
+        self._starts = list()
+
+    def watch(self, name, element):
+        """Count the attempts, successes and failures of a grammar rule."""
+
+        stats = self.rules.setdefault(name, [0, 0, 0, 0, 0.0])
+        starts = self._starts
+
+        # The callbacks take extra arguments in newer pyparsing versions.
+        def start(instring, loc, expr, *args):
+            stats[0] += 1
+            starts.append(_timer())
+
+        def success(instring, start_loc, end_loc, expr, toks, *args):
+            stats[1] += 1
+            if starts:
+                stats[4] += _timer() - starts.pop()
+
+        def failure(instring, loc, expr, exc, *args):
+            stats[2] += 1
+            if instring[loc:getattr(exc, 'loc', loc)].strip():
+                stats[3] += 1
+            if starts:
+                stats[4] += _timer() - starts.pop()
+
+        element.setDebugActions(start, success, failure)
+
+    def timed(self, action):
+        """Return parse action wrapped so that its calls are timed."""
+
+        stats = self.actions.setdefault(action.__name__, [0, 0.0])
+
+        def timed_action(s, loc, toks):
+            t = _timer()
+            try:
+                return action(s, loc, toks)
+            finally:
+                stats[0] += 1
+                stats[1] += _timer() - t
+
+        return timed_action
+
+    def report(self):
+        """Return the profile as a text report, slowest rules first."""
+
+        lines = [
+            'pyparsing %s, %d characters parsed in %.6f s' % (
+                pyparsing_version, self.data_size, self.parse_time)
+        ]
+        if self.error is not None:
+            lines.append('parse failed: %s' % self.error)
+
+        lines.append('')
+        lines.append('%-24s %10s %10s %10s %10s %12s' % (
+            'rule', 'attempts', 'successes', 'failures', 'backtracks',
+            'time (s)'))
+        for name, stats in sorted(
+                self.rules.items(), key=lambda item: -item[1][4]):
+            lines.append('%-24s %10d %10d %10d %10d %12.6f' % (
+                (name,) + tuple(stats)))
+
+        lines.append('')
+        lines.append('%-24s %10s %12s' % ('parse action', 'calls', 'time (s)'))
+        for name, stats in sorted(
+                self.actions.items(), key=lambda item: -item[1][1]):
+            lines.append('%-24s %10d %12.6f' % ((name,) + tuple(stats)))
+
+        return '\n'.join(lines) + '\n'
+
+    __str__ = report
+
+
+class ScannedString(Token):
+    """pyparsing token for the strings matched by the lexer's scanners.
+
+    Matches the string starting with opener for which scan, one of
+    lexer.scan_quoted and lexer.scan_html, returns an end offset, and
+    returns it as it appears in the source. Unlike pyparsing's own
+    QuotedString and nestedExpr, the scanners take time linear in the
+    length of the string and honor escaped quotes and nested tags.
+    """
+
+    def __init__(self, opener, scan, name):
+
+        super(ScannedString, self).__init__()
+
+        self.opener = opener
+        self.scan = scan
+        self.setName(name)
+        self.mayReturnEmpty = False
+        self.mayIndexError = False
+
+    def parseImpl(self, instring, loc, doActions=True):
+
+        if instring.startswith(self.opener, loc):
+            end = self.scan(instring, loc)
+            if end > 0:
+                return end, instring[loc:end]
+
+        raise ParseException(instring, loc, self.errmsg, self)
+
+
+# pyparsing grammars keep parsing state in their elements, so each thread
+# builds and caches a grammar of its own.
+grammar_cache = threading.local()
 
 
 # 接下来要看的代码
-def graph_definition():
-    global graphparser
+def graph_definition(profile=None):
+    """Return the pyparsing grammar of the dot language.
+
+    The grammar is built on first use and cached for the calling thread.
+    If a GrammarProfile is given as profile, a new grammar instrumented
+    to record its rules and parse actions in the profile is built instead.
+    """
+
+    graphparser = None
+    if profile is None:
+        graphparser = getattr(grammar_cache, 'graphparser', None)
 
-    if not graphparser:
+    if graphparser is None:
         # punctuation
         colon = Literal(":")
         lbrace = Literal("{")
@@ -443,22 +630,13 @@ def graph_definition():
         identifier = Word(alphanums + "_.").setName("identifier")
 
         # dblQuotedString
-        double_quoted_string = QuotedString(
-            '"', multiline=True, unquoteResults=False
-        )
+        double_quoted_string = ScannedString(
+            '"', scan_quoted, "double_quoted_string")
 
         noncomma_ = "".join([c for c in printables if c != ","])
         alphastring_ = OneOrMore(CharsNotIn(noncomma_ + ' '))
 
-        def parse_html(s, loc, toks):
-            return '<%s>' % ''.join(toks[0])
-
-        opener = '<'
-        closer = '>'
-        html_text = nestedExpr(
-            opener, closer,
-            (CharsNotIn(opener + closer))
-        ).setParseAction(parse_html).leaveWhitespace()
+        html_text = ScannedString('<', scan_html, "html_text")
 
         ID = (
             identifier | html_text |
@@ -541,48 +719,1257 @@ def graph_definition():
         graphparser.ignore(singleLineComment)
         graphparser.ignore(cStyleComment)
 
-        assignment.setParseAction(push_attr_list)
-        a_list.setParseAction(push_attr_list)
-        edge_stmt.setParseAction(push_edge_stmt)
-        node_stmt.setParseAction(push_node_stmt)
-        attr_stmt.setParseAction(push_default_stmt)
+        if profile is not None:
+            timed = profile.timed
+        else:
+            def timed(action):
+                return action
+
+        assignment.setParseAction(timed(push_attr_list))
+        a_list.setParseAction(timed(push_attr_list))
+        edge_stmt.setParseAction(timed(push_edge_stmt))
+        node_stmt.setParseAction(timed(push_node_stmt))
+        attr_stmt.setParseAction(timed(push_default_stmt))
+
+        subgraph.setParseAction(timed(push_subgraph_stmt))
+        graph_stmt.setParseAction(timed(push_graph_stmt))
+        graphparser.setParseAction(timed(push_top_graph_stmt))
 
-        subgraph.setParseAction(push_subgraph_stmt)
-        graph_stmt.setParseAction(push_graph_stmt)
-        graphparser.setParseAction(push_top_graph_stmt)
+        # 如果解释的版本大于1.2，那么调用parseWithtabs()方法
+        if pyparsing_version >= '1.2':
+            graphparser.parseWithTabs()
+
+        if profile is not None:
+            rules = (
+                ('identifier', identifier),
+                ('double_quoted_string', double_quoted_string),
+                ('html_text', html_text), ('ID', ID),
+                ('float_number', float_number),
+                ('righthand_id', righthand_id), ('port', port),
+                ('a_list', a_list), ('attr_list', attr_list),
+                ('attr_stmt', attr_stmt), ('edgeop', edgeop),
+                ('graph_stmt', graph_stmt), ('edge_point', edge_point),
+                ('edge_stmt', edge_stmt), ('subgraph', subgraph),
+                ('node_stmt', node_stmt), ('assignment', assignment),
+                ('stmt', stmt),
+            )
+            for name, element in rules:
+                profile.watch(name, element)
+        else:
+            grammar_cache.graphparser = graphparser
 
     return graphparser
 
 
-# 解释dot数据，传入的参数是data
-def parse_dot_data(data):
+def select_kinds(include=None, exclude=None):
+    """Return the set of statement kinds selected by include and exclude.
 
-    # 定义全局变量，top_graphs
-    global top_graphs
+    Both are sequences of names from STATEMENT_KINDS. All kinds but
+    'header' are included by default.
+    """
 
-    # 定义top_graphs为一个空列表
-    top_graphs = list()
+    if include is None:
+        kinds = set(STATEMENT_KINDS) - set(['header'])
+    elif isinstance(include, basestring):
+        kinds = set([include])
+    else:
+        kinds = set(include)
+
+    if exclude is None:
+        exclude = ()
+    elif isinstance(exclude, basestring):
+        exclude = (exclude,)
+
+    for kind in kinds.union(exclude):
+        if kind not in STATEMENT_KINDS:
+            raise ValueError('Unknown statement kind: %r' % (kind,))
+
+    return frozenset(kinds.difference(exclude))
+
+
+class BaseDotParser(object):
+    """Token level helpers shared by the dot language parsers.
+
+    Subclasses read the (type, text, offset) tuples generated by tokens,
+    one token ahead, through the current token in the token attribute.
+    """
+
+    def __init__(self, tokens, data=None):
+        self.data = data
+        self._tokens = tokens
+        self._lookahead = []
+        self.token = next(self._tokens)
+
+    def _advance(self):
+        tok = self.token
+        if self._lookahead:
+            self.token = self._lookahead.pop()
+        elif tok[0] != EOF:
+            self.token = next(self._tokens)
+        return tok
+
+    def _peek(self):
+        if not self._lookahead:
+            if self.token[0] == EOF:
+                return self.token
+            self._lookahead.append(next(self._tokens))
+        return self._lookahead[-1]
+
+    def _error(self, expected):
+        tok = self.token
+        if tok[0] == EOF:
+            found = 'end of text'
+        else:
+            found = repr(tok[1])
+        raise DotSyntaxError(
+            self.data, tok[2], 'Expected %s, found %s' % (expected, found))
+
+    def _expect(self, tok_type):
+        if self.token[0] != tok_type:
+            self._error(repr(tok_type))
+        return self._advance()
+
+    def _keyword(self, *keywords):
+        tok = self.token
+        if tok[0] == ID and tok[1].lower() in keywords:
+            return tok[1].lower()
+        return None
+
+    def _node_id(self):
+        tok = self.token
+        if tok[0] not in (ID, QUOTED, HTML):
+            self._error('node ID')
+        self._advance()
+
+        name = tok[1]
+        while self.token[0] == ':':
+            self._advance()
+            port = self.token
+            if port[0] not in (ID, QUOTED, HTML):
+                self._error('port')
+            self._advance()
+            name += ':' + port[1]
+
+        return name
+
+    def _attr_list(self):
+        attrs = {}
+
+        while self.token[0] == '[':
+            self._advance()
+
+            while self.token[0] != ']':
+                tok = self.token
+                if tok[0] in (',', ';'):
+                    self._advance()
+                    continue
+                if tok[0] not in (ID, QUOTED, HTML):
+                    self._error('attribute')
+                self._advance()
+
+                if self.token[0] == '=':
+                    self._advance()
+                    attrs[tok[1]] = self._value()
+                else:
+                    attrs[tok[1]] = None
+
+            self._advance()
+
+        return attrs
+
+    def _value(self):
+        tok = self.token
+
+        if tok[0] == ID:
+            value, rest = split_number(tok[1])
+            if rest:
+                # The rest of the ID is read as the next token.
+                self.token = (ID, rest, tok[2] + len(value))
+            else:
+                self._advance()
+            return value
+
+        if tok[0] in (QUOTED, HTML):
+            self._advance()
+            return tok[1]
+
+        self._error('attribute value')
+
+
+def parse_attr_list(data):
+    """Parse dot language attribute lists and return their attributes.
+
+    data holds one or more bracketed lists, such as '[color=red] [a=b]',
+    and nothing else but whitespace and comments. Raises DotSyntaxError
+    if it is not valid dot language.
+    """
+
+    p = BaseDotParser(tokenize(data), data)
+    if p.token[0] != '[':
+        p._error("'['")
+    attrs = p._attr_list()
+    if p.token[0] != EOF:
+        p._error('end of attribute list')
+    return attrs
+
+
+class DotParser(BaseDotParser):
+    """Recursive-descent parser for the dot language.
+
+    Builds the same Dot, Subgraph, Node and Edge objects as the pyparsing
+    grammar returned by graph_definition(), but reads the tokens produced
+    by pydotplus.lexer in a single pass, without backtracking.
+
+    The source is either a string with the dot data or a file-like object
+    the data is read from in chunks (see lexer.tokenize_stream).
+
+    DotParser(source).parse() returns the list of top level graphs and
+    DotParser(source).iter_graphs() generates them one at a time. Both
+    raise DotSyntaxError if the source is not valid dot language.
+
+    Parsers keep all their state in the instance, so different instances
+    can be used from different threads at the same time.
+
+    include and exclude select the kinds of statements that are kept (see
+    select_kinds): 'graph_attributes' for ID=ID statements, 'defaults' for
+    graph, node and edge attribute statements, 'nodes' and 'edges' for
+    node and edge statements, 'attributes' for the attribute lists of
+    nodes and edges, and 'subgraphs' for subgraphs, including those used
+    as edge endpoints. The other statements are only scanned, no objects
+    are created for them and syntax errors within their attribute lists
+    and subgraphs are not reported. With 'header', parsing stops at the
+    first statement of the first graph that isn't a graph attribute.
+
+    Unless lines is false, statements of string sources are first matched
+    whole by regular expressions, which is much faster for the regular
+    layout of machine-generated dot language such as the output of
+    Graph.to_string(). Statements that don't match are read token by
+    token, and matching stops for the rest of the source if most
+    statements don't match. Both ways build the same graphs.
+
+    Node names, edge end points and attribute names and values are
+    interned in interner, a graphviz.StringInterner which defaults to
+    the table shared by all graphs, graphviz.string_interner. Pass a new
+    StringInterner to keep the strings of the parsed graphs apart, or one
+    with maxsize=0 to not intern them.
+
+    If lazy_attributes is true, the attribute lists of the nodes, edges
+    and defaults of string sources are only scanned for their end and
+    kept as graphviz.LazyAttributes, which decode them the first time
+    they are used. Syntax errors within these attribute lists are then
+    raised on first use instead of by the parser.
+    """
+
+    def __init__(self, source, chunk_size=65536, encoding='utf-8',
+                 include=None, exclude=None, lines=True, interner=None,
+                 lazy_attributes=False):
+        if hasattr(source, 'read'):
+            BaseDotParser.__init__(
+                self, tokenize_stream(source, chunk_size, encoding))
+        else:
+            BaseDotParser.__init__(self, tokenize(source), source)
+
+        self._kinds = select_kinds(include, exclude)
+        if interner is None:
+            interner = pydotplus.graphviz.string_interner
+        self._interner = interner
+        self._lines = lines and self.data is not None
+        self._lazy = lazy_attributes and self.data is not None
+        self._line_hits = 0
+        self._line_misses = 0
+
+    def parse(self):
+        """Parse the source and return the list of top level graphs.
+
+        The graphs parsed before a syntax error are kept in the graphs
+        attribute of the DotSyntaxError raised.
+        """
+
+        graphs = []
+        try:
+            for g in self.iter_graphs():
+                graphs.append(g)
+        except DotSyntaxError:
+            sys.exc_info()[1].graphs = graphs
+            raise
+
+        return graphs
+
+    def iter_graphs(self):
+        """Parse the source and generate its top level graphs.
+
+        Each graph is parsed only when requested, so at most one graph is
+        held by the parser at any time. A DotSyntaxError is raised when the
+        graph being parsed is not valid, after the graphs before it have
+        been generated.
+        """
+
+        if self.token[0] == EOF:
+            self._error('graph')
+
+        g = self.parse_graph()
+        update_parent_graph_hierarchy(g)
+        yield g
+
+        if 'header' in self._kinds:
+            return
+
+        while self.token[0] != EOF:
+            g = self.parse_graph()
+            update_parent_graph_hierarchy(g)
+            yield g
+
+    def parse_graph(self, spans=None):
+        """Parse a single top level graph and return it as a Dot.
+
+        If spans is a list, the statements of the graph body are recorded
+        in it as [start, end, first, stop, attribute] lists: the offsets
+        of the statement in the source, the range of sequence numbers of
+        the nodes, edges and subgraphs it added and, for ID=ID statements,
+        the (name, value) of the graph attribute it set. The offsets of
+        the body, after its opening brace, and of its closing brace are
+        kept in the body_span attribute of the parser.
+        """
+
+        if self._keyword('strict'):
+            # The pyparsing grammar drops the strict flag, keep doing so.
+            self._advance()
+
+        graph_type = self._keyword('graph', 'digraph')
+        if graph_type is None:
+            self._error('graph or digraph')
+        self._advance()
+
+        g = pydotplus.Dot(graph_type=graph_type)
+
+        if self.token[0] in (ID, QUOTED, HTML):
+            g.set_name(self._advance()[1])
+
+        if 'header' in self._kinds:
+            self._header(g.obj_dict)
+        else:
+            self._body(g.obj_dict, spans)
+
+        return g
+
+    # The statements are added straight to the obj_dict of the graph, as
+    # creating a Node or Edge for each of them would be much slower.
+
+    def _header(self, obj_dict):
+        graphviz = pydotplus.graphviz
+        self._expect('{')
+
+        while True:
+            tok = self.token
+
+            if tok[0] == ';':
+                self._advance()
+
+            elif tok[0] in (ID, QUOTED, HTML) and self._peek()[0] == '=':
+                self._advance()
+                self._advance()
+                self._set_attribute(obj_dict, tok[1], self._value())
+
+            elif self._keyword('graph') and self._peek()[0] == '[':
+                self._advance()
+                graphviz._add_node_obj_dict(
+                    obj_dict, graphviz._node_obj_dict(
+                        'graph', self._kept_attr_list(), self._interner))
+
+            else:
+                return
+
+    def _body(self, obj_dict, spans=None):
+        start = self._expect('{')[2] + 1
+
+        if self._lines and spans is None:
+            self._line_stmts(obj_dict, start)
+
+        while self.token[0] != '}':
+            if self.token[0] == ';':
+                self._advance()
+            elif spans is None:
+                self._stmt(obj_dict)
+            else:
+                spans.append(self._stmt_span(obj_dict))
+
+        if spans is not None:
+            self.body_span = (start, self.token[2])
+
+        self._advance()
+        if self.token[0] == ';':
+            self._advance()
+
+    def _set_attribute(self, obj_dict, name, value):
+        intern = self._interner.intern
+        obj_dict['attributes'][intern(name)] = intern(value)
+
+    def _seek(self, pos):
+        self._tokens = tokenize(self.data, pos)
+        self._lookahead = []
+        self.token = next(self._tokens)
+
+    def _line_stmts(self, obj_dict, pos):
+        """Read the statements of a body matched by _line_stmt_re.
+
+        Returns when the end of the body is reached or matching stops,
+        with the parser at the next token.
+        """
+
+        data = self.data
+        match = _line_stmt_re.match
+
+        while True:
+            pos = scan_space(data, pos)
+
+            m = match(data, pos)
+            if m is not None and self._line_stmt(obj_dict, m):
+                self._line_hits += 1
+                pos = m.end()
+                continue
+
+            self._seek(pos)
+            if self.token[0] in ('}', EOF):
+                return
+
+            if self.token[0] == ';':
+                self._advance()
+            else:
+                self._stmt(obj_dict)
+                self._line_misses += 1
+                if (self._line_misses > 16 and
+                        self._line_misses > self._line_hits):
+                    self._lines = False
+                if not self._lines:
+                    return
+
+            pos = self.token[2]
+
+    def _line_stmt(self, obj_dict, m):
+        """Add the statement matched by m, returning False if it must be
+        read token by token instead."""
+
+        graphviz = pydotplus.graphviz
+        first, value, edges, attr_list = m.groups()
+        kinds = self._kinds
+
+        if value is not None:
+            if first.lower() in KEYWORDS:
+                return False
+            if 'graph_attributes' in kinds:
+                self._set_attribute(obj_dict, first, value)
+            return True
+
+        default_type = first.lower()
+        if default_type in KEYWORDS:
+            if (attr_list is None or edges is not None or
+                    default_type not in ('graph', 'node', 'edge')):
+                return False
+            keep = 'defaults' in kinds
+        elif edges is None:
+            keep = 'nodes' in kinds and 'attributes' in kinds
+        else:
+            keep = 'edges' in kinds and 'attributes' in kinds
+
+        attrs = {}
+        if attr_list is None:
+            pass
+        elif not keep:
+            # Skipped lists are only checked for tokens, like
+            # _skip_attr_list does, without building their attributes.
+            if _line_skip_re.match(attr_list) is None:
+                return False
+        elif self._lazy and '/' not in attr_list and '#' not in attr_list:
+            # Comments could hide the real end of the list, those are
+            # left to the token parser.
+            attrs = graphviz.LazyAttributes(
+                m.string[m.start(4) - 1:m.end(4) + 1], self._interner)
+        else:
+            attrs = self._line_attrs(attr_list)
+            if attrs is None:
+                return False
+
+        if default_type in KEYWORDS:
+            if keep:
+                graphviz._add_node_obj_dict(
+                    obj_dict, graphviz._node_obj_dict(
+                        default_type, attrs, self._interner))
+            return True
+
+        if edges is None:
+            if 'nodes' in kinds:
+                graphviz._add_node_obj_dict(
+                    obj_dict, graphviz._node_obj_dict(
+                        first, attrs, self._interner))
+            return True
+
+        points = [first]
+        for point in _line_edge_re.findall(edges):
+            if point.lower() in KEYWORDS:
+                return False
+            points.append(point)
+
+        if 'edges' in kinds:
+            for n_prev, n_next in zip(points[:-1], points[1:]):
+                graphviz._add_edge_obj_dict(
+                    obj_dict, graphviz._edge_obj_dict(
+                        n_prev, n_next, attrs, self._interner))
+        return True
+
+    def _line_attrs(self, attr_list):
+        """Return the attributes of an attribute list matched by
+        _line_stmt_re, or None if it must be read token by token."""
+
+        attrs = {}
+        match = _line_attr_re.match
+        pos = 0
+
+        while True:
+            m = match(attr_list, pos)
+            if m is None:
+                if _line_end_re.match(attr_list, pos) is None:
+                    return None
+                return attrs
+            attrs[m.group(1)] = m.group(2)
+            pos = m.end()
+
+    def _stmt_list(self, obj_dict, spans):
+        while self.token[0] != EOF:
+            if self.token[0] == ';':
+                self._advance()
+            else:
+                spans.append(self._stmt_span(obj_dict))
+
+    def _stmt_span(self, obj_dict):
+        tok = self.token
+        first = obj_dict['current_child_sequence']
+        is_attribute = (
+            tok[0] in (ID, QUOTED, HTML) and self._peek()[0] == '=')
+
+        self._stmt(obj_dict)
+
+        # The statement ends with its last token, the whitespace before
+        # the next one is left out.
+        start = tok[2]
+        end = start + len(self.data[start:self.token[2]].rstrip())
+
+        attribute = None
+        if is_attribute and tok[1] in obj_dict['attributes']:
+            attribute = (tok[1], obj_dict['attributes'][tok[1]])
+
+        return [
+            start, end, first, obj_dict['current_child_sequence'], attribute]
+
+    def _stmt(self, obj_dict):
+        graphviz = pydotplus.graphviz
+        tok = self.token
+
+        if tok[0] == '{':
+            self._subgraph_or_edge_stmt(obj_dict)
+            return
+
+        if tok[0] not in (ID, QUOTED, HTML):
+            self._error('statement')
+
+        next_type = self._peek()[0]
+
+        if next_type == '=':
+            self._advance()
+            self._advance()
+            value = self._value()
+            if 'graph_attributes' in self._kinds:
+                self._set_attribute(obj_dict, tok[1], value)
+            return
+
+        if self._keyword('subgraph'):
+            self._subgraph_or_edge_stmt(obj_dict)
+            return
+
+        if next_type == '[':
+            default_type = self._keyword('graph', 'node', 'edge')
+            if default_type is not None:
+                self._advance()
+                if 'defaults' in self._kinds:
+                    graphviz._add_node_obj_dict(
+                        obj_dict, graphviz._node_obj_dict(
+                            default_type, self._kept_attr_list(),
+                            self._interner))
+                else:
+                    self._skip_attr_list()
+                return
+
+        point = self._node_id()
+
+        if self.token[0] == EDGEOP:
+            self._edge_stmt(obj_dict, point)
+            return
+
+        if 'nodes' not in self._kinds:
+            self._skip_attr_list()
+            return
+
+        # Ports in node statements carry no meaning and are dropped.
+        graphviz._add_node_obj_dict(
+            obj_dict, graphviz._node_obj_dict(
+                tok[1], self._stmt_attrs(), self._interner))
+
+    def _stmt_attrs(self):
+        if 'attributes' in self._kinds:
+            return self._kept_attr_list()
+
+        self._skip_attr_list()
+        return {}
+
+    def _kept_attr_list(self):
+        if not self._lazy or self.token[0] != '[':
+            return self._attr_list()
+
+        start = self.token[2]
+        end = scan_attr_lists(self.data, start)
+        if end < 0:
+            # Let the token parser report the error.
+            return self._attr_list()
+
+        self._seek(end)
+        return pydotplus.graphviz.LazyAttributes(
+            self.data[start:end], self._interner)
+
+    def _skip_attr_list(self):
+        while self.token[0] == '[':
+            self._advance()
+            while self.token[0] not in (']', EOF):
+                self._advance()
+            self._expect(']')
+
+    def _skip_subgraph(self):
+        if self._keyword('subgraph'):
+            self._advance()
+            if self.token[0] in (ID, QUOTED, HTML):
+                self._advance()
+
+        self._expect('{')
+        depth = 1
+        while depth:
+            tok_type = self._advance()[0]
+            if tok_type == '{':
+                depth += 1
+            elif tok_type == '}':
+                depth -= 1
+            elif tok_type == EOF:
+                self._error("'}'")
+
+        if self.token[0] == ';':
+            self._advance()
+
+    def _subgraph_or_edge_stmt(self, obj_dict):
+        graphviz = pydotplus.graphviz
+        if 'subgraphs' not in self._kinds:
+            self._skip_subgraph()
+            if self.token[0] == EDGEOP:
+                # Edges from a subgraph are dropped with the subgraph.
+                self._edge_stmt(None, None)
+            return
+
+        sgraph = self._subgraph(obj_dict)
+
+        if self.token[0] == EDGEOP:
+            self._edge_stmt(obj_dict, sgraph)
+        else:
+            graphviz._add_subgraph_obj_dict(obj_dict, sgraph)
+
+    def _subgraph(self, parent):
+        graphviz = pydotplus.graphviz
+        name = None
+        show_keyword = False
+
+        if self._keyword('subgraph'):
+            self._advance()
+            show_keyword = True
+            if self.token[0] in (ID, QUOTED, HTML):
+                name = self._advance()[1]
+
+        # The obj_dict of Subgraph(''), whose children are added with
+        # the top level graph as parent.
+        sgraph = graphviz._graph_obj_dict(
+            '', 'digraph', False, False, False, {})
+        sgraph['type'] = 'subgraph'
+        sgraph['parent_graph'] = parent['parent_graph']
+
+        self._body(sgraph)
+
+        if name is not None:
+            sgraph['name'] = name
+        if show_keyword:
+            sgraph['show_keyword'] = True
+
+        return sgraph
+
+    def _edge_stmt(self, obj_dict, first):
+        graphviz = pydotplus.graphviz
+        points = [first]
+        keep = obj_dict is not None and 'edges' in self._kinds
+
+        while self.token[0] == EDGEOP:
+            self._advance()
+            if self.token[0] == '{' or self._keyword('subgraph'):
+                if keep and 'subgraphs' in self._kinds:
+                    points.append(self._subgraph(obj_dict))
+                else:
+                    # Skipped subgraphs are left as None endpoints.
+                    self._skip_subgraph()
+                    points.append(None)
+            else:
+                points.append(self._node_id())
+
+        if not keep:
+            self._skip_attr_list()
+            return
+
+        attrs = self._stmt_attrs()
+
+        # Mirror push_edge_stmt: subgraphs become frozen edge endpoints,
+        # an edge to a subgraph ends the chain and subgraphs further down
+        # a chain of nodes are skipped.
+        n_prev = points[0]
+        if isinstance(n_prev, dict):
+            n_prev = pydotplus.frozendict(n_prev)
+
+        if points[1] is None:
+            return
+
+        if isinstance(points[1], dict):
+            graphviz._add_edge_obj_dict(
+                obj_dict, graphviz._edge_obj_dict(
+                    n_prev, pydotplus.frozendict(points[1]), attrs,
+                    self._interner))
+            return
+
+        for n_next in points[1:]:
+            if n_next is None or isinstance(n_next, dict):
+                continue
+            graphviz._add_edge_obj_dict(
+                obj_dict, graphviz._edge_obj_dict(
+                    n_prev, n_next, attrs, self._interner))
+            n_prev = n_next
+
+
+# Gap left between the sequence numbers of the top level statements of a
+# DotDocument, so that statements can be inserted without renumbering.
+SEQUENCE_STEP = 1024
+
+
+class DotDocument(object):
+    """Dot language text kept in sync with the graph it defines.
+
+    The text is parsed once with the source spans of the statements of
+    the graph body. Each edit() then re-parses only the statements the
+    edit touches and patches the nodes, edges, subgraphs and attributes
+    of the graph in place, so its cost follows the size of the edit
+    rather than that of the text. The unit of re-parsing is a statement
+    of the top level graph body, an edit inside a subgraph re-parses
+    the whole subgraph.
+
+    Edits of the graph header or of its braces, and edits that leave the
+    touched statements unparsable on their own (such as an opened quote
+    or comment), fall back to parsing the whole text again. The graph
+    attribute holds the first graph of the text, which is the same Dot
+    instance after every edit; it should only be changed through edit().
+    """
+
+    def __init__(self, data):
+
+        self.data = decode_dot_data(data)
+        self.graph = None
+        self._parse()
+
+    def edit(self, offset, removed, inserted):
+        """Replace removed characters at offset with the inserted text.
+
+        Returns the updated graph. Raises DotSyntaxError if the new text
+        is not valid dot language, in which case the next edit parses the
+        whole text again.
+        """
+
+        data = self.data
+        if offset < 0 or removed < 0 or offset + removed > len(data):
+            raise ValueError('Edit out of range')
+
+        self.data = data[:offset] + inserted + data[offset + removed:]
+        delta = len(inserted) - removed
+
+        if (self._records is None or offset < self._body or
+                offset + removed > self._close):
+            self._parse()
+            return self.graph
+
+        # The statements touching the edited text, records[i:j], are
+        # parsed again along with the text between their neighbours.
+        i = self._bisect(offset, 1)
+        j = self._bisect(offset + removed + 1, 0)
+
+        start = self._end(i - 1) if i else self._body
+        end = self._start(j) if j < len(self._records) else self._close
+
+        obj_dict = pydotplus.graphviz._graph_obj_dict(
+            '', 'digraph', False, False, False, {})
+        obj_dict['parent_graph'] = self.graph
+
+        # The new children are added to the adjacency index of the graph
+        # by _replace, not while they are parsed.
+        adjacency = self.graph._adjacency
+        self.graph._adjacency = None
+
+        spans = []
+        try:
+            DotParser(self.data[start:end + delta])._stmt_list(
+                obj_dict, spans)
+        except DotSyntaxError:
+            self.graph._adjacency = adjacency
+            self._parse()
+            return self.graph
+
+        self.graph._adjacency = adjacency
+
+        records = self._records_from_spans(spans, obj_dict, start)
+        self._replace(i, j, records, delta)
+        self._close += delta
+
+        return self.graph
+
+    def get_spans(self):
+        """Return the (start, end) offsets of the statements of the graph
+        body, in the order they appear in the text.
+
+        The list is empty while the text is not valid dot language.
+        """
+
+        if self._records is None:
+            return []
+
+        return [
+            (self._start(k), self._end(k)) for k in range(len(self._records))
+        ]
+
+    def _parse(self):
+
+        self._records = None
+
+        parser = DotParser(self.data)
+        spans = []
+        g = parser.parse_graph(spans)
+
+        if self.graph is None:
+            self.graph = g
+        else:
+            # Move the new graph into the Dot handed out before.
+            graphviz = pydotplus.graphviz
+            state = graphviz.graph_to_state(g)
+            self.graph.obj_dict.clear()
+            self.graph.obj_dict.update(
+                graphviz._load_state(state, self.graph, {}))
+        update_parent_graph_hierarchy(self.graph)
+
+        self._body, self._close = parser.body_span
+        self._records = self._records_from_spans(
+            spans, self.graph.obj_dict, 0)
+        # Records from _shift_from on are _shift characters further in
+        # the text than their offsets say, see _replace.
+        self._shift_from = 0
+        self._shift = 0
+
+        self._renumber()
+
+    def _records_from_spans(self, spans, obj_dict, offset):
+        """Turn statement spans into [start, end, objects, attribute]
+        records, with the children of obj_dict each statement added."""
+
+        children = dict()
+        for key in ('nodes', 'edges', 'subgraphs'):
+            for obj_list in obj_dict[key].values():
+                for obj in obj_list:
+                    children[obj['sequence']] = obj
+
+        return [
+            [start + offset, end + offset,
+             [children[seq] for seq in range(first, stop)], attribute]
+            for start, end, first, stop, attribute in spans
+        ]
+
+    def _start(self, k):
+
+        if k >= self._shift_from:
+            return self._records[k][0] + self._shift
+        return self._records[k][0]
+
+    def _end(self, k):
+
+        if k >= self._shift_from:
+            return self._records[k][1] + self._shift
+        return self._records[k][1]
+
+    def _bisect(self, offset, field):
+        """Return the index of the first record whose start (field 0) or
+        end (field 1) is at or after offset."""
+
+        get = self._end if field else self._start
+        lo, hi = 0, len(self._records)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if get(mid) < offset:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _replace(self, i, j, records, delta):
+        """Replace records[i:j] with records, the records after them being
+        moved by delta characters."""
+
+        old = self._records
+        obj_dict = self.graph.obj_dict
+
+        # Shifting every following record would take time proportional to
+        # the size of the text, so the shift is applied lazily and only
+        # the records between this edit and the previous one are moved.
+        if j <= self._shift_from:
+            for k in range(j, self._shift_from):
+                old[k][0] += delta
+                old[k][1] += delta
+        else:
+            for k in range(self._shift_from, j):
+                old[k][0] += self._shift
+                old[k][1] += self._shift
+            self._shift_from = j
+        self._shift += delta
+        self._shift_from += len(records) - (j - i)
+
+        attributes = False
+        for record in old[i:j]:
+            attributes = attributes or record[3] is not None
+            for obj in record[2]:
+                self._remove_child(obj_dict, obj)
+
+        old[i:j] = records
+
+        # Sequence numbers for the new children, evenly spread between the
+        # children of the statements around them.
+        count = sum(len(record[2]) for record in records)
+        if count:
+            low, high = self._sequence_gap(i, i + len(records))
+            if high - low <= count:
+                self._renumber()
+            else:
+                step = (high - low) // (count + 1)
+                seq = low
+                for record in records:
+                    for obj in record[2]:
+                        seq += step
+                        obj['sequence'] = seq
+                        self._add_child(obj_dict, obj)
+
+        for record in records:
+            attributes = attributes or record[3] is not None
+
+        if attributes:
+            # Later assignments win, but the order of the attributes is
+            # that of their first assignment.
+            attrs = obj_dict['attributes']
+            attrs.clear()
+            for record in old:
+                if record[3] is not None:
+                    attrs[record[3][0]] = record[3][1]
+
+    def _sequence_gap(self, i, j):
+
+        low = 0
+        for k in range(i - 1, -1, -1):
+            if self._records[k][2]:
+                low = self._records[k][2][-1]['sequence']
+                break
+
+        high = self.graph.obj_dict['current_child_sequence']
+        for k in range(j, len(self._records)):
+            if self._records[k][2]:
+                high = self._records[k][2][0]['sequence']
+                break
+
+        return low, high
+
+    def _renumber(self):
+        """Number all the children of the graph SEQUENCE_STEP apart."""
+
+        obj_dict = self.graph.obj_dict
+
+        for key in ('nodes', 'edges', 'subgraphs'):
+            obj_dict[key].clear()
+        pydotplus.graphviz._drop_adjacency(obj_dict)
+
+        seq = 0
+        for record in self._records:
+            for obj in record[2]:
+                seq += SEQUENCE_STEP
+                obj['sequence'] = seq
+                self._add_child(obj_dict, obj)
+
+        obj_dict['current_child_sequence'] = seq + SEQUENCE_STEP
+
+    def _add_child(self, obj_dict, obj):
+
+        if obj['type'] == 'node':
+            obj_list = obj_dict['nodes'].setdefault(obj['name'], [])
+        elif obj['type'] == 'edge':
+            obj_list = obj_dict['edges'].setdefault(obj['points'], [])
+        else:
+            obj_list = obj_dict['subgraphs'].setdefault(obj['name'], [])
+
+        obj['parent_graph'] = obj_dict['parent_graph']
+
+        # Keep the lists of children with the same name in text order.
+        k = len(obj_list)
+        while k and obj_list[k - 1]['sequence'] > obj['sequence']:
+            k -= 1
+        obj_list.insert(k, obj)
+        pydotplus.graphviz._index_child(obj_dict, obj)
+
+    def _remove_child(self, obj_dict, obj):
+
+        if obj['type'] == 'node':
+            children, key = obj_dict['nodes'], obj['name']
+        elif obj['type'] == 'edge':
+            children, key = obj_dict['edges'], obj['points']
+        else:
+            children, key = obj_dict['subgraphs'], obj['name']
+
+        obj_list = children[key]
+        for k, child in enumerate(obj_list):
+            if child is obj:
+                del obj_list[k]
+                pydotplus.graphviz._index_child(obj_dict, obj, -1)
+                break
+        if not obj_list:
+            del children[key]
+
+
+class DotEventParser(BaseDotParser):
+    """Streaming, event based parser for the dot language.
+
+    Reads dot language text from a file-like object in chunks and
+    generates (event, value) tuples without building any graph objects,
+    so arbitrarily large inputs are processed in constant memory:
+
+        ('graph_start', (strict, graph_type, name))
+        ('graph_end', name)
+        ('subgraph_start', name)
+        ('subgraph_end', name)
+        ('attr', (name, value))
+        ('default', (default_type, attrs))
+        ('node', (name, attrs))
+        ('edge', (src, dst, attrs))
+
+    Graph and subgraph names are None when omitted. default_type is one of
+    'graph', 'node' or 'edge'. Each edge statement produces one 'edge'
+    event per pair of consecutive endpoints; an endpoint is a node ID
+    (including its port) or, for a subgraph, the tuple ('subgraph', name).
+    The 'subgraph_start' and 'subgraph_end' events of a subgraph used as an
+    endpoint come before the 'edge' events it takes part in.
+
+    DotSyntaxError is raised when invalid text is found.
+    """
+
+    def __init__(self, fobj, chunk_size=65536, encoding='utf-8'):
+        BaseDotParser.__init__(
+            self, tokenize_stream(fobj, chunk_size, encoding))
+
+    def __iter__(self):
+        while self.token[0] != EOF:
+            for event in self._graph_events():
+                yield event
+
+    def _graph_events(self):
+        strict = self._keyword('strict') is not None
+        if strict:
+            self._advance()
+
+        graph_type = self._keyword('graph', 'digraph')
+        if graph_type is None:
+            self._error('graph or digraph')
+        self._advance()
+
+        name = None
+        if self.token[0] in (ID, QUOTED, HTML):
+            name = self._advance()[1]
+
+        self._expect('{')
+        yield ('graph_start', (strict, graph_type, name))
+
+        # Subgraphs are tracked with an explicit stack instead of recursion
+        # so that events can be generated as soon as they are parsed. Each
+        # entry holds the (sub)graph name and, for a subgraph used as an
+        # edge endpoint, the endpoints of its edge statement so far.
+        stack = [(name, None)]
+
+        while True:
+            tok = self.token
+
+            if tok[0] == ';':
+                self._advance()
+                continue
+
+            if tok[0] == '}':
+                self._advance()
+                name, points = stack.pop()
+
+                if not stack:
+                    if self.token[0] == ';':
+                        self._advance()
+                    yield ('graph_end', name)
+                    return
+
+                yield ('subgraph_end', name)
+
+                if points is None:
+                    if self.token[0] != EDGEOP:
+                        continue
+                    points = []
+                points.append(('subgraph', name))
+
+                for event in self._edge_events(points, stack):
+                    yield event
+                continue
+
+            if tok[0] == '{':
+                yield self._subgraph_start(stack, None)
+                continue
+
+            if tok[0] not in (ID, QUOTED, HTML):
+                self._error('statement')
+
+            next_type = self._peek()[0]
+
+            if next_type == '=':
+                self._advance()
+                self._advance()
+                yield ('attr', (tok[1], self._value()))
+                continue
+
+            if self._keyword('subgraph'):
+                yield self._subgraph_start(stack, None)
+                continue
+
+            if next_type == '[':
+                default_type = self._keyword('graph', 'node', 'edge')
+                if default_type is not None:
+                    self._advance()
+                    yield ('default', (default_type, self._attr_list()))
+                    continue
+
+            point = self._node_id()
+
+            if self.token[0] == EDGEOP:
+                for event in self._edge_events([point], stack):
+                    yield event
+                continue
+
+            if self.token[0] == '[':
+                attrs = self._attr_list()
+            else:
+                attrs = {}
+
+            yield ('node', (tok[1], attrs))
+
+    def _subgraph_start(self, stack, points):
+        name = None
+
+        if self._keyword('subgraph'):
+            self._advance()
+            if self.token[0] in (ID, QUOTED, HTML):
+                name = self._advance()[1]
+
+        self._expect('{')
+        stack.append((name, points))
+
+        return ('subgraph_start', name)
+
+    def _edge_events(self, points, stack):
+        """Continue the edge statement whose endpoints so far are points.
+
+        Returns the events generated until either the statement ends or a
+        subgraph endpoint starts, in which case the statement is resumed
+        when the subgraph ends.
+        """
+
+        while self.token[0] == EDGEOP:
+            self._advance()
+            if self.token[0] == '{' or self._keyword('subgraph'):
+                return [self._subgraph_start(stack, points)]
+            points.append(self._node_id())
+
+        if self.token[0] == '[':
+            attrs = self._attr_list()
+        else:
+            attrs = {}
+
+        return [
+            ('edge', (points[idx], points[idx + 1], attrs))
+            for idx in range(len(points) - 1)
+        ]
+
+
+def iter_dot_events(fobj, chunk_size=65536, encoding='utf-8'):
+    """Iterate over the parsing events of the dot data read from fobj.
+
+    fobj is any file-like object (including pipes) opened in text or
+    binary mode. See DotEventParser for the events generated.
+    """
+
+    return iter(DotEventParser(fobj, chunk_size, encoding))
+
+
+def find_dot_charset(data, end=None):
+    """Return the value of the charset attribute in dot data read as bytes.
+
+    Only the first end bytes of data are searched, data may be any buffer
+    such as an mmap. Returns None if no charset is found.
+    """
+
+    # this is extremely hackish
+    idx = data.find(b'charset', 0, end)
+    if idx < 0:
+        return None
+
+    try:
+        # 寻找idx，先找到charset开始的位置，并将这个位置索引添加7,7是charset的长度
+        idx += 7
+        # 如果idx的元素在\t\n\r=中的任一个元素，idx自加1
+        while data[idx:idx + 1] in (b' ', b'\t', b'\n', b'\r', b'='):
+            idx += 1
+        # 将此时的idx赋值给fst
+        fst = idx
+        # 如果idx不在\t\n\r];,中的任意一个，那么idx自加1
+        while data[idx:idx + 1] not in (b' ', b'\t', b'\n', b'\r', b']',
+                                        b';', b',', b''):
+            idx += 1
+        # charset的值是fst:idx中的数据，使用"\分离，使用ascii编码
+        return data[fst:idx].strip(b'"\'').decode('ascii')
+    except UnicodeDecodeError:
+        return None
+
+
+def decode_dot_data(data):
+    """Decode dot data read in binary form.
+
+    The charset attribute of the graph, if any, gives the encoding, which
+    defaults to utf-8. Text data is returned as is.
+    """
 
     # 如果使用的版本是Python3
     if PY3:
         # 判断data是否是bytes
         if isinstance(data, bytes):
-            # this is extremely hackish
+            charset = find_dot_charset(data)
             try:
-                # 寻找idx，先找到charset开始的位置，并将这个位置索引添加7,7是charset的长度
-                idx = data.index(b'charset') + 7
-                # 如果idx的元素在\t\n\r=中的任一个元素，idx自加1
-                while data[idx] in b' \t\n\r=':
-                    idx += 1
-                # 将此时的idx赋值给fst
-                fst = idx
-                # 如果idx不在\t\n\r];,中的任意一个，那么idx自加1
-                while data[idx] not in b' \t\n\r];,':
-                    idx += 1
-                # 定义charset,它的值是fst:idx中的数据，使用"\分离，使用ascii编码
-                charset = data[fst:idx].strip(b'"\'').decode('ascii')
                 # 使用charset重新对data编码
-                data = data.decode(charset)
+                data = data.decode(charset or 'utf-8')
             except:
                 # 如果出现异常，那么直接将数据使用utf-8重新编码
                 data = data.decode('utf-8')
@@ -591,29 +1978,371 @@ def parse_dot_data(data):
         if data.startswith(codecs.BOM_UTF8):
             data = data.decode('utf-8')
 
-    try:
-        # 将grapharser定义为graph_definition方法
-        graphparser = graph_definition()
+    return data
 
-        # 如果解释的版本大于1.2，那么调用parseWithtabs()方法
-        if pyparsing_version >= '1.2':
-            graphparser.parseWithTabs()
 
-        # 调用parseString方法对data进行处理，返回tokens
-        tokens = graphparser.parseString(data)
+class _SplitError(Exception):
+    """Raised when data can't be split for a parallel parse."""
+
+
+def _parse_dot_chunk(args):
+
+    chunk, include, exclude = args
+
+    g = DotParser(
+        'graph {%s\n}' % chunk, include=include, exclude=exclude
+    ).parse_graph()
+
+    return pydotplus.graphviz.graph_to_state(g)
+
+
+def _merge_dot_chunk(g, state):
+    graphviz = pydotplus.graphviz
+
+    obj_dict = graphviz._load_state(state, g, {})
+    g.obj_dict['attributes'].update(obj_dict['attributes'])
+
+    children = list()
+    for key in ('nodes', 'edges', 'subgraphs'):
+        for obj_list in obj_dict[key].values():
+            children.extend(obj_list)
+    children.sort(key=lambda obj: obj['sequence'])
 
-        # 如果tokens的长度等于1，返回tokens的第0个数据，否则，遍历tokens的所有元素组成的列表
-        if len(tokens) == 1:
-            return tokens[0]
+    # Add the statements of the chunk in order, as if they were parsed
+    # straight into g.
+    for obj in children:
+        if obj['type'] == 'node':
+            obj['parent_graph'] = None
+            graphviz._add_node_obj_dict(g.obj_dict, obj)
+        elif obj['type'] == 'edge':
+            graphviz._add_edge_obj_dict(g.obj_dict, obj)
         else:
-            return [g for g in tokens]
-            # 如果出现ParseException
+            graphviz._add_subgraph_obj_dict(g.obj_dict, obj)
+
+
+def _iter_dot_spans(data, chunk_size=None):
+    """Generate the spans of the top level graphs of data.
+
+    Each graph is returned as a (start, header, body, end, bounds) tuple:
+    the offset of its first token, the list of the texts of the tokens
+    before its body, the offset just after the opening brace of the body,
+    the offset of the closing brace and the statement boundaries found by
+    lexer.split_body, if chunk_size is given. Raises _SplitError when the
+    rest of data doesn't start with a graph.
+    """
+
+    pos = 0
+
+    while True:
+        tokens = tokenize(data, pos)
+        tok = next(tokens)
+
+        if tok[0] == ';' and pos:
+            tok = next(tokens)
+        if tok[0] == EOF and pos:
+            return
+
+        start = tok[2]
+        header = []
+        while tok[0] in (ID, QUOTED, HTML):
+            header.append(tok[1])
+            tok = next(tokens)
+        if tok[0] != '{' or not header:
+            raise _SplitError()
+
+        body = tok[2] + 1
+        end, bounds = split_body(data, body, chunk_size or len(data) + 1)
+        if end < 0:
+            raise _SplitError()
+
+        yield start, header, body, end, bounds
+
+        pos = end + 1
+
+
+def _iter_dot_chunks(data, chunk_size):
+    """Generate the top level graphs of data as (header, chunks) tuples.
+
+    header is the text of the graph with an empty body and chunks the
+    list of statement chunks of its body.
+    """
+
+    for start, header, body, end, bounds in _iter_dot_spans(
+            data, chunk_size):
+        bounds = [body] + bounds + [end]
+        yield (
+            data[start:body] + '}',
+            [data[a:b] for a, b in zip(bounds[:-1], bounds[1:])])
+
+
+def _parse_dot_parallel(data, workers, include, exclude, chunk_size):
+
+    pool = None
+
+    try:
+        graphs = list()
+
+        for header, chunks in _iter_dot_chunks(data, chunk_size):
+            g = DotParser(
+                header, include=include, exclude=exclude).parse_graph()
+
+            args = [(chunk, include, exclude) for chunk in chunks]
+            if len(chunks) == 1:
+                states = [_parse_dot_chunk(args[0])]
+            else:
+                if pool is None:
+                    pool = multiprocessing.Pool(workers)
+                states = pool.imap(_parse_dot_chunk, args)
+
+            for state in states:
+                _merge_dot_chunk(g, state)
+
+            update_parent_graph_hierarchy(g)
+            graphs.append(g)
+
+        return graphs
+
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+
+def parse_dot_parallel(data, workers=None, include=None, exclude=None,
+                       chunk_size=None):
+    """Parse dot language data in several processes.
+
+    The body of each top level graph is split into chunks of whole
+    statements, chunk_size characters long by default PARALLEL_CHUNK_SIZE,
+    which are parsed in a pool of workers processes (by default one per
+    CPU) and merged back in order. The graphs returned are the same as
+    those of DotParser(data).parse(). Data that can't be split, including
+    data with syntax errors, is parsed by a single DotParser, so errors
+    are raised as DotSyntaxError just the same.
+    """
+
+    data = decode_dot_data(data)
+
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    if chunk_size is None:
+        chunk_size = PARALLEL_CHUNK_SIZE
+
+    kinds = select_kinds(include, exclude)
+
+    if workers > 1 and len(data) > chunk_size and 'header' not in kinds:
+        try:
+            return _parse_dot_parallel(
+                data, workers, include, exclude, chunk_size)
+        except (_SplitError, DotSyntaxError):
+            pass
+
+    return DotParser(data, include=include, exclude=exclude).parse()
+
+
+def parse_dot_graphs(data, use_pyparsing=False, include=None, exclude=None,
+                     workers=None, lazy_attributes=False):
+    """Parse dot language data and return the list of graphs it defines.
+
+    Unlike parse_dot_data, syntax errors are not caught: a DotSyntaxError,
+    or a ParseException when use_pyparsing is True, is raised instead.
+    """
+
+    data = decode_dot_data(data)
+
+    if not use_pyparsing:
+        if workers is not None:
+            return parse_dot_parallel(
+                data, workers=workers, include=include, exclude=exclude)
+        return DotParser(
+            data, include=include, exclude=exclude,
+            lazy_attributes=lazy_attributes).parse()
+
+    if include is not None or exclude is not None:
+        raise ValueError(
+            'include and exclude are not supported by the pyparsing grammar')
+
+    if workers is not None:
+        raise ValueError(
+            'workers is not supported by the pyparsing grammar')
+
+    if lazy_attributes:
+        raise ValueError(
+            'lazy_attributes is not supported by the pyparsing grammar')
+
+    # 将grapharser定义为graph_definition方法
+    graphparser = graph_definition()
+
+    # 调用parseString方法对data进行处理，返回tokens
+    tokens = graphparser.parseString(data)
+
+    return [g for g in tokens]
+
+
+def profile_dot_data(data, profile=None):
+    """Parse dot language data with the pyparsing grammar and profile it.
+
+    Returns the GrammarProfile, a new one unless profile is given, with
+    the counters and timings of the grammar rules and parse actions. A
+    syntax error is recorded in the profile instead of being raised.
+    """
+
+    if profile is None:
+        profile = GrammarProfile()
+
+    data = decode_dot_data(data)
+    graphparser = graph_definition(profile=profile)
+
+    t = _timer()
+    try:
+        graphparser.parseString(data)
     except ParseException:
+        profile.error = sys.exc_info()[1]
+    profile.parse_time += _timer() - t
+    profile.data_size += len(data)
+
+    return profile
+
+
+def parse_dot_data(data, use_pyparsing=False, include=None, exclude=None,
+                   workers=None, lazy_attributes=False):
+    """Parse dot language data and return the graph(s) it defines.
+
+    A single Dot is returned when data holds one graph and a list of Dot
+    instances when it holds several. Syntax errors are printed and None is
+    returned. Like the pyparsing grammar, whatever follows the last graph
+    that could be parsed is ignored.
+
+    The data is parsed by DotParser, unless use_pyparsing is True, in which
+    case the (much slower) pyparsing grammar from graph_definition() is
+    used instead.
+
+    include and exclude select the kinds of statements that are kept, as
+    described for DotParser. For instance exclude=['attributes'] keeps only
+    the topology of the graph, and include=['header'] only reads its type,
+    name and leading graph attributes.
+
+    If workers is given, large graphs are parsed in that many processes,
+    see parse_dot_parallel. Otherwise, if lazy_attributes is true, the
+    attribute lists are decoded when first used, as described for
+    DotParser, and their syntax errors are raised then.
+    """
+
+    try:
+        graphs = parse_dot_graphs(
+            data, use_pyparsing=use_pyparsing, include=include,
+            exclude=exclude, workers=workers,
+            lazy_attributes=lazy_attributes)
+    # 如果出现ParseException
+    except (ParseException, DotSyntaxError):
         # exc_info用来在对异常进行捕获时，获得异常的详尽信息
+        graphs = _leading_graphs(sys.exc_info()[1])
+
+    return _graph_or_list(graphs)
+
+
+def _leading_graphs(err):
+    # Return the graphs parsed before the syntax error err, or print the
+    # error and return None if there are none.
+
+    graphs = getattr(err, 'graphs', None)
+    if graphs:
+        return graphs
+
+    # 打印err的line，line不知道是什么意思，下面都不知道什么意思
+    print(err.line)
+    print(" " * (err.column - 1) + "^")
+    print(err)
+    # 返回空
+    return None
+
+
+def _graph_or_list(graphs):
+
+    # 如果只有一个图，返回这个图，否则返回所有图组成的列表
+    if graphs is not None and len(graphs) == 1:
+        return graphs[0]
+    return graphs
+
+
+def _parse_dot_buffer(buf, include=None, exclude=None,
+                      lazy_attributes=False):
+
+    charset = find_dot_charset(buf, CHARSET_WINDOW) or 'utf-8'
+    try:
+        codecs.lookup(charset)
+    except LookupError:
+        charset = 'utf-8'
+
+    # The tokens are decoded from the buffer a chunk at a time, so neither
+    # its bytes nor its whole text are copied into memory.
+    try:
+        return DotParser(
+            buf, chunk_size=CHARSET_WINDOW, encoding=charset,
+            include=include, exclude=exclude,
+            lazy_attributes=lazy_attributes).parse()
+    except DotSyntaxError:
         err = sys.exc_info()[1]
-        # 打印err的line，line不知道是什么意思，下面都不知道什么意思
-        print(err.line)
-        print(" " * (err.column - 1) + "^")
-        print(err)
-        # 返回空
-        return None
+        if err.data is None:
+            err.data = _decode_prefix(buf, charset, err.loc)
+        raise
+
+
+def _decode_prefix(buf, charset, loc):
+    # Decode buf up to the end of the line holding the character at loc,
+    # enough for the line and column of a syntax error.
+
+    decoder = codecs.getincrementaldecoder(charset)(errors='replace')
+    text = ''
+    pos = 0
+
+    while pos < len(buf) and (len(text) <= loc or text.find('\n', loc) < 0):
+        text += decoder.decode(buf[pos:pos + CHARSET_WINDOW])
+        pos += CHARSET_WINDOW
+
+    return text
+
+
+def parse_dot_file(path, use_pyparsing=False, include=None, exclude=None,
+                   workers=None, lazy_attributes=False):
+    """Parse a dot language file and return the graph(s) it defines.
+
+    Works like parse_dot_data on the contents of the file. With the
+    built-in parser the file is memory mapped and its tokens are decoded
+    from the mapping a chunk at a time, taking the charset from the first
+    CHARSET_WINDOW bytes, so neither the raw bytes nor the whole text are
+    held in memory. Statements are then read token by token and attribute
+    lists decoded as they are parsed, whatever lazy_attributes is. A
+    parallel parse, when workers is given, reads the whole file instead.
+    """
+
+    with open(path, 'rb') as fd:
+        if PY3 and not use_pyparsing and workers is None:
+            try:
+                buf = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, EnvironmentError):
+                # Empty files and files that can't be mapped are read.
+                buf = None
+
+            if buf is not None:
+                try:
+                    try:
+                        graphs = _parse_dot_buffer(
+                            buf, include, exclude, lazy_attributes)
+                    except DotSyntaxError:
+                        graphs = _leading_graphs(sys.exc_info()[1])
+                    return _graph_or_list(graphs)
+                except UnicodeDecodeError:
+                    # Read the file instead, which falls back to utf-8
+                    # like decode_dot_data.
+                    pass
+                finally:
+                    buf.close()
+
+            fd.seek(0)
+
+        data = fd.read()
+
+    return parse_dot_data(
+        data, use_pyparsing=use_pyparsing, include=include, exclude=exclude,
+        workers=workers, lazy_attributes=lazy_attributes)
@@ -10,6 +10,7 @@ from __future__ import division, print_function
 # 导入division和print_function，division是新的除法特性，原来的除号对于分子分母是整数的情况会取整，但新特性中在此情况下除法不会取整，取整使用//
 # print_function是新的print函数，如果导入此特性，那么之前的print语句不能用了
 
+import json
 import os
 # 导入os模块
 try:
@@ -100,6 +101,15 @@ class TestGraphAPI(unittest.TestCase):
         # 确定节点类型是abc,def,ghi
         self.assertEqual(node.get_style(), 'abc,def,ghi')
 
+    def test_create_attribute_methods(self):
+
+        node = pydotplus.Node('mynode')
+        node.create_attribute_methods(['myattr'])
+        node.set_myattr('x')
+
+        self.assertEqual(node.get_myattr(), 'x')
+        self.assertFalse(hasattr(pydotplus.Node('other'), 'set_myattr'))
+
         # c测试根据节点创造简单图像
     def test_create_simple_graph_with_node(self):
         # 定义点类型数据，名称是g
@@ -220,6 +230,810 @@ class TestGraphAPI(unittest.TestCase):
         # 验证图的名称是A 和B
         self.assertEqual([g.get_name() for g in graphs], ['A', 'B'])
 
+    def test_iter_graphs(self):
+
+        graph_data = 'graph A { a--b };\ndigraph B {c->d}\ngraph C {}'
+
+        graphs = pydotplus.iter_graphs_from_dot_data(graph_data)
+
+        self.assertEqual(next(graphs).get_name(), 'A')
+        self.assertEqual(
+            [(g.get_name(), g.get_type()) for g in graphs],
+            [('B', 'digraph'), ('C', 'graph')]
+        )
+
+    def test_iter_graphs_syntax_error(self):
+
+        graph_data = 'graph A {a--b}\ngraph B { c -- }\ngraph C {x}'
+
+        graphs = pydotplus.iter_graphs_from_dot_data(graph_data)
+
+        self.assertEqual(next(graphs).get_name(), 'A')
+        self.assertRaises(pydotplus.parser.DotSyntaxError, next, graphs)
+        self.assertRaises(
+            pydotplus.parser.DotSyntaxError,
+            pydotplus.parser.DotParser(graph_data).parse)
+        self.assertRaises(
+            pydotplus.parser.DotSyntaxError,
+            pydotplus.parser.parse_dot_graphs, graph_data)
+        self.assertEqual(
+            pydotplus.graph_from_dot_data(graph_data).get_name(), 'A')
+
+        try:
+            pydotplus.parser.DotParser(graph_data).parse()
+        except pydotplus.parser.DotSyntaxError:
+            err = sys.exc_info()[1]
+        self.assertEqual([g.get_name() for g in err.graphs], ['A'])
+
+    def test_graph_from_dot_files(self):
+
+        paths = [
+            os.path.join(MY_REGRESSION_TESTS_DIR, fname)
+            for fname in sorted(os.listdir(MY_REGRESSION_TESTS_DIR))
+            if fname.endswith('.dot')
+        ]
+        paths.insert(1, os.path.join(TEST_DIR, 'missing.dot'))
+
+        graphs = pydotplus.graph_from_dot_files(paths, workers=2)
+
+        self.assertEqual(len(graphs), len(paths))
+        self.assertTrue(isinstance(graphs[1], EnvironmentError))
+
+        for path, graph in zip(paths[2:] + paths[:1], graphs[2:] + graphs[:1]):
+            self.assertEqual(
+                graph.to_string(),
+                pydotplus.graph_from_dot_file(path).to_string()
+            )
+            self.assertTrue(graph.get_parent_graph() is graph)
+
+    def test_parse_dot_parallel(self):
+
+        data = (
+            'strict digraph G {\n'
+            'node [shape=box];\n'
+            'a [label="x; }"]; b [label=<<b>;{</b>>];\n'
+            '/* c; } */ a -> b; // d; }\n'
+            'subgraph s { c; d -> e; }\n'
+            'node [color=red];\n'
+            'a -> {c; e} [weight=2]; f;\n'
+            '}\n'
+            'graph H { x -- y; y -- z; }\n'
+        )
+
+        expected = [
+            pydotplus.graph_to_state(g)
+            for g in pydotplus.parser.DotParser(data).parse()
+        ]
+
+        for chunk_size in (1, 10, 40):
+            graphs = pydotplus.parse_dot_parallel(
+                data, workers=2, chunk_size=chunk_size)
+
+            self.assertEqual(
+                [pydotplus.graph_to_state(g) for g in graphs], expected)
+            self.assertTrue(graphs[0].get_subgraph('s')[0].get_parent_graph()
+                            is graphs[0])
+
+        graph = pydotplus.graph_from_dot_data(data, workers=2)
+        self.assertEqual(pydotplus.graph_to_state(graph[1]), expected[1])
+
+        self.assertEqual(pydotplus.graph_from_dot_data(
+            'graph G { a -- }', workers=2), None)
+
+    def test_graph_state(self):
+
+        import pickle
+
+        graph_data = 'digraph G { a -> {b c}; subgraph s { d -> e } }'
+        graph = pydotplus.graph_from_dot_data(graph_data)
+
+        state = pydotplus.graph_to_state(graph)
+        state = pickle.loads(pickle.dumps(state, -1))
+        graph2 = pydotplus.graph_from_state(state)
+
+        self.assertEqual(graph2.to_string(), graph.to_string())
+        self.assertEqual(graph2.get_top_graph_type(), 'digraph')
+        self.assertTrue(
+            graph2.get_subgraph('s')[0].get_parent_graph() is graph2
+        )
+
+    def test_parse_cache(self):
+
+        import shutil
+        import tempfile
+
+        graph_data = 'digraph G { a -> b; subgraph s { c } }'
+        directory = tempfile.mkdtemp()
+        try:
+            cache = pydotplus.ParseCache(maxsize=1, directory=directory)
+
+            g1 = pydotplus.graph_from_dot_data(graph_data, cache=cache)
+            g1.add_node(pydotplus.Node('d'))
+            g2 = pydotplus.graph_from_dot_data(graph_data, cache=cache)
+            pydotplus.graph_from_dot_data('graph H {}', cache=cache)
+
+            self.assertEqual((cache.hits, cache.misses), (1, 2))
+            self.assertEqual(cache.evictions, 1)
+            self.assertEqual(g2.get_node('d'), [])
+            self.assertEqual(
+                g2.to_string(),
+                pydotplus.graph_from_dot_data(graph_data).to_string()
+            )
+
+            # A new cache reads the entries stored on disk.
+            cache = pydotplus.ParseCache(directory=directory)
+            g3 = pydotplus.graph_from_dot_data(graph_data, cache=cache)
+
+            self.assertEqual((cache.hits, cache.disk_hits), (1, 1))
+            self.assertEqual(g3.to_string(), g2.to_string())
+
+            # Damaged entries are misses, and are written again.
+            for fname in os.listdir(directory):
+                with open(os.path.join(directory, fname), 'wb') as fd:
+                    fd.write(b'\x80\x04garbage')
+            cache = pydotplus.ParseCache(directory=directory)
+            g4 = pydotplus.graph_from_dot_data(graph_data, cache=cache)
+
+            self.assertEqual((cache.hits, cache.misses), (0, 1))
+            self.assertEqual(g4.to_string(), g2.to_string())
+            cache = pydotplus.ParseCache(directory=directory)
+            pydotplus.graph_from_dot_data(graph_data, cache=cache)
+            self.assertEqual(cache.disk_hits, 1)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_dot_index(self):
+
+        import io
+        import shutil
+        import tempfile
+
+        graph_data = (
+            u'digraph A { a -> b [label="\xe9}"]; }\n'
+            u'/* graph B { } */ graph "job 1" { c -- d };\n'
+            u'strict digraph { e }\n'
+        )
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'archive.dot')
+            with io.open(path, 'w', encoding='utf-8') as fd:
+                fd.write(graph_data)
+
+            index = pydotplus.load_dot_index(path)
+
+            self.assertEqual(index.get_names(), ['A', 'job 1', 'G'])
+            self.assertTrue(os.path.exists(path + pydotplus.INDEX_SUFFIX))
+            self.assertEqual(
+                pydotplus.load_dot_index(path, rebuild=False).graphs,
+                index.graphs)
+
+            graphs = pydotplus.graph_from_dot_file(path)
+            for name_or_index, graph in zip(('A', 1, -1), graphs):
+                self.assertEqual(
+                    pydotplus.load_graph(path, name_or_index).to_string(),
+                    graph.to_string())
+
+            self.assertRaises(KeyError, index.find, 'B')
+            self.assertRaises(IndexError, index.find, 3)
+            self.assertRaises(TypeError, index.find, True)
+            self.assertEqual(index.find('job 1'), 1)
+            self.assertEqual(index.find('"job 1"'), 1)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_html_and_quoted_strings(self):
+
+        data = (
+            'digraph G {\n'
+            'a [label=<<TABLE><TR><TD PORT="p">x &lt; y</TD></TR></TABLE>>];\n'
+            'b [label="first \\"line\\"\nsecond line"];\n'
+            '<<b>c</b>> -> a:p;\n'
+            '}\n'
+        )
+
+        for use_pyparsing in (False, True):
+            g = pydotplus.graph_from_dot_data(
+                data, use_pyparsing=use_pyparsing)
+
+            self.assertEqual(
+                g.get_node('a')[0].get_label(),
+                '<<TABLE><TR><TD PORT="p">x &lt; y</TD></TR></TABLE>>')
+            self.assertEqual(
+                g.get_node('b')[0].get_label(),
+                '"first \\"line\\"\nsecond line"')
+            self.assertEqual(len(g.get_edge('<<b>c</b>>', 'a:p')), 1)
+
+    def test_graph_from_json(self):
+
+        json_data = (
+            '{"name": "G", "directed": true, "strict": false, '
+            '"bb": "0,0,62,116", "_subgraph_cnt": 1, "objects": ['
+            '{"_gvid": 0, "name": "cluster_x", "label": "X", '
+            '"nodes": [1, 2], "edges": [0]}, '
+            '{"_gvid": 1, "name": "a", "_draw_": [{"op": "c"}]}, '
+            '{"_gvid": 2, "name": "b c", "color": "red"}], '
+            '"edges": [{"_gvid": 0, "tail": 1, "head": 2, '
+            '"label": "say \\"hi\\""}]}'
+        )
+
+        g = pydotplus.graph_from_json(json_data)
+
+        self.assertEqual(g.get_type(), 'digraph')
+        self.assertEqual(g.get_bb(), '"0,0,62,116"')
+        self.assertEqual(g.get_node_list(), [])
+
+        sgraph = g.get_subgraph('cluster_x')[0]
+        self.assertEqual(sgraph.get_label(), 'X')
+        self.assertEqual(sgraph.get_node('"b c"')[0].get_color(), 'red')
+        self.assertEqual(sgraph.get_node('a')[0].get_attributes(), {})
+        self.assertEqual(
+            sgraph.get_edge('a', '"b c"')[0].get_label(), '"say \\"hi\\""')
+
+        # Default statements are applied to the nodes and edges they cover.
+        g = pydotplus.graph_from_dot_data(
+            'digraph G { node [shape=box]; subgraph cluster_0 { a; b; } '
+            'a -> "c d":p [label="x y"]; {e f} -> a; }')
+        json_data = pydotplus.graph_to_json(g)
+
+        g2 = pydotplus.graph_from_json(json_data)
+        self.assertEqual(
+            g2.get_subgraph('cluster_0')[0].get_node('a')[0].get_shape(),
+            'box')
+        edge = g2.get_edge('a', '"c d"')[0]
+        self.assertEqual(edge.get_headport(), 'p')
+        self.assertEqual(edge.get_label(), '"x y"')
+        self.assertEqual(len(g2.get_edges()), 3)
+
+        json_data = pydotplus.graph_to_json(g2)
+        self.assertEqual(
+            pydotplus.graph_to_json(pydotplus.graph_from_json(json_data)),
+            json_data)
+
+        # A trailing backslash must not escape the closing quote.
+        g = pydotplus.graph_from_json(
+            '{"name": "G", "directed": false, "strict": false, '
+            '"objects": [{"_gvid": 0, "name": "x\\\\"}]}')
+        self.assertEqual(g.get_node_list()[0].get_name(), '"x\\\\"')
+        self.assertEqual(
+            pydotplus.graph_from_json(pydotplus.graph_to_json(g))
+            .get_node_list()[0].get_name(), '"x\\\\"')
+
+    def test_graph_json_round_trip(self):
+
+        for fname in sorted(os.listdir(REGRESSION_TESTS_DIR)):
+            if not fname.endswith('.dot'):
+                continue
+            graph = pydotplus.graph_from_dot_file(
+                os.path.join(REGRESSION_TESTS_DIR, fname))
+            if isinstance(graph, list):
+                graph = graph[0]
+            if graph is None:
+                continue
+
+            json_data = pydotplus.graph_to_json(graph)
+            self.assertEqual(
+                pydotplus.graph_to_json(pydotplus.graph_from_json(json_data)),
+                json_data, fname)
+
+    def test_graph_from_plain(self):
+
+        plain_data = (
+            'graph 1 0.75 1.5\n'
+            'node a 0.375 1.25 0.75 0.5 a solid ellipse black lightgrey\n'
+            'node "b c" 0.375 0.25 0.75 0.5 "b c" solid ellipse black '
+            'lightgrey\n'
+            'edge a "b c" 2 0.375 1 0.375 0.5 solid black\n'
+            'stop\n'
+        )
+
+        layout = pydotplus.graph_from_plain(plain_data)
+
+        self.assertEqual(layout.node_names, ['a', '"b c"'])
+        self.assertEqual(list(layout.bb), [0.0, 0.0, 54.0, 108.0])
+        self.assertEqual(layout.get_node_pos('"b c"'), (27.0, 18.0))
+        self.assertEqual(layout.get_node_size('a'), (54.0, 36.0))
+        self.assertEqual(
+            layout.get_edge_points('a', '"b c"'), [(27.0, 72.0), (27.0, 36.0)]
+        )
+
+    def test_graph_from_xdot(self):
+
+        xdot_data = (
+            'digraph G { graph [bb="0,0,54,108"];\n'
+            'a [height=0.5, pos="27,90", width=0.75];\n'
+            'b [height=0.5, pos="27,18", width=0.75];\n'
+            'a -> b [pos="e,27,36.1 27,71.7 27,64 27,54.7 27,46.1"]; }'
+        )
+
+        layout = pydotplus.graph_from_xdot(xdot_data)
+
+        self.assertEqual(layout.graph.get_name(), 'G')
+        self.assertEqual(list(layout.bb), [0.0, 0.0, 54.0, 108.0])
+        self.assertEqual(layout.get_node_pos('b'), (27.0, 18.0))
+        self.assertEqual(layout.get_node_size('b'), (54.0, 36.0))
+        self.assertEqual(
+            layout.get_edge_points('a', 'b'),
+            [(27.0, 71.7), (27.0, 64.0), (27.0, 54.7), (27.0, 46.1)]
+        )
+        self.assertRaises(
+            pydotplus.parser.DotSyntaxError,
+            pydotplus.graph_from_xdot, 'digraph G { a -> ; }')
+
+        # Edges are keyed by node names, as in plain output, ports aside.
+        layout = pydotplus.graph_from_xdot(
+            'digraph G { a:s -> b [pos="27,72 27,36"]; '
+            'a -> b:n [pos="30,72 30,36"]; }')
+        self.assertEqual(layout.edges, [('a', 'b'), ('a', 'b')])
+        self.assertEqual(
+            layout.get_edge_points('a', 'b', 1), [(30.0, 72.0), (30.0, 36.0)])
+        self.assertEqual(
+            layout.get_edge_points('a:s', 'b'), [(27.0, 72.0), (27.0, 36.0)])
+
+    def test_parallel_parsing(self):
+
+        from multiprocessing.pool import ThreadPool
+
+        graph_data = [
+            'digraph G%d { a%d -> b -> c%d [label=x]; d [shape=box] }' % (
+                i, i, i)
+            for i in xrange(20)
+        ] + ['graph A { a--b }\ngraph B { c--d }']
+
+        def parse(args):
+            data, use_pyparsing = args
+            g = pydotplus.graph_from_dot_data(
+                data, use_pyparsing=use_pyparsing
+            )
+            if isinstance(g, list):
+                return [sg.to_string() for sg in g]
+            return g.to_string()
+
+        jobs = [(data, flag) for data in graph_data for flag in (False, True)]
+        expected = [parse(job) for job in jobs]
+
+        pool = ThreadPool(8)
+        try:
+            results = pool.map(parse, jobs * 10, chunksize=1)
+        finally:
+            pool.close()
+
+        self.assertEqual(results, expected * 10)
+
+    def test_parser_matches_pyparsing(self):
+
+        graph_data = (
+            'digraph G {\n'
+            '  size="7,7"; rankdir=LR\n'
+            '  node [shape=box, color="red"];\n'
+            '  a:p1 -> b -> "c d" [weight=2, label="x"]\n'
+            '  subgraph cluster_0 { label=zero; e; f -> g }\n'
+            '  {rank=same; h i}\n'
+            '  j -> subgraph s { k l }\n'
+            '  m [width=2in] /* comment */ // comment\n'
+            '}\n'
+        )
+
+        g = pydotplus.graph_from_dot_data(graph_data)
+        g_pyparsing = pydotplus.graph_from_dot_data(
+            graph_data, use_pyparsing=True
+        )
+
+        self.assertEqual(g.to_string(), g_pyparsing.to_string())
+
+    def test_parsed_obj_dicts(self):
+
+        g = pydotplus.graph_from_dot_data(
+            'digraph G { a [color=red]; a; a -> b; subgraph s { c -> d } }'
+        )
+
+        self.assertEqual(
+            [n['sequence'] for n in g.obj_dict['nodes']['a']], [1, 2]
+        )
+        self.assertTrue(g.get_node('a')[0].get_parent_graph() is g)
+        self.assertTrue(g.get_edge('a', 'b')[0].get_parent_graph() is g)
+
+        s = g.get_subgraph('s')[0]
+        self.assertTrue(s.get_parent_graph() is g)
+        self.assertTrue(s.get_edge('c', 'd')[0].get_parent_graph() is g)
+        self.assertEqual(s.get_edge('c', 'd')[0].get_sequence(), 1)
+
+    def test_grammar_profile(self):
+
+        profile = pydotplus.profile_dot_data('digraph G { a -> b; c; }')
+
+        self.assertEqual(profile.error, None)
+        self.assertEqual(profile.rules['edge_stmt'][:2], [3, 1])
+        self.assertEqual(profile.rules['node_stmt'][1], 1)
+        self.assertEqual(profile.actions['push_edge_stmt'][0], 1)
+        self.assertEqual(profile.actions['push_top_graph_stmt'][0], 1)
+        self.assertTrue('edge_stmt' in profile.report())
+
+        profile = pydotplus.profile_dot_data('digraph G { a -> ; }')
+
+        self.assertNotEqual(profile.error, None)
+
+    def test_parser_quoted_and_html_ids(self):
+
+        graph_data = (
+            'digraph { a [label="say \\"hi\\"\\\n there"];\n'
+            '  b [label=<<b>bold</b> <i>x</i>>]; }'
+        )
+
+        g = pydotplus.graph_from_dot_data(graph_data)
+
+        self.assertEqual(
+            g.get_node('a')[0].get_label(), '"say \\"hi\\"\\\n there"'
+        )
+        self.assertEqual(
+            g.get_node('b')[0].get_label(), '<<b>bold</b> <i>x</i>>'
+        )
+
+    def test_dot_events(self):
+
+        import io
+
+        graph_data = (
+            b'digraph G { rankdir=LR; edge [color=red];\n'
+            b'  a -> b -> c [label="an \\"edge\\""];\n'
+            b'  subgraph cluster_0 { d } -> e; f [shape=box] }'
+        )
+
+        events = list(pydotplus.iter_dot_events(
+            io.BytesIO(graph_data), chunk_size=3
+        ))
+
+        self.assertEqual(events, [
+            ('graph_start', (False, 'digraph', 'G')),
+            ('attr', ('rankdir', 'LR')),
+            ('default', ('edge', {'color': 'red'})),
+            ('edge', ('a', 'b', {'label': '"an \\"edge\\""'})),
+            ('edge', ('b', 'c', {'label': '"an \\"edge\\""'})),
+            ('subgraph_start', 'cluster_0'),
+            ('node', ('d', {})),
+            ('subgraph_end', 'cluster_0'),
+            ('edge', (('subgraph', 'cluster_0'), 'e', {})),
+            ('node', ('f', {'shape': 'box'})),
+            ('graph_end', 'G'),
+        ])
+
+    def test_parser_lines(self):
+
+        graph_data = (
+            'digraph G {\n'
+            'rankdir=LR;\n'
+            'node [shape=box, label="\\N"];\n'
+            'a [label="x; y", width=1.5];\n'
+            'a -> b -> c  [color=red];\n'
+            'a:p -> <b>;\n'
+            'subgraph cluster_s {\n'
+            '\tc\t[height=0.5,\n'
+            '\t\tpos="27,18"];\n'
+            '\td -- e;\n'
+            '}\n'
+            'f -> subgraph { g }\n'
+            'h [w=2in]; i\n'
+            '-> j;\n'
+            '}\n'
+        )
+
+        graph = pydotplus.graph_from_dot_data(graph_data)
+        expected = pydotplus.parser.DotParser(
+            graph_data, lines=False).parse()[0]
+
+        self.assertEqual(
+            pydotplus.graph_to_state(graph),
+            pydotplus.graph_to_state(expected))
+        self.assertEqual(len(graph.get_edge('i', 'j')), 1)
+        self.assertEqual(
+            pydotplus.graph_from_dot_data(graph.to_string()).to_string(),
+            graph.to_string())
+
+    def test_string_interning(self):
+
+        graph_data = (
+            'digraph G { node1 [color=red]; node2 [color=red]; '
+            'node1 -> node2 [color=red] }'
+        )
+
+        interner = pydotplus.StringInterner(maxsize=3)
+        graph = pydotplus.parser.DotParser(
+            graph_data, interner=interner).parse()[0]
+
+        node1, node2 = graph.get_node('node1')[0], graph.get_node('node2')[0]
+        edge = graph.get_edge('node1', 'node2')[0]
+
+        self.assertEqual(len(interner), 3)
+        self.assertTrue(edge.get_source() is node1.get_name())
+        self.assertTrue(edge.get('color') is node2.get('color'))
+
+        # New strings are not added to a full table.
+        self.assertFalse(edge.get_destination() is node2.get_name())
+
+        node = pydotplus.Node('node3')
+        node.set_color('blue')
+        self.assertTrue(
+            node.get_color() is pydotplus.Edge('a', 'b', color='blue').get(
+                'color'))
+
+    def test_attribute_methods(self):
+
+        node = pydotplus.Node('a')
+        node.set_shape('box')
+        self.assertEqual(node.get_shape(), 'box')
+
+        # The methods are defined by the classes, not by each instance.
+        self.assertEqual(list(node.__dict__), ['obj_dict'])
+        self.assertEqual(list(pydotplus.Dot().__dict__).count('write_png'), 0)
+
+        self.assertTrue(hasattr(pydotplus.Cluster, 'set_pencolor'))
+        self.assertFalse(hasattr(pydotplus.Subgraph, 'set_pencolor'))
+        self.assertTrue(hasattr(pydotplus.Dot, 'create_svg'))
+        self.assertTrue(hasattr(pydotplus.Dot, 'write_raw'))
+
+    def test_stable_wrappers(self):
+
+        graph = pydotplus.graph_from_dot_data(
+            'digraph G { a; a -> b; subgraph s { c } }')
+
+        node = graph.get_node('a')[0]
+        self.assertTrue(graph.get_node('a')[0] is node)
+        self.assertTrue(node in graph.get_node_list())
+        self.assertTrue(
+            graph.get_edge('a', 'b')[0] is graph.get_edge_list()[0])
+        self.assertTrue(
+            graph.get_subgraph('s')[0] is graph.get_subgraph_list()[0])
+
+        # Added instances are the ones handed out.
+        added = pydotplus.Node('d')
+        self.graph_directed.add_node(added)
+        self.assertTrue(self.graph_directed.get_node('d')[0] is added)
+
+    def test_adjacency(self):
+
+        graph = pydotplus.graph_from_dot_data(
+            'digraph G { a -> b; a -> c:p; '
+            'subgraph s { b -> a; c -> {d e} } }')
+
+        self.assertEqual(graph.successors('a'), ['b', 'c'])
+        self.assertEqual(graph.predecessors('a'), ['b'])
+        self.assertEqual(sorted(graph.neighbors('c')), ['a', 'd', 'e'])
+        self.assertEqual(graph.degree('a'), 3)
+        self.assertEqual(graph.get_subgraph('s')[0].successors('c'),
+                         ['d', 'e'])
+
+        # The index follows later changes, in subgraphs too.
+        graph.get_subgraph('s')[0].add_edge(pydotplus.Edge('d', 'a'))
+        graph.del_edge('a', 'b')
+        self.assertEqual(graph.predecessors('a'), ['b', 'd'])
+        self.assertEqual(graph.successors('a'), ['c'])
+        self.assertEqual(graph.degree(pydotplus.Node('b')), 1)
+
+        graph = pydotplus.graph_from_dot_data('graph G { a -- b; c -- a }')
+        self.assertEqual(graph.successors('a'), ['b', 'c'])
+        self.assertEqual(graph.predecessors('b'), ['a'])
+        self.assertEqual(graph.degree('a'), 2)
+
+        # suppress_disconnected only counts the edges of the graph itself.
+        graph = pydotplus.graph_from_dot_data(
+            'digraph G { a; b; c; a -> b; subgraph s { c; d; c -> e } }')
+        graph.set_suppress_disconnected(True)
+        graph.get_subgraph('s')[0].set_suppress_disconnected(True)
+        self.assertEqual(
+            graph.to_string(),
+            'digraph G {\na;\nb;\na -> b;\n'
+            'subgraph s {\nc;\nc -> e;\n}\n\n}\n')
+        self.assertTrue(graph._adjacency is None)
+
+    def test_columnar_graph(self):
+
+        graph = pydotplus.graph_from_dot_data(
+            'digraph G { rankdir=LR; node [shape=box]; a -> b [color=red]; '
+            '"c d" [label=x]; b -> "c d":p; a -> b }')
+        cgraph = pydotplus.graph_to_columnar(graph)
+
+        self.assertEqual(cgraph.to_string(), graph.to_string())
+        self.assertEqual(cgraph.to_dot().to_string(), graph.to_string())
+        self.assertEqual(
+            cgraph.get_edge(0), ('a', 'b', {'color': 'red'}))
+
+        # Edges are added in bulk between node numbers.
+        cgraph = pydotplus.ColumnarGraph(graph_type='graph')
+        a, b = cgraph.add_node_name('a'), cgraph.add_node_name('b')
+        self.assertEqual(cgraph.add_edges([a, b], [b, b], color='red'), 0)
+        self.assertEqual(
+            cgraph.to_string(),
+            'graph G {\na -- b  [color=red];\nb -- b  [color=red];\n}\n')
+        self.assertRaises(IndexError, cgraph.add_edges, [a], [2])
+        self.assertEqual(cgraph.get_edge_count(), 2)
+
+        graph.add_subgraph(pydotplus.Subgraph('s'))
+        self.assertRaises(
+            pydotplus.Error, pydotplus.graph_to_columnar, graph)
+
+    def test_top_graph_type(self):
+
+        inner = pydotplus.Subgraph('inner')
+        inner.add_edge(pydotplus.Edge('a', 'b'))
+        outer = pydotplus.Subgraph('outer')
+        outer.add_subgraph(inner)
+        self.assertEqual(inner.get_top_graph_type(), 'subgraph')
+
+        # Adding the subgraphs to an undirected graph re-parents them.
+        graph = pydotplus.Graph(graph_type='graph')
+        graph.add_subgraph(outer)
+        self.assertEqual(inner.get_top_graph_type(), 'graph')
+        self.assertEqual(inner.get_edge_list()[0].to_string(), 'a -- b;')
+
+        inner.add_edge(pydotplus.Edge('b', 'a'))
+        inner.set_simplify(True)
+        self.assertEqual(inner.to_string().count('--'), 1)
+
+    def test_element_records(self):
+
+        graph = pydotplus.graph_from_dot_data('digraph G { a -> b; c; }')
+        node = graph.get_node('c')[0]
+        edge = graph.get_edge('a', 'b')[0]
+
+        self.assertTrue(isinstance(node.obj_dict, pydotplus.NodeRecord))
+        self.assertTrue(isinstance(edge.obj_dict, pydotplus.EdgeRecord))
+
+        # No attributes dict is created until one is needed.
+        self.assertEqual(node.obj_dict.attributes, None)
+        self.assertEqual(node.get('color'), None)
+        self.assertEqual(graph.to_string().count('c;'), 1)
+        self.assertEqual(node.obj_dict.attributes, None)
+
+        node.set_color('red')
+        self.assertEqual(node.obj_dict['attributes'], {'color': 'red'})
+
+        # Records behave like the obj_dict dicts they replace.
+        self.assertEqual(edge.obj_dict['points'], ('a', 'b'))
+        self.assertEqual(edge.obj_dict.get('missing', 1), 1)
+        edge.obj_dict['custom'] = 2
+        self.assertEqual(dict(edge.obj_dict)['custom'], 2)
+        self.assertEqual(
+            set(node.obj_dict),
+            set(['attributes', 'type', 'parent_graph', 'parent_node_list',
+                 'sequence', 'name', 'port']))
+
+        copy = pydotplus.graph_from_state(pydotplus.graph_to_state(graph))
+        self.assertEqual(copy.to_string(), graph.to_string())
+        self.assertTrue(
+            isinstance(copy.get_node('c')[0].obj_dict, pydotplus.NodeRecord))
+        self.assertEqual(copy.get_edge('a', 'b')[0].obj_dict['custom'], 2)
+
+    def test_lazy_attributes(self):
+
+        graph_data = (
+            'digraph G { a [color=red, label="x ] y"]; '
+            'a -> b -> c [weight=2] /* ] */ [style=bold]; d [shape=]; }'
+        )
+
+        for lines in (True, False):
+            graph = pydotplus.parser.DotParser(
+                graph_data, lines=lines, lazy_attributes=True).parse()[0]
+
+            attrs = graph.get_node('a')[0].obj_dict.attributes
+            self.assertTrue(isinstance(attrs, pydotplus.LazyAttributes))
+            self.assertEqual(attrs.source, '[color=red, label="x ] y"]')
+
+            self.assertEqual(graph.get_node('a')[0].get('color'), 'red')
+            self.assertEqual(attrs.source, None)
+
+            # The decoded dict is handed out, so that code reading dicts
+            # directly, like json, sees the attributes.
+            edge = graph.get_edge('b', 'c')[0]
+            self.assertEqual(
+                json.loads(json.dumps(edge.get_attributes())),
+                {'weight': '2', 'style': 'bold'})
+            self.assertTrue(type(edge.obj_dict.attributes) is dict)
+
+            edges = graph.get_edge_list()
+            self.assertEqual(
+                [edge.get_attributes() for edge in edges],
+                [{'weight': '2', 'style': 'bold'}] * 2)
+
+            # Errors in attribute lists are raised when they are decoded.
+            self.assertRaises(
+                pydotplus.DotSyntaxError, graph.get_node('d')[0].get,
+                'shape')
+
+    def test_dot_document(self):
+
+        doc = pydotplus.DotDocument(
+            'digraph G {\n'
+            'rankdir=LR;\n'
+            'a -> b [label=x];\n'
+            'subgraph s { c }\n'
+            'd;\n'
+            '}\n'
+        )
+        graph = doc.graph
+
+        self.assertEqual(
+            [doc.data[start:end] for start, end in doc.get_spans()],
+            ['rankdir=LR', 'a -> b [label=x]', 'subgraph s { c }', 'd'])
+
+        edits = [
+            ('x]', 1, 'yz'),
+            ('d;', 0, 'e -> a;\n'),
+            ('c }', 1, 'c1'),
+            ('LR', 2, 'TB'),
+            ('d;', 2, ''),
+            ('G', 1, 'H'),
+        ]
+
+        for text, removed, inserted in edits:
+            offset = doc.data.index(text)
+            data = doc.data[:offset] + inserted + doc.data[offset + removed:]
+            self.assertTrue(doc.edit(offset, removed, inserted) is graph)
+            self.assertEqual(doc.data, data)
+            self.assertEqual(
+                graph.to_string(),
+                pydotplus.graph_from_dot_data(data).to_string())
+
+        self.assertEqual(graph.get_attributes(), {'rankdir': 'TB'})
+        self.assertTrue(graph.get_subgraph('s')[0].get_parent_graph() is graph)
+        self.assertTrue(graph.get_node('d') == [])
+
+        self.assertRaises(
+            pydotplus.DotSyntaxError, doc.edit, 0, 0, '{')
+        self.assertEqual(doc.get_spans(), [])
+        doc.edit(0, 1, '')
+        self.assertEqual(len(doc.get_spans()), 4)
+
+    def test_parser_syntax_error(self):
+
+        self.assertEqual(
+            pydotplus.graph_from_dot_data('digraph { a -> ; }'), None
+        )
+
+    def test_graph_from_dot_file_charset(self):
+
+        import tempfile
+
+        graph_data = u'graph G { charset=latin1; "\u00e1\u00f1" -- b }'
+        fd, path = tempfile.mkstemp(suffix='.dot')
+        try:
+            os.write(fd, graph_data.encode('latin1'))
+            os.close(fd)
+            g = pydotplus.graph_from_dot_file(path)
+        finally:
+            os.remove(path)
+
+        self.assertEqual(
+            g.get_edges()[0].get_source(), u'"\u00e1\u00f1"'
+        )
+        self.assertEqual(g.get_charset(), 'latin1')
+
+    def test_graph_from_dot_file_errors(self):
+
+        import tempfile
+
+        graph_data = 'graph A { a -- b }\ngraph B {\n  c -- ;\n}\n'
+        fd, path = tempfile.mkstemp(suffix='.dot')
+        try:
+            os.write(fd, graph_data.encode('utf-8'))
+            os.close(fd)
+            g = pydotplus.graph_from_dot_file(path)
+            self.assertEqual(g.get_name(), 'A')
+
+            with open(path, 'rb') as fobj:
+                buf = pydotplus.parser.mmap.mmap(
+                    fobj.fileno(), 0, access=pydotplus.parser.mmap.ACCESS_READ)
+            try:
+                pydotplus.parser._parse_dot_buffer(buf)
+            except pydotplus.parser.DotSyntaxError:
+                err = sys.exc_info()[1]
+            finally:
+                buf.close()
+        finally:
+            os.remove(path)
+
+        self.assertEqual([g.get_name() for g in err.graphs], ['A'])
+        self.assertEqual((err.lineno, err.column), (3, 8))
+        self.assertEqual(err.line, '  c -- ;')
+
 
         # 测试根据graphviz进行渲染，传入的参数是filename
     def _render_with_graphviz(self, filename):
@@ -401,6 +1215,26 @@ class TestGraphAPI(unittest.TestCase):
 
         self.assertRaises(pydotplus.InvocationException, graph.create)
 
+    def test_format_methods_use_prog(self):
+
+        graph = pydotplus.Dot('graphname', graph_type='digraph')
+        graph.set_prog('neato')
+        graph.set_graphviz_executables({'neato': 'invalid_executable_path'})
+
+        try:
+            graph.create_png()
+        except pydotplus.InvocationException as e:
+            self.assertTrue('invalid_executable_path' in str(e))
+        else:
+            self.fail('InvocationException not raised')
+
+        calls = []
+        graph.write = lambda path, format, prog: calls.append(prog)
+        graph.write_svg('graph.svg')
+        graph.write_svg('graph.svg', prog='dot')
+
+        self.assertEqual(calls, [None, 'dot'])
+
     def test_graph_add_node_argument_type(self):
 
         self._reset_graphs()
@@ -439,6 +1273,62 @@ class TestGraphAPI(unittest.TestCase):
         # 检测data,即图的大小是0
         self.assertEqual(len(data) > 0, True)
 
+    def test_selective_parsing(self):
+
+        graph_data = (
+            'digraph G { rankdir=LR; node [shape=box]; a [label=x]; '
+            'a -> b [color=red]; subgraph s { c -> d } e; }'
+        )
+
+        g = pydotplus.graph_from_dot_data(graph_data, exclude=['attributes'])
+        self.assertEqual(g.get_node('a')[0].get_attributes(), {})
+        self.assertEqual(g.get_edge('a', 'b')[0].get_attributes(), {})
+        self.assertEqual(g.get_node('node')[0].get_shape(), 'box')
+
+        g = pydotplus.graph_from_dot_data(graph_data, include=['edges'])
+        self.assertEqual(g.get_nodes(), [])
+        self.assertEqual(g.get_subgraphs(), [])
+        self.assertEqual(g.get_attributes(), {})
+        self.assertEqual(
+            [(e.get_source(), e.get_destination()) for e in g.get_edges()],
+            [('a', 'b')]
+        )
+
+        g = pydotplus.graph_from_dot_data(
+            graph_data, include=['nodes', 'subgraphs'])
+        self.assertEqual([n.get_name() for n in g.get_nodes()], ['a', 'e'])
+        self.assertEqual(g.get_subgraph('s')[0].get_edges(), [])
+
+        g = pydotplus.graph_from_dot_data(
+            graph_data + ' graph H {}', include=['header'])
+        self.assertEqual(g.get_name(), 'G')
+        self.assertEqual(g.get_attributes(), {'rankdir': 'LR'})
+        self.assertEqual(g.get_nodes(), [])
+
+        self.assertRaises(
+            ValueError, pydotplus.graph_from_dot_data, graph_data,
+            exclude=['labels']
+        )
+
+    def test_parser_lines_skipped_attributes(self):
+
+        graph_data = 'digraph G {\na [w=1];\na -> b [color=red, w=2];\n}\n'
+
+        p = pydotplus.parser.DotParser(graph_data, exclude=['attributes'])
+        graph = p.parse()[0]
+        expected = pydotplus.parser.DotParser(
+            graph_data, exclude=['attributes'], lines=False).parse()[0]
+
+        self.assertEqual(p._line_hits, 2)
+        self.assertEqual(
+            pydotplus.graph_to_state(graph),
+            pydotplus.graph_to_state(expected))
+        self.assertEqual(graph.get_edge('a', 'b')[0].get_attributes(), {})
+        self.assertRaises(
+            pydotplus.parser.DotSyntaxError,
+            pydotplus.parser.DotParser(
+                'digraph G {\na [w=@];\n}\n', exclude=['attributes']).parse)
+
 if __name__ == '__main__':
     suite = unittest.TestLoader().loadTestsFromTestCase(TestGraphAPI)
     unittest.TextTestRunner(verbosity=2).run(suite)